@@ -0,0 +1,132 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import scoping
+from api.serializers import ClientSerializer, ProjectSerializer, TransactionSerializer, UnitSerializer
+from api.sparse import plan_queryset
+
+
+# (rótulo, URL, campos parciais de um uso típico de integração)
+ENDPOINTS = [
+    ('projetos', '/api/v1/projects/', 'id,client_name,unit_name,status,value,updated_at'),
+    ('clientes', '/api/v1/clients/', 'id,name,cpf,status,units'),
+    ('unidades', '/api/v1/units/', 'id,name,is_active'),
+    ('transações', '/api/v1/transactions/', 'id,unit_name,amount,date'),
+    ('histórico', '/api/v1/projects/history/', 'id,project,timestamp'),
+]
+
+SERIALIZERS = [
+    ('projetos', ProjectSerializer, scoping.projects_for),
+    ('clientes', ClientSerializer, scoping.clients_for),
+    ('unidades', UnitSerializer, scoping.units_for),
+    ('transações', TransactionSerializer, scoping.transactions_for),
+]
+
+
+class Command(BaseCommand):
+    help = 'Mede a API v1: consultas e tempo por página (completa x ?fields=), vazão dos serializers e gravação em lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Usuário usado nas requisições')
+        parser.add_argument('--page-size', type=int, default=50, help='Registros por página')
+        parser.add_argument('--rounds', type=int, default=5, help='Repetições de cada medida')
+        parser.add_argument('--bulk', type=int, default=50, help='Clientes criados no teste de gravação em lote (desfeito ao final)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['email']} não encontrado")
+
+        self.user = user
+        self.page_size = max(options['page_size'], 1)
+        self.rounds = max(options['rounds'], 1)
+        self.client = Client(HTTP_HOST='localhost')
+        self.client.force_login(user)
+
+        self.benchmark_endpoints()
+        self.benchmark_serializers()
+        self.benchmark_bulk(max(options['bulk'], 1))
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f"{url} respondeu {response.status_code}")
+        return len(queries), elapsed, len(response.content)
+
+    def benchmark_endpoints(self):
+        self.stdout.write(f"📊 Listagens ({self.page_size} por página, média de {self.rounds} requisições)")
+        self.stdout.write(f"   {'recurso':<12} {'modo':<9} {'consultas':>9} {'ms':>8} {'bytes':>9}")
+        for label, url, fields in ENDPOINTS:
+            for mode, query in (('completo', ''), ('?fields=', f'&fields={fields}')):
+                page_url = f'{url}?page_size={self.page_size}{query}'
+                self._get(page_url)
+                results = [self._get(page_url) for _ in range(self.rounds)]
+                count = results[-1][0]
+                elapsed = sum(result[1] for result in results) / self.rounds
+                self.stdout.write(f"   {label:<12} {mode:<9} {count:>9} {elapsed * 1000:>8.1f} {results[-1][2]:>9}")
+
+    def benchmark_serializers(self):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = self.user
+        context = {'request': request}
+
+        self.stdout.write(f"📊 Serializers ({self.page_size} registros; consultas da leitura + serialização, só a serialização é cronometrada)")
+        self.stdout.write(f"   {'recurso':<12} {'consulta':<11} {'consultas':>9} {'registros/s':>12}")
+        for label, serializer_class, scope in SERIALIZERS:
+            base = scope(self.user).order_by('-created_at', '-id')
+            planned = plan_queryset(base, serializer_class(), extra_columns=('created_at', 'id'))
+            for mode, queryset in (('sem plano', base), ('planejada', planned)):
+                # Sem plano, as relações são buscadas durante a serialização (N+1)
+                with CaptureQueriesContext(connection) as queries:
+                    rows = list(queryset[:self.page_size])
+                    serializer_class(rows, many=True, context=context).data
+                if not rows:
+                    self.stdout.write(f"   {label:<12} {mode:<11} {'-':>9} {'sem dados':>12}")
+                    continue
+                started = time.perf_counter()
+                for _ in range(self.rounds):
+                    serializer_class(rows, many=True, context=context).data
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"   {label:<12} {mode:<11} {len(queries):>9} {len(rows) * self.rounds / elapsed:>12.0f}"
+                )
+
+    def benchmark_bulk(self, total):
+        unit = scoping.writable_units(self.user).first()
+        if unit is None:
+            self.stdout.write('⚠️ Usuário sem unidade ativa: teste de gravação em lote ignorado')
+            return
+
+        payload = [{'name': f'Benchmark API {index}', 'units': [unit.pk]} for index in range(total)]
+        self.stdout.write(f"📊 Criação de {total} clientes (desfeita ao final)")
+        for label, requests in (
+            ('um por requisição', [json.dumps(item) for item in payload]),
+            ('lote (lista)', [json.dumps(payload)]),
+        ):
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for body in requests:
+                        response = self.client.post('/api/v1/clients/', data=body, content_type='application/json')
+                        if response.status_code != 201:
+                            raise CommandError(f"Criação respondeu {response.status_code}: {response.content[:200]}")
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"   {label:<18} {len(requests):>4} requisições | {len(queries):>5} consultas | {elapsed * 1000:>7.0f}ms"
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark concluído'))
@@ -0,0 +1,96 @@
+"""
+Paginação por cursor (keyset) sobre (created_at, id), do mais recente para o mais antigo
+
+Mesma ideia de core.pagination.CursorPage, com a data de criação na frente do
+id: cada página é uma única consulta
+    WHERE created_at < t OR (created_at = t AND id < i)
+    ORDER BY created_at DESC, id DESC LIMIT n+1
+sem OFFSET nem COUNT, com custo constante em qualquer página e sem registros
+repetidos ou pulados quando novos registros entram durante a leitura.
+
+O cursor é opaco (base64 de "<timestamp ISO>|<id>"); a view pode trocar o
+campo de data com `cursor_ordering` (ex.: histórico usa timestamp).
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    ordering = ('created_at', 'id')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValidationError({self.cursor_query_param: 'Cursor inválido.'})
+
+    def encode_cursor(self, timestamp, pk):
+        return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{pk}'.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        time_field, id_field = getattr(view, 'cursor_ordering', self.ordering)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{time_field}', f'-{id_field}')
+        position = self.decode_cursor(request)
+        if position:
+            timestamp, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, f'{id_field}__lt': pk})
+            )
+
+        # Um registro a mais indica se existe próxima página
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = None
+        if len(rows) > page_size:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, time_field), getattr(last, id_field))
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
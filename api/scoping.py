@@ -0,0 +1,85 @@
+"""
+Escopo dos registros visíveis pela API (mesmas regras das listagens com "Todas as unidades")
+
+A API não usa a unidade selecionada na sessão: integrações enxergam tudo o
+que o usuário veria escolhendo "Todas as unidades" no seletor. Para filtrar
+uma unidade, use ?unit=<id>.
+"""
+from enterprises.models import Client
+from projects.models import Bank, CreditLine, Project, ProjectHistory
+from units.models import BankAccount, Transaction, Unit
+from users.models import User
+
+
+def accessible_units(user):
+    """Unidades da empresa com view_all_units; senão as unidades vinculadas ao usuário"""
+    if user.has_perm('users.view_all_units'):
+        return Unit.objects.filter(enterprise_id=user.enterprise_id)
+    return user.units.all()
+
+
+def projects_for(user):
+    projects = Project.objects.filter(enterprise_id=user.enterprise_id)
+    if user.has_perm('users.view_all_projects'):
+        return projects
+    if user.has_perm('users.view_unit_projects'):
+        return projects.filter(unit__in=accessible_units(user))
+    if user.has_perm('users.view_own_projects'):
+        return projects.filter(project_designer=user)
+    return projects.none()
+
+
+def clients_for(user):
+    clients = Client.objects.filter(enterprise_id=user.enterprise_id)
+    if user.has_perm('users.view_all_clients') or user.has_perm('users.view_all_units'):
+        return clients
+    # Sem unidades vinculadas a listagem também mostra todos os clientes da empresa
+    units = user.units.all()
+    if units.exists():
+        # Subconsulta em vez de JOIN: um cliente em duas unidades não aparece duas vezes
+        return clients.filter(pk__in=Client.units.through.objects.filter(unit__in=units).values('client_id'))
+    return clients
+
+
+def units_for(user):
+    return Unit.objects.filter(enterprise_id=user.enterprise_id)
+
+
+def transactions_for(user):
+    transactions = Transaction.objects.filter(unit__enterprise_id=user.enterprise_id)
+    if user.has_perm('users.view_all_unit_transactions'):
+        return transactions
+    return transactions.filter(unit__in=user.units.all())
+
+
+def history_for(user):
+    return ProjectHistory.objects.filter(project__in=projects_for(user).values('pk'))
+
+
+# ==================== OPÇÕES DOS CAMPOS RELACIONADOS (GRAVAÇÃO) ====================
+
+def writable_units(user):
+    """Unidades em que o usuário pode criar projetos e transações"""
+    return accessible_units(user).filter(is_active=True)
+
+
+def writable_transaction_units(user):
+    if user.has_perm('users.view_all_unit_transactions'):
+        return Unit.objects.filter(enterprise_id=user.enterprise_id, is_active=True)
+    return user.units.filter(is_active=True)
+
+
+def enterprise_banks(user):
+    return Bank.objects.filter(enterprise_id=user.enterprise_id, is_active=True)
+
+
+def enterprise_credit_lines(user):
+    return CreditLine.objects.filter(enterprise_id=user.enterprise_id, is_active=True)
+
+
+def enterprise_bank_accounts(user):
+    return BankAccount.objects.filter(enterprise_id=user.enterprise_id, is_active=True)
+
+
+def enterprise_users(user):
+    return User.objects.filter(enterprise_id=user.enterprise_id, is_active=True)
@@ -0,0 +1,253 @@
+"""
+Serializers da API v1
+
+Relações são gravadas por id e lidas como id + nome (ex.: unit e unit_name).
+As opções de cada relação vêm de api.scoping (sempre restritas à empresa e às
+unidades do usuário da requisição).
+
+Gravação em lote (lista no corpo de POST/PATCH da coleção): BulkListSerializer
+valida todos os itens antes de gravar qualquer um, resolve os ids de cada
+relação com uma consulta por campo (não uma por item) e grava tudo numa
+transação. Cada item passa pelo save() do modelo, então os signals (histórico
+e parcelas de projetos, auditoria de clientes, versão dos gráficos) continuam
+valendo.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.digits import digits_or_none
+from enterprises.models import Client
+from projects.models import Project, ProjectHistory
+from units.models import Transaction, Unit
+from . import scoping
+from .sparse import SparseFieldsetMixin
+
+
+BULK_MAX_ITEMS = 500
+
+
+class ScopedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Relação por id com as opções de `scope(user)` (funções de api.scoping)
+    Em gravações em lote os ids já vêm resolvidos por BulkListSerializer
+    """
+
+    def __init__(self, scope=None, **kwargs):
+        self.scope = scope
+        self._bulk_cache = None
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        return self.scope(self.context['request'].user)
+
+    def to_internal_value(self, data):
+        if self._bulk_cache is not None:
+            try:
+                return self._bulk_cache[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Criação e atualização em lote (tudo ou nada)
+    Para atualizar, `instance` é um dict {id: objeto} e cada item do corpo traz o seu "id"
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+        self._bulk_instances = []
+
+    def _relation_fields(self):
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, serializers.ManyRelatedField):
+                yield name, field.child_relation
+            elif isinstance(field, ScopedPrimaryKeyRelatedField):
+                yield name, field
+
+    def _resolve_relations(self, data):
+        """Uma consulta por campo relacionado para todos os itens do lote"""
+        for name, field in self._relation_fields():
+            ids = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                for pk in (value if isinstance(value, list) else [value]):
+                    try:
+                        ids.add(int(pk))
+                    except (TypeError, ValueError):
+                        pass
+            field._bulk_cache = field.get_queryset().in_bulk(ids) if ids else {}
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._resolve_relations(data)
+        self._bulk_instances = []
+        try:
+            validated = super().to_internal_value(data)
+        finally:
+            for _, field in self._relation_fields():
+                field._bulk_cache = None
+
+        # Validações entre itens (ex.: CPF repetido) com erros por item, no mesmo formato dos erros de campo
+        validate_batch = getattr(self.child, 'validate_batch', None)
+        if validate_batch:
+            validate_batch(validated, self._bulk_instances or [None] * len(validated))
+        return validated
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            pk = data.get('id') if isinstance(data, dict) else None
+            try:
+                instance = self.instance[int(pk)]
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError({'id': 'Registro não encontrado.'})
+            self.child.instance = instance
+            self._bulk_instances.append(instance)
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return [
+                self.child.update(obj, attrs)
+                for obj, attrs in zip(self._bulk_instances, validated_data)
+            ]
+
+
+class ApiModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Base dos serializers da API: campos parciais e gravação em lote (Meta.list_serializer_class)"""
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        model_fields = {field.name for field in self.Meta.model._meta.fields}
+        if 'enterprise' in model_fields:
+            validated_data.setdefault('enterprise', user.enterprise)
+        if 'created_by' in model_fields:
+            validated_data.setdefault('created_by', user)
+        return super().create(validated_data)
+
+
+# ==================== RECURSOS ====================
+
+class UnitSerializer(ApiModelSerializer):
+    class Meta:
+        model = Unit
+        list_serializer_class = BulkListSerializer
+        fields = [
+            'id', 'name', 'location', 'is_active',
+            'royalties_percentage', 'marketing_percentage', 'designers_percentage', 'collectors_percentage',
+            'created_at', 'updated_at',
+        ]
+
+
+class ClientSerializer(ApiModelSerializer):
+    units = ScopedPrimaryKeyRelatedField(scope=scoping.writable_units, many=True, required=False)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Client
+        list_serializer_class = BulkListSerializer
+        fields = [
+            'id', 'name', 'email', 'cpf', 'phone', 'address', 'city', 'date_of_birth',
+            'producer_classification', 'property_area', 'activity',
+            'status', 'status_display', 'retorno_ate', 'units', 'observations', 'is_active',
+            'created_at', 'updated_at',
+        ]
+        sparse_sources = {'status_display': ['status']}
+
+    def validate_batch(self, items, instances):
+        """Um CPF por empresa: uma consulta para o lote inteiro, mais os repetidos dentro do próprio lote"""
+        digits = {}
+        for index, attrs in enumerate(items):
+            cpf = digits_or_none(attrs.get('cpf'))
+            if cpf:
+                digits.setdefault(cpf, []).append(index)
+        if not digits:
+            return
+
+        own_ids = [instance.pk for instance in instances if instance is not None]
+        taken = set(
+            Client.objects.filter(
+                enterprise_id=self.context['request'].user.enterprise_id, cpf_digits__in=digits
+            ).exclude(pk__in=own_ids).values_list('cpf_digits', flat=True)
+        )
+        errors = [{} for _ in items]
+        for cpf, indexes in digits.items():
+            for index in indexes if cpf in taken else indexes[1:]:
+                errors[index] = {'cpf': ['Já existe um cliente com este CPF.']}
+        if any(errors):
+            raise serializers.ValidationError(errors if len(items) > 1 else errors[0])
+
+    def validate(self, attrs):
+        # Item avulso; em lote a checagem é feita uma vez pelo BulkListSerializer
+        if not isinstance(self.parent, BulkListSerializer):
+            self.validate_batch([attrs], [self.instance])
+        return attrs
+
+
+class ProjectSerializer(ApiModelSerializer):
+    client = ScopedPrimaryKeyRelatedField(scope=scoping.clients_for)
+    client_name = serializers.CharField(source='client.name', read_only=True)
+    unit = ScopedPrimaryKeyRelatedField(scope=scoping.writable_units)
+    unit_name = serializers.CharField(source='unit.name', read_only=True)
+    bank = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_banks)
+    bank_name = serializers.CharField(source='bank.name', read_only=True)
+    credit_line = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_credit_lines)
+    credit_line_name = serializers.CharField(source='credit_line.name', read_only=True)
+    project_manager = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_users, required=False, allow_null=True)
+    project_designer = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_users, required=False, allow_null=True)
+    project_prospector = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_users, required=False, allow_null=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Project
+        list_serializer_class = BulkListSerializer
+        fields = [
+            'id', 'client', 'client_name', 'unit', 'unit_name', 'bank', 'bank_name',
+            'credit_line', 'credit_line_name', 'status', 'status_display',
+            'project_manager', 'project_designer', 'project_prospector',
+            'value', 'received_value', 'land_size', 'size', 'activity',
+            'installments', 'fees', 'payment_grace', 'project_deadline', 'percentage_astec',
+            'start_date', 'end_date', 'approval_date', 'next_phase_deadline',
+            'first_installment_date', 'last_installment_date',
+            'description', 'project_finalized', 'is_active', 'created_at', 'updated_at',
+        ]
+        # Mudanças de fase seguem o fluxo (e as permissões) das telas de projeto
+        read_only_fields = ['status', 'approval_date', 'project_finalized']
+        sparse_sources = {'status_display': ['status']}
+
+    def create(self, validated_data):
+        # O default do modelo (timezone.now) é um datetime num DateField
+        validated_data.setdefault('start_date', timezone.localdate())
+        return super().create(validated_data)
+
+
+class TransactionSerializer(ApiModelSerializer):
+    unit = ScopedPrimaryKeyRelatedField(scope=scoping.writable_transaction_units)
+    unit_name = serializers.CharField(source='unit.name', read_only=True)
+    bank_account = ScopedPrimaryKeyRelatedField(scope=scoping.enterprise_bank_accounts)
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Transaction
+        list_serializer_class = BulkListSerializer
+        fields = [
+            'id', 'unit', 'unit_name', 'bank_account', 'transaction_type', 'category',
+            'description', 'amount', 'date', 'notes', 'created_by', 'is_active',
+            'created_at', 'updated_at',
+        ]
+
+
+class ProjectHistorySerializer(ApiModelSerializer):
+    class Meta:
+        model = ProjectHistory
+        fields = ['id', 'project', 'timestamp', 'changes']
+        read_only_fields = fields
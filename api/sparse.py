@@ -0,0 +1,100 @@
+"""
+Campos parciais (?fields=) e consulta planejada a partir dos campos pedidos
+
+`?fields=id,name,unit_name` devolve só esses campos, e a consulta acompanha:
+    - .only() com as colunas usadas pelos campos pedidos (mais as do cursor);
+    - select_related só das FKs percorridas (ex.: unit_name -> unit__name);
+    - prefetch_related só das relações many (ex.: units), já com .only('id').
+Sem ?fields= todos os campos são devolvidos e todas as relações planejadas.
+
+Campos cujo `source` não é uma coluna (ex.: get_status_display) declaram as
+colunas de que dependem em Meta.sparse_sources.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def parse_fields(request, serializer_class):
+    """Campos pedidos em ?fields= (None = todos); campos desconhecidos geram 400"""
+    raw = request.query_params.get(FIELDS_QUERY_PARAM)
+    if not raw:
+        return None
+    requested = [name.strip() for name in raw.split(',') if name.strip()]
+    available = serializer_class().fields
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValidationError({
+            FIELDS_QUERY_PARAM: f"Campos desconhecidos: {', '.join(unknown)}. Disponíveis: {', '.join(available)}."
+        })
+    return requested
+
+
+class SparseFieldsetMixin:
+    """Serializer que aceita fields=[...] e descarta os demais campos"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def _walk(model, path):
+    """
+    Percorre `path` (a__b__c) a partir de `model`
+    Retorna (prefixo das FKs percorridas, modelo final, campo final) ou None se não for uma coluna
+    """
+    parts = path.split('__')
+    joins = []
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if index == len(parts) - 1:
+            return '__'.join(joins), model, field
+        if not (field.many_to_one or field.one_to_one):
+            return None
+        joins.append(part)
+        model = field.related_model
+    return None
+
+
+def plan_queryset(queryset, serializer, extra_columns=()):
+    """Aplica only/select_related/prefetch_related conforme os campos do serializer (já filtrados)"""
+    model = queryset.model
+    sparse_sources = getattr(getattr(serializer, 'Meta', None), 'sparse_sources', {})
+    columns = {model._meta.pk.name, *extra_columns}
+    select = set()
+    prefetch = {}
+
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.ManyRelatedField):
+            relation = field.source
+            related_model = model._meta.get_field(relation).related_model
+            prefetch[relation] = Prefetch(relation, queryset=related_model._base_manager.only('pk'))
+            continue
+        paths = sparse_sources.get(name) or [field.source.replace('.', '__')]
+        for path in paths:
+            walked = _walk(model, path)
+            if walked is None:
+                continue
+            joins, _, final = walked
+            if joins:
+                select.add(joins)
+            if final.many_to_many or final.one_to_many:
+                continue
+            columns.add(path)
+
+    queryset = queryset.only(*columns)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch.values())
+    return queryset
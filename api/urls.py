@@ -0,0 +1,20 @@
+from django.urls import path
+
+from core.db_router import read_replica
+from . import views
+
+
+# Leituras (GET) na réplica, como relatórios e dashboards; gravações no principal
+urlpatterns = [
+    path('projects/', read_replica(views.ProjectList.as_view()), name='api_projects'),
+    path('projects/<int:pk>/', read_replica(views.ProjectDetail.as_view()), name='api_project'),
+    path('projects/history/', read_replica(views.ProjectHistoryList.as_view()), name='api_project_history'),
+    path('projects/board/', read_replica(views.ProjectBoard.as_view()), name='api_project_board'),
+    path('projects/transitions/', views.ProjectTransitions.as_view(), name='api_project_transitions'),
+    path('clients/', read_replica(views.ClientList.as_view()), name='api_clients'),
+    path('clients/<int:pk>/', read_replica(views.ClientDetail.as_view()), name='api_client'),
+    path('units/', read_replica(views.UnitList.as_view()), name='api_units'),
+    path('units/<int:pk>/', read_replica(views.UnitDetail.as_view()), name='api_unit'),
+    path('transactions/', read_replica(views.TransactionList.as_view()), name='api_transactions'),
+    path('transactions/<int:pk>/', read_replica(views.TransactionDetail.as_view()), name='api_transaction'),
+]
@@ -0,0 +1,303 @@
+"""
+Views da API v1 (/api/v1/)
+
+Coleções:
+    GET    lista paginada por cursor (?cursor=, ?page_size=), com ?fields= e filtros
+    POST   cria um registro (objeto) ou vários (lista, até BULK_MAX_ITEMS)
+    PATCH  atualiza vários registros (lista de objetos com "id")
+Registros:
+    GET / PATCH / PUT em /<recurso>/<id>/
+Fases dos projetos:
+    GET    /projects/board/ quadro da esteira (contagem e primeiros cartões de cada fase)
+    POST   /projects/transitions/ muda a fase de vários projetos (projects.transitions)
+
+Cada recurso declara o escopo (api.scoping), as permissões por método e os
+filtros aceitos na query string.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import RowNumber
+from django.urls import reverse
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from enterprises.models import Client
+from projects.models import PROJECT_STATUS_CHOICES
+from projects.transitions import MAX_TRANSITIONS, bulk_transition
+from . import scoping
+from .pagination import KeysetCursorPagination
+from .serializers import (
+    ClientSerializer,
+    ProjectHistorySerializer,
+    ProjectSerializer,
+    TransactionSerializer,
+    UnitSerializer,
+)
+from .sparse import parse_fields, plan_queryset
+
+
+class HasResourcePermission(BasePermission):
+    """Permissão do sistema (users.*) exigida pela view para o método HTTP"""
+    message = 'Você não tem permissão para esta ação.'
+
+    def has_permission(self, request, view):
+        method = 'GET' if request.method in ('GET', 'HEAD', 'OPTIONS') else request.method
+        permission = view.required_perms.get(method)
+        return bool(permission) and request.user.has_perm(permission)
+
+
+class ResourceMixin:
+    """Escopo do usuário, filtros da query string e consulta planejada pelos campos pedidos"""
+    permission_classes = [IsAuthenticated, HasResourcePermission]
+    pagination_class = KeysetCursorPagination
+    scope = None
+    required_perms = {}
+    # Parâmetro da query string -> lookup do ORM
+    filters = {}
+
+    def requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = parse_fields(self.request, self.get_serializer_class()) \
+                if self.request.method == 'GET' else None
+        return self._requested_fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.requested_fields() is not None:
+            kwargs['fields'] = self.requested_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def scoped_queryset(self):
+        return type(self).scope(self.request.user)
+
+    def filter_queryset(self, queryset):
+        for param, lookup in self.filters.items():
+            value = self.request.query_params.get(param)
+            if value not in (None, ''):
+                if value in ('true', 'false'):
+                    value = value == 'true'
+                try:
+                    queryset = queryset.filter(**{lookup: value})
+                except (ValueError, DjangoValidationError):
+                    raise ValidationError({param: 'Valor inválido.'})
+        return queryset
+
+    def get_queryset(self):
+        queryset = self.scoped_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        serializer = self.get_serializer_class()(fields=self.requested_fields())
+        cursor_columns = getattr(self, 'cursor_ordering', KeysetCursorPagination.ordering)
+        return plan_queryset(queryset, serializer, extra_columns=cursor_columns)
+
+
+class ResourceListView(ResourceMixin, generics.ListCreateAPIView):
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        """Atualização em lote: [{"id": 1, ...}, {"id": 2, ...}]"""
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': 'Envie uma lista de objetos com "id".'})
+        ids = [item.get('id') for item in request.data if isinstance(item, dict)]
+        ids = [pk for pk in ids if isinstance(pk, int)]
+        # Só registros do escopo do usuário; ids fora dele são "não encontrados"
+        instances = self.scoped_queryset().in_bulk(ids)
+        serializer = self.get_serializer(instances, data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
+class ResourceDetailView(ResourceMixin, generics.RetrieveUpdateAPIView):
+    pass
+
+
+# ==================== RECURSOS ====================
+
+class ProjectResource:
+    serializer_class = ProjectSerializer
+    scope = scoping.projects_for
+    required_perms = {'GET': 'users.view_projects', 'POST': 'users.add_projects', 'PATCH': 'users.change_projects', 'PUT': 'users.change_projects'}
+    filters = {'unit': 'unit_id', 'client': 'client_id', 'bank': 'bank_id', 'credit_line': 'credit_line_id', 'status': 'status', 'is_active': 'is_active'}
+
+
+class ClientResource:
+    serializer_class = ClientSerializer
+    scope = scoping.clients_for
+    required_perms = {'GET': 'users.view_clients', 'POST': 'users.add_clients', 'PATCH': 'users.change_clients', 'PUT': 'users.change_clients'}
+    filters = {'status': 'status', 'is_active': 'is_active'}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        unit = self.request.query_params.get('unit')
+        if unit:
+            if not unit.isdigit():
+                raise ValidationError({'unit': 'Valor inválido.'})
+            queryset = queryset.filter(pk__in=Client.units.through.objects.filter(unit_id=unit).values('client_id'))
+        return queryset
+
+
+class UnitResource:
+    serializer_class = UnitSerializer
+    scope = scoping.units_for
+    required_perms = {'GET': 'users.view_units', 'POST': 'users.add_units', 'PATCH': 'users.change_units', 'PUT': 'users.change_units'}
+    filters = {'is_active': 'is_active'}
+
+
+class TransactionResource:
+    serializer_class = TransactionSerializer
+    scope = scoping.transactions_for
+    required_perms = {'GET': 'users.view_unit_transactions', 'POST': 'users.add_unit_transactions', 'PATCH': 'users.change_unit_transactions', 'PUT': 'users.change_unit_transactions'}
+    filters = {'unit': 'unit_id', 'type': 'transaction_type', 'category': 'category', 'date_from': 'date__gte', 'date_to': 'date__lte', 'is_active': 'is_active'}
+
+
+class ProjectList(ProjectResource, ResourceListView):
+    pass
+
+
+class ProjectDetail(ProjectResource, ResourceDetailView):
+    pass
+
+
+class ClientList(ClientResource, ResourceListView):
+    pass
+
+
+class ClientDetail(ClientResource, ResourceDetailView):
+    pass
+
+
+class UnitList(UnitResource, ResourceListView):
+    pass
+
+
+class UnitDetail(UnitResource, ResourceDetailView):
+    pass
+
+
+class TransactionList(TransactionResource, ResourceListView):
+    pass
+
+
+class TransactionDetail(TransactionResource, ResourceDetailView):
+    pass
+
+
+class ProjectHistoryList(ResourceMixin, generics.ListAPIView):
+    """Histórico de alterações dos projetos visíveis ao usuário (?project=<id>)"""
+    serializer_class = ProjectHistorySerializer
+    scope = scoping.history_for
+    required_perms = {'GET': 'users.view_projects'}
+    filters = {'project': 'project_id'}
+    cursor_ordering = ('timestamp', 'id')
+
+
+class ProjectBoard(ProjectResource, ResourceMixin, generics.GenericAPIView):
+    """
+    Quadro da esteira: uma coluna por fase com contagem, valor total e os
+    primeiros ?per_column= cartões (mais recentes primeiro)
+
+    Duas consultas, qualquer que seja o número de fases (as colunas vêm de
+    PROJECT_STATUS_CHOICES, inclusive as vazias):
+        - contagem e valor por fase num GROUP BY status;
+        - os primeiros cartões de todas as colunas numa consulta com
+          ROW_NUMBER() OVER (PARTITION BY status ...), já com cliente,
+          unidade, banco e linha de crédito no JOIN.
+    O restante de cada coluna vem pelo link "next", que é a listagem de
+    projetos filtrada pela fase com o cursor (created_at, id) do último cartão.
+    Aceita os filtros da listagem de projetos e ?fields= para os cartões.
+    """
+    board_fields = [
+        'id', 'client', 'client_name', 'unit', 'unit_name', 'bank_name', 'credit_line_name',
+        'status', 'value', 'next_phase_deadline', 'project_designer', 'created_at',
+    ]
+    per_column = 10
+    max_per_column = 50
+
+    def requested_fields(self):
+        return super().requested_fields() or self.board_fields
+
+    def get_per_column(self):
+        try:
+            size = int(self.request.query_params.get('per_column', self.per_column))
+        except (TypeError, ValueError):
+            return self.per_column
+        return max(1, min(size, self.max_per_column))
+
+    def get(self, request, *args, **kwargs):
+        per_column = self.get_per_column()
+        queryset = self.filter_queryset(self.scoped_queryset())
+
+        totals = {
+            row['status']: row
+            for row in queryset.order_by().values('status').annotate(count=Count('pk'), total=Sum('value'))
+        }
+
+        ranked = plan_queryset(queryset, self.get_serializer_class()(fields=self.requested_fields()),
+                               extra_columns=('status', 'created_at', 'id'))
+        ranked = ranked.annotate(board_rank=Window(
+            RowNumber(), partition_by=[F('status')], order_by=[F('created_at').desc(), F('id').desc()],
+        )).filter(board_rank__lte=per_column).order_by('status', '-created_at', '-id')
+        cards = {}
+        for project in ranked:
+            cards.setdefault(project.status, []).append(project)
+
+        columns = []
+        for code, label in PROJECT_STATUS_CHOICES:
+            column_cards = cards.get(code, [])
+            row = totals.get(code, {})
+            count = row.get('count', 0)
+            columns.append({
+                'status': code,
+                'label': label,
+                'count': count,
+                # Mesmo formato do campo value dos cartões (texto com 2 casas)
+                'value': f"{row.get('total') or 0:.2f}",
+                'cards': self.get_serializer(column_cards, many=True).data,
+                'next': self.column_link(code, column_cards[-1], per_column) if count > len(column_cards) else None,
+            })
+        return Response({'columns': columns})
+
+    def column_link(self, code, last, per_column):
+        """Próxima página da coluna: listagem de projetos da fase a partir do último cartão"""
+        params = self.request.query_params.copy()
+        params.pop('per_column', None)
+        params['status'] = code
+        params['fields'] = ','.join(self.requested_fields())
+        params[KeysetCursorPagination.page_size_query_param] = per_column
+        params[KeysetCursorPagination.cursor_query_param] = KeysetCursorPagination().encode_cursor(last.created_at, last.pk)
+        return self.request.build_absolute_uri(f"{reverse('api_projects')}?{params.urlencode()}")
+
+
+class ProjectTransitions(APIView):
+    """
+    Mudança de fase em lote
+        [{"id": 1, "status": "AN"}, {"id": 2, "status": "PE"}]
+    ou, todos para a mesma fase,
+        {"ids": [1, 2, 3], "status": "AN"}
+    Responde 200 com o resultado de cada item; recusas não impedem os demais
+    """
+    permission_classes = [IsAuthenticated, HasResourcePermission]
+    required_perms = {'POST': 'users.change_projects'}
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if isinstance(items, dict) and isinstance(items.get('ids'), list):
+            items = [{'id': pk, 'status': items.get('status')} for pk in items['ids']]
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'detail': 'Envie uma lista de {"id", "status"} ou {"ids": [...], "status": ...}.'})
+        if len(items) > MAX_TRANSITIONS:
+            raise ValidationError({'detail': f'Máximo de {MAX_TRANSITIONS} projetos por requisição.'})
+
+        results = bulk_transition(request.user, items, scoping.projects_for(request.user))
+        applied = sum(1 for result in results if result['ok'])
+        return Response({'applied': applied, 'rejected': len(results) - applied, 'results': results})
@@ -1,7 +1,22 @@
+"""
+Entrada ASGI (produção: gunicorn com workers do uvicorn, ver deploy/Dockerfile)
+
+Views síncronas continuam funcionando: o Django as executa em uma thread do
+worker. As views async (downloads de documentos, APIs JSON dos relatórios e
+status das exportações) esperam o storage/banco sem bloquear o worker.
+"""
 import os
+import time
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
+_boot_started = time.perf_counter()
+
 application = get_asgi_application()
+
+# Compila os templates antes do worker aceitar requisições (WARM_TEMPLATES_ON_BOOT)
+from core.template_warmup import warm_templates_on_boot  # noqa: E402
+
+warm_templates_on_boot(_boot_started)
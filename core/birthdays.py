@@ -0,0 +1,80 @@
+"""
+Consulta de aniversariantes pela chave de aniversário (mês * 100 + dia)
+
+Client e User guardam birthday_key (indexado) calculado no save() a partir de
+date_of_birth. Assim "quem faz aniversário entre hoje e daqui a N dias" vira
+uma única consulta por faixa de inteiros, inclusive na virada do ano
+(ex.: 28/12 a 03/01 = chave >= 1228 OU chave <= 103).
+
+A chave 229 (29/02) fica naturalmente entre 228 e 301: em anos não bissextos
+esses aniversariantes aparecem nas faixas que passam por 28/02 → 01/03 e são
+considerados aniversariantes no dia 28/02.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.dateparse import parse_date
+
+
+def birthday_key(value):
+    """Chave mês * 100 + dia de uma data (ou string ISO), ou None"""
+    if isinstance(value, str):
+        try:
+            value = parse_date(value.strip())
+        except ValueError:
+            value = None
+    if not value:
+        return None
+    return value.month * 100 + value.day
+
+
+def birthday_today_keys(today):
+    """Chaves de quem faz aniversário hoje (29/02 entra no dia 28/02 em anos não bissextos)"""
+    keys = [birthday_key(today)]
+    if today.month == 2 and today.day == 28 and not calendar.isleap(today.year):
+        keys.append(229)
+    return keys
+
+
+def birthday_today_q(today, field='birthday_key'):
+    """Filtro dos aniversariantes do dia"""
+    return Q(**{f'{field}__in': birthday_today_keys(today)})
+
+
+def birthday_range_q(start, days, field='birthday_key'):
+    """Filtro dos aniversariantes de `start` até `start + days` (inclusive), tratando a virada do ano"""
+    if days >= 365:
+        return Q(**{f'{field}__isnull': False})
+
+    start_key = birthday_key(start)
+    end_key = birthday_key(start + timedelta(days=days))
+    if start_key <= end_key:
+        return Q(**{f'{field}__gte': start_key, f'{field}__lte': end_key})
+    return Q(**{f'{field}__gte': start_key}) | Q(**{f'{field}__lte': end_key})
+
+
+def birthday_order(start, field='birthday_key'):
+    """
+    Ordenação pelo próximo aniversário a partir de `start`
+    Uso: queryset.annotate(birthday_wrap=birthday_order(today)).order_by('birthday_wrap', 'birthday_key')
+    """
+    return Case(
+        When(**{f'{field}__gte': birthday_key(start)}, then=Value(0)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def next_birthday(date_of_birth, today):
+    """Data do próximo aniversário (29/02 vira 28/02 em anos não bissextos)"""
+    def in_year(year):
+        try:
+            return date_of_birth.replace(year=year)
+        except ValueError:
+            return date_of_birth.replace(year=year, day=28)
+
+    birthday = in_year(today.year)
+    if birthday < today:
+        birthday = in_year(today.year + 1)
+    return birthday
@@ -1,3 +1,6 @@
+from .mixins import set_selected_unit
+
+
 def user_units_context(request):
     """Context processor para disponibilizar unidades do usuário"""
     context = {
@@ -30,7 +33,7 @@ def user_units_context(request):
             selected_unit_id = request.session.get('selected_unit_id')
             if not selected_unit_id:
                 # Definir "Todas as unidades" como padrão
-                request.session['selected_unit_id'] = 'all'
+                set_selected_unit(request, 'all')
                 context['is_all_units_selected'] = True
                 context['selected_unit'] = None
             elif selected_unit_id == 'all':
@@ -43,7 +46,7 @@ def user_units_context(request):
                     context['selected_unit'] = selected_unit
                 except:
                     # Se unidade não existe, voltar para "Todas as unidades"
-                    request.session['selected_unit_id'] = 'all'
+                    set_selected_unit(request, 'all')
                     context['is_all_units_selected'] = True
                     context['selected_unit'] = None
         else:
@@ -60,13 +63,12 @@ def user_units_context(request):
                     context['selected_unit'] = selected_unit
                 except:
                     # Se a unidade não existe mais ou usuário perdeu acesso, limpar sessão
-                    if 'selected_unit_id' in request.session:
-                        del request.session['selected_unit_id']
+                    set_selected_unit(request, None)
             
             # Se não tem unidade selecionada mas tem unidades, selecionar a primeira
             if not context['selected_unit'] and user_units.exists():
                 first_unit = user_units.first()
                 context['selected_unit'] = first_unit
-                request.session['selected_unit_id'] = first_unit.id
+                set_selected_unit(request, first_unit.id)
     
     return context 
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Métricas do pool de conexões do PostgreSQL (settings: DB_POOL)
+
+Cada worker do gunicorn tem o seu próprio pool (psycopg_pool.ConnectionPool,
+criado pelo Django na primeira consulta); as métricas são as do worker que
+atendeu a requisição. Sem pool (SQLite em desenvolvimento ou DB_POOL=False)
+só o modo de conexão é informado.
+"""
+import os
+
+from django.db import connections
+
+
+def pool_stats(alias='default'):
+    connection = connections[alias]
+    stats = {
+        'pid': os.getpid(),
+        'vendor': connection.vendor,
+        'pool': False,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if not pool:
+        return stats
+
+    # get_stats() traz contadores acumulados e medidas do momento (pool_size, pool_available, requests_waiting)
+    raw = pool.get_stats()
+    size = raw.get('pool_size', 0)
+    requests = raw.get('requests_num', 0)
+    wait_ms = raw.get('requests_wait_ms', 0)
+    stats.update({
+        'pool': True,
+        'min_size': pool.min_size,
+        'max_size': pool.max_size,
+        'size': size,
+        'in_use': size - raw.get('pool_available', 0),
+        'waiting': raw.get('requests_waiting', 0),
+        'requests': requests,
+        'queued': raw.get('requests_queued', 0),
+        'timeouts': raw.get('requests_errors', 0),
+        'wait_ms_total': wait_ms,
+        'wait_ms_avg': round(wait_ms / requests, 2) if requests else 0,
+        'connections_opened': raw.get('connections_num', 0),
+        'connection_errors': raw.get('connections_errors', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+    })
+    return stats
@@ -0,0 +1,183 @@
+"""
+Leituras de relatórios e dashboards na réplica (settings: DB_REPLICA_*)
+
+Só as views marcadas com @read_replica (e os trechos em `with replica_reads()`,
+como a geração de PDFs) leem do alias 'replica'; todo o resto, e toda
+gravação, continua no banco principal.
+
+Volta para o principal quando:
+    - não há réplica configurada;
+    - a réplica não responde ou está atrasada mais que REPLICA_MAX_LAG_SECONDS
+      (verificado no máximo a cada REPLICA_CHECK_INTERVAL segundos por processo);
+    - o usuário gravou algo há menos de REPLICA_PIN_SECONDS (leia o que você
+      escreveu): ReplicaPinMiddleware guarda o horário da última gravação na
+      sessão e as leituras seguintes desse usuário ficam no principal.
+
+Sessões e o cache em banco nunca vão para a réplica e não contam como gravação.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+
+REPLICA_ALIAS = 'replica'
+LAST_WRITE_SESSION_KEY = 'db:last_write'
+
+# Apps lidos/gravados sempre no principal, sem fixar o usuário nele
+_PRIMARY_ONLY_APPS = {'sessions', 'django_cache'}
+
+
+class _Routing:
+    __slots__ = ('replica', 'wrote', 'pinned')
+
+    def __init__(self, pinned=False):
+        self.replica = False
+        self.wrote = False
+        # Usuário gravou há pouco: nada desta requisição lê da réplica
+        self.pinned = pinned
+
+
+_routing = ContextVar('db_routing', default=None)
+
+_health = {'checked_at': 0.0, 'healthy': False}
+
+
+def _replica_lag(connection):
+    """Atraso da réplica em segundos (0 quando não é uma réplica em recuperação, ex.: SQLite)"""
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0
+        # Réplica sem WAL pendente não está atrasada, mesmo sem transações recentes no principal
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )
+        return cursor.fetchone()[0] or 0
+
+
+def replica_available():
+    """Réplica configurada, no ar e dentro do atraso máximo (resultado reaproveitado por REPLICA_CHECK_INTERVAL)"""
+    if REPLICA_ALIAS not in settings.DATABASES:
+        return False
+
+    now = time.monotonic()
+    if now - _health['checked_at'] < settings.REPLICA_CHECK_INTERVAL:
+        return _health['healthy']
+
+    try:
+        lag = _replica_lag(connections[REPLICA_ALIAS])
+        healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            print(f"⚠️ Réplica atrasada {lag:.1f}s: leituras no banco principal")
+    except Exception as e:
+        healthy = False
+        print(f"⚠️ Réplica indisponível ({e}): leituras no banco principal")
+        connections[REPLICA_ALIAS].close()
+
+    _health.update(checked_at=now, healthy=healthy)
+    return healthy
+
+
+@contextmanager
+def replica_reads(available=None):
+    """
+    Leituras do bloco vão para a réplica, se estiver disponível (tarefas em segundo plano e exportações)
+    Também serve como decorator: @replica_reads()
+    Em código async, passe `available` já verificado (replica_available consulta o banco)
+    """
+    routing = _routing.get()
+    token = None
+    if routing is None:
+        routing = _Routing()
+        token = _routing.set(routing)
+
+    previous = routing.replica
+    if available is None and not routing.pinned:
+        available = replica_available()
+    routing.replica = previous or (not routing.pinned and bool(available))
+    try:
+        yield
+    finally:
+        routing.replica = previous
+        if token is not None:
+            _routing.reset(token)
+
+
+def read_replica(view_func):
+    """Decorator para views somente leitura (relatórios e dashboards): leituras na réplica, salvo usuário fixado no principal"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_async_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view_func(request, *args, **kwargs)
+            available = await sync_to_async(replica_available)()
+            with replica_reads(available):
+                return await view_func(request, *args, **kwargs)
+        return _wrapped_async_view
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+class ReplicaPinMiddleware:
+    """
+    Leia o que você escreveu: após uma gravação, fixa as leituras do usuário no principal por REPLICA_PIN_SECONDS
+    Deve ficar depois do SessionMiddleware
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            return self.get_response(request)
+
+        last_write = request.session.get(LAST_WRITE_SESSION_KEY)
+        routing = _Routing(pinned=bool(last_write) and time.time() - last_write < settings.REPLICA_PIN_SECONDS)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote:
+            request.session[LAST_WRITE_SESSION_KEY] = int(time.time())
+        return response
+
+
+class ReplicaRouter:
+    """Leituras na réplica só dentro de read_replica/replica_reads; gravações e migrações sempre no principal"""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.replica and not routing.wrote \
+                and model._meta.app_label not in _PRIMARY_ONLY_APPS:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label not in _PRIMARY_ONLY_APPS:
+            # Depois da primeira gravação o restante da requisição também lê do principal
+            routing.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e principal têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema pela replicação do próprio banco
+        return db != REPLICA_ALIAS
@@ -0,0 +1,30 @@
+"""
+Versões só com dígitos de CPF e telefone
+
+CPF e telefone são guardados formatados ("123.456.789-00", "(69) 99999-9999"),
+mas comparações e links precisam dos dígitos. Client e User mantêm colunas
+cpf_digits e phone_digits (indexadas) preenchidas no save(); buscas por
+duplicidade e o link do WhatsApp leem esses valores já calculados, sem
+expressão regular e sem depender da formatação digitada.
+"""
+
+
+def only_digits(value):
+    """Somente os dígitos de `value` ('' quando vazio)"""
+    return ''.join(filter(str.isdigit, str(value))) if value else ''
+
+
+def digits_or_none(value):
+    """Dígitos de `value` ou None (mantém a coluna NULL para valores vazios, fora das constraints únicas)"""
+    return only_digits(value) or None
+
+
+def whatsapp_number(digits):
+    """Número para links do WhatsApp a partir dos dígitos do telefone (adiciona o código do Brasil, 55)"""
+    if not digits:
+        return ''
+    if len(digits) in (10, 11):  # (11) 9999-9999 ou (11) 99999-9999
+        return '55' + digits
+    if digits.startswith('55'):  # Já tem código do país
+        return digits
+    return '55' + digits
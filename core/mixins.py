@@ -3,6 +3,21 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
+SELECTED_UNIT_SESSION_KEY = 'selected_unit_id'
+
+
+def set_selected_unit(request, value):
+    """
+    Grava a unidade selecionada ('all', id ou None para remover) apenas quando o valor muda
+    Atribuir o mesmo valor marca a sessão como modificada: gravação da sessão e novo cookie a cada requisição
+    """
+    if value is None:
+        if SELECTED_UNIT_SESSION_KEY in request.session:
+            del request.session[SELECTED_UNIT_SESSION_KEY]
+    elif request.session.get(SELECTED_UNIT_SESSION_KEY) != value:
+        request.session[SELECTED_UNIT_SESSION_KEY] = value
+
+
 class UnitFilterMixin(LoginRequiredMixin):
     """
     Mixin para filtrar dados pela unidade selecionada na sessão
@@ -104,12 +119,12 @@ def unit_filter_required(view_func):
         if not selected_unit_id:
             if request.user.has_perm('users.view_all_units'):
                 # Para usuários com view_all_units, padrão é "Todas as unidades"
-                request.session['selected_unit_id'] = 'all'
+                set_selected_unit(request, 'all')
             else:
                 # Para usuários normais, selecionar primeira unidade vinculada
                 first_unit = request.user.units.filter(is_active=True).first()
                 if first_unit:
-                    request.session['selected_unit_id'] = first_unit.id
+                    set_selected_unit(request, first_unit.id)
         
         return view_func(request, *args, **kwargs)
     
@@ -0,0 +1,48 @@
+"""
+Paginação por cursor para listagens ordenadas por id decrescente (históricos)
+
+Diferente do Paginator (OFFSET + COUNT), cada página é uma única consulta
+"id < cursor ORDER BY id DESC LIMIT n+1", com custo constante mesmo em
+projetos com milhares de registros de histórico.
+"""
+from django.utils.functional import cached_property
+
+
+class CursorPage:
+    """
+    Página de registros mais antigos que `cursor` (id)
+    A consulta só é executada quando entries/has_more/next_cursor são acessados,
+    então um fragmento de template em cache não gera consulta nenhuma.
+    """
+
+    def __init__(self, queryset, cursor=None, page_size=50):
+        self.queryset = queryset
+        self.page_size = page_size
+        try:
+            self.cursor = int(cursor) if cursor else None
+        except (TypeError, ValueError):
+            self.cursor = None
+
+    @cached_property
+    def _rows(self):
+        queryset = self.queryset.order_by('-id')
+        if self.cursor:
+            queryset = queryset.filter(id__lt=self.cursor)
+        # Um registro a mais indica se existe próxima página
+        return list(queryset[:self.page_size + 1])
+
+    @property
+    def entries(self):
+        return self._rows[:self.page_size]
+
+    @property
+    def has_more(self):
+        return len(self._rows) > self.page_size
+
+    @property
+    def next_cursor(self):
+        return self.entries[-1].id if self.has_more else None
+
+    @property
+    def is_first_page(self):
+        return self.cursor is None
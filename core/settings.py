@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     
     # Third party apps
     'storages',
+    'rest_framework',
 
     # Aplicações do projeto
     "users",
@@ -38,11 +39,16 @@ INSTALLED_APPS = [
     "projects",
     "enterprises",
     "reports",
+    "jobs",
+    "mailer",
+    "search",
+    "api",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.db_router.ReplicaPinMiddleware",  # Leituras no principal logo após gravações do usuário
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -59,8 +65,15 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, 'templates')],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Templates compilados ficam em memória por worker (ver core/template_warmup.py)
+            # Em desenvolvimento o autoreload do Django limpa o cache quando um template muda
+            "loaders": [
+                ("django.template.loaders.cached.Loader", [
+                    "django.template.loaders.filesystem.Loader",
+                    "django.template.loaders.app_directories.Loader",
+                ]),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -86,22 +99,75 @@ if DEBUG:
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+    # Réplica para testar o roteamento com dois SQLite: cp db.sqlite3 db_replica.sqlite3 e DB_REPLICA_NAME=db_replica.sqlite3
+    if config('DB_REPLICA_NAME', default=''):
+        DATABASES['replica'] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / config('DB_REPLICA_NAME'),
+            "TEST": {"MIRROR": "default"},
+        }
 else:
+    # Limites aplicados pelo servidor a cada conexão (ms; 0 desativa)
+    # O entrypoint roda o migrate com DB_STATEMENT_TIMEOUT=0 para migrações longas
+    DB_OPTIONS = {
+        # Configuração para psycopg v3
+        'application_name': 'nexiun',
+        'options': (
+            f"-c statement_timeout={config('DB_STATEMENT_TIMEOUT', default=30000, cast=int)} "
+            f"-c idle_in_transaction_session_timeout={config('DB_IDLE_IN_TRANSACTION_TIMEOUT', default=60000, cast=int)}"
+        ),
+    }
+
+    # Pool de conexões do psycopg (um pool por worker do gunicorn; métricas em /db-pool-stats/)
+    # Com DB_POOL=False: conexões persistentes (CONN_MAX_AGE) com verificação antes de reutilizar
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    if DB_POOL:
+        DB_OPTIONS['pool'] = {
+            'name': 'nexiun',
+            'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+            # Segundos esperando uma conexão livre antes de falhar a requisição
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+        }
+
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
             'NAME': config('DB_NAME'),
             'USER': config('DB_USER'),
             'PASSWORD': config('DB_PASSWORD'),
-                    'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT'),
-            'OPTIONS': {
-                # Configuração para psycopg v3
-                'application_name': 'nexiun',
-            },
+            'HOST': config('DB_HOST'),
+            'PORT': config('DB_PORT'),
+            # O pool já reaproveita as conexões: o Django exige CONN_MAX_AGE=0 com pool
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': DB_OPTIONS,
         }
     }
 
+    # Réplica de leitura (relatórios e dashboards): mesmas credenciais, outro host
+    if config('DB_REPLICA_HOST', default=''):
+        replica_options = dict(DB_OPTIONS)
+        if DB_POOL:
+            replica_options['pool'] = {**DB_OPTIONS['pool'], 'name': 'nexiun-replica'}
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': config('DB_REPLICA_HOST'),
+            'PORT': config('DB_REPLICA_PORT', default=config('DB_PORT')),
+            'OPTIONS': replica_options,
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Leituras de relatórios/dashboards na réplica, quando configurada (core/db_router.py)
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Atraso máximo aceito antes de voltar para o principal e intervalo entre verificações (segundos)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=10, cast=float)
+REPLICA_CHECK_INTERVAL = config('REPLICA_CHECK_INTERVAL', default=5, cast=float)
+# Após gravar, o usuário lê do principal por este tempo (leia o que você escreveu)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=float)
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -213,7 +279,96 @@ else:
     DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
     SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
-MESSAGES_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
+# Mensagens em cookie (cai para a sessão só quando passam do tamanho do cookie): não gravam a sessão
+MESSAGES_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+
+# Fila de tarefas em segundo plano (python manage.py run_worker)
+# Em desenvolvimento sem worker rodando, JOBS_ALWAYS_EAGER=True executa as tarefas na própria requisição
+JOBS_ALWAYS_EAGER = config('JOBS_ALWAYS_EAGER', default=False, cast=bool)
+JOBS_LOCK_TIMEOUT = config('JOBS_LOCK_TIMEOUT', default=1800, cast=int)  # segundos até considerar um worker morto
+JOBS_BACKOFF_BASE = 30  # segundos (dobra a cada tentativa)
+JOBS_MAX_BACKOFF = 3600
+# Provedores de email usados pela caixa de saída (mailer)
+# backend/options são repassados para get_connection(); rate_per_minute limita envios por minuto
+MAILER_PROVIDERS = {
+    'default': {
+        'rate_per_minute': config('EMAIL_RATE_PER_MINUTE', default=60, cast=int),
+        'batch_size': 50,
+    },
+}
+# Máximo de tarefas simultâneas por fila somando todos os workers
+JOBS_QUEUE_CONCURRENCY = {
+    'reports': config('JOBS_REPORTS_CONCURRENCY', default=2, cast=int),
+    'imports': config('JOBS_IMPORTS_CONCURRENCY', default=1, cast=int),
+}
+
+# Cache compartilhado entre os workers do gunicorn
+# REDIS_URL definido: Redis (requer o pacote redis); produção sem Redis: tabela no banco
+# (python manage.py createcachetable, executado no entrypoint); desenvolvimento: memória local
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif not DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Sessões (SESSION_ENGINE)
+# - django.contrib.sessions.backends.cached_db: leitura pelo cache, gravação também no banco (padrão com Redis)
+# - django.contrib.sessions.backends.cache: só cache; sessões se perdem se o Redis for reiniciado
+# - django.contrib.sessions.backends.signed_cookies: sessão inteira no cookie assinado, sem consulta nenhuma
+# - django.contrib.sessions.backends.db: tabela django_session (padrão sem Redis; o cache em banco não economiza consultas)
+# A sessão guarda apenas o id do usuário e selected_unit_id (gravado só quando muda, core.mixins.set_selected_unit)
+# Comparar consultas por página: python manage.py benchmark_sessions --email usuario@empresa.com
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db',
+)
+
+# Menu lateral em cache por empresa/permissões/tema (users.navigation)
+NAVIGATION_CACHE_TIMEOUT = config('NAVIGATION_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Segundos em que cada worker reutiliza a versão do catálogo de permissões (users.catalog) sem ler o cache
+PERMISSION_CATALOG_VERSION_TTL = config('PERMISSION_CATALOG_VERSION_TTL', default=5, cast=int)
+
+# Fragmentos de template em cache ({% cache %}) nas páginas de projeto e cliente
+# Os links de documentos passam pela aplicação (views async de download) e não expiram como as URLs assinadas do S3
+FRAGMENT_CACHE_TIMEOUT = 3600
+DOCUMENT_FRAGMENT_CACHE_TIMEOUT = FRAGMENT_CACHE_TIMEOUT
+HISTORY_PAGE_SIZE = 50
+
+# Compila todos os templates do projeto ao iniciar cada worker do gunicorn (core/wsgi.py)
+WARM_TEMPLATES_ON_BOOT = config('WARM_TEMPLATES_ON_BOOT', default=not DEBUG, cast=bool)
+
+# API REST v1 (/api/v1/, app api): sessão do navegador ou HTTP Basic (integrações, sempre via HTTPS)
+# Paginação por cursor sobre (created_at, id); ?page_size= até 200
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
+}
 
 # Configuração de redirecionamento após reset de senha
 LOGIN_URL = 'login'
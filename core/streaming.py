@@ -0,0 +1,52 @@
+"""
+Download de arquivos do storage pelo próprio servidor, em views async
+
+O arquivo é lido em blocos numa thread (boto3 e o FileSystemStorage são
+síncronos) e enviado ao cliente conforme chega: no ASGI o worker continua
+atendendo outras requisições enquanto espera o S3. As leituras usam
+thread_sensitive=False porque não tocam no banco; com o padrão (True) todos
+os downloads do worker disputariam a mesma thread.
+
+No WSGI (core/wsgi.py) o mesmo conteúdo é lido de forma síncrona: o Django
+juntaria um iterador async inteiro em memória antes de enviar.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+async def _read_chunks(field_file, chunk_size):
+    file = await sync_to_async(field_file.storage.open, thread_sensitive=False)(field_file.name, 'rb')
+    try:
+        while True:
+            chunk = await sync_to_async(file.read, thread_sensitive=False)(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+def _read_chunks_sync(field_file, chunk_size):
+    with field_file.storage.open(field_file.name, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+def stream_field_file(request, field_file, filename, content_type=None, size=None, as_attachment=False):
+    """StreamingHttpResponse com o conteúdo de um FileField (PDFs e imagens abrem no navegador por padrão)"""
+    if isinstance(request, ASGIRequest):
+        chunks = _read_chunks(field_file, STREAM_CHUNK_SIZE)
+    else:
+        chunks = _read_chunks_sync(field_file, STREAM_CHUNK_SIZE)
+    response = StreamingHttpResponse(chunks, content_type=content_type or 'application/octet-stream')
+    if size:
+        response['Content-Length'] = str(size)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    # Documentos confidenciais: sem cache em proxies compartilhados
+    response['Cache-Control'] = 'private, max-age=0'
+    return response
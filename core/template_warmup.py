@@ -0,0 +1,91 @@
+"""
+Pré-compilação dos templates do projeto no cached loader
+
+Sem o aquecimento cada worker do gunicorn compila base.html, project_details.html
+e os demais templates grandes na primeira requisição que os usa. O aquecimento
+compila todos os templates do projeto (pasta templates/ e templates dos apps,
+sem os de bibliotecas instaladas) antes do worker receber tráfego.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def get_project_template_dirs():
+    """Pastas de templates do projeto (DIRS + templates/ dos apps dentro de BASE_DIR)"""
+    base_dir = str(settings.BASE_DIR)
+    dirs = []
+    for config in settings.TEMPLATES:
+        dirs.extend(str(directory) for directory in config.get('DIRS', []))
+    dirs.extend(str(directory) for directory in get_app_template_dirs('templates'))
+    return [directory for directory in dict.fromkeys(dirs) if directory.startswith(base_dir)]
+
+
+def find_project_templates():
+    """Nomes dos templates do projeto, como usados em render()/get_template()"""
+    names = []
+    for template_dir in get_project_template_dirs():
+        for root, _, files in os.walk(template_dir):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    names.append(os.path.relpath(path, template_dir).replace(os.sep, '/'))
+    # Um mesmo nome em duas pastas resolve para o primeiro encontrado pelo loader
+    return sorted(set(names))
+
+
+def uses_cached_loader(engine=None):
+    engine = engine or engines['django']
+    return any(isinstance(loader, CachedLoader) for loader in engine.engine.template_loaders)
+
+
+def warm_templates(names=None):
+    """
+    Compila os templates no cached loader do engine Django
+    Retorna estatísticas com o tempo de compilação de cada template (custo evitado na primeira requisição)
+    """
+    engine = engines['django']
+    names = names if names is not None else find_project_templates()
+    timings = []
+    errors = []
+
+    started = time.perf_counter()
+    for name in names:
+        template_started = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as e:
+            errors.append((name, str(e)))
+            continue
+        timings.append((name, (time.perf_counter() - template_started) * 1000))
+
+    return {
+        'templates': len(timings),
+        'errors': errors,
+        'elapsed_ms': (time.perf_counter() - started) * 1000,
+        'timings': sorted(timings, key=lambda item: item[1], reverse=True),
+        'cached_loader': uses_cached_loader(engine),
+    }
+
+
+def warm_templates_on_boot(boot_started):
+    """Compila os templates antes do worker aceitar requisições (WARM_TEMPLATES_ON_BOOT; core/wsgi.py e core/asgi.py)"""
+    if not settings.WARM_TEMPLATES_ON_BOOT:
+        return
+
+    stats = warm_templates()
+    slowest = ', '.join(f"{name} ({ms:.0f}ms)" for name, ms in stats['timings'][:3])
+    print(
+        f"🔥 Worker {os.getpid()}: {stats['templates']} templates compilados em {stats['elapsed_ms']:.0f}ms "
+        f"| boot total {(time.perf_counter() - boot_started) * 1000:.0f}ms | mais lentos: {slowest}",
+        flush=True,
+    )
+    for name, error in stats['errors']:
+        print(f"⚠️ Template {name} não compilou: {error}", flush=True)
@@ -4,19 +4,22 @@ from django.contrib import admin
 from users.views import logout_view
 from django.urls import path, include
 from django.conf.urls.static import static
-from core.views import select_unit
+from core.views import select_unit, db_pool_stats
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('logout/', logout_view, name='logout'),
     path('select-unit/', select_unit, name='select_unit'),
+    path('db-pool-stats/', db_pool_stats, name='db_pool_stats'),
     path("", include("home.urls")),
     path("users/", include("users.urls")),
     path("enterprises/", include("enterprises.urls")),
     path("units/", include("units.urls")),
     path("projects/", include("projects.urls")),
     path('reports/', include('reports.urls')),
+    path('search/', include('search.urls')),
+    path('api/v1/', include('api.urls')),
 
     #recuperar senha
     path('password-reset/', views.PasswordResetView.as_view(), name='password_reset'),
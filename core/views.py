@@ -6,6 +6,9 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 import json
 
+from .db_pool import pool_stats
+from .mixins import set_selected_unit
+
 
 def custom_404_view(request, exception):
     """
@@ -46,7 +49,7 @@ def select_unit(request):
                 return JsonResponse({'success': False, 'message': 'Você não tem permissão para ver todas as unidades'})
             
             # Salvar "all" na sessão
-            request.session['selected_unit_id'] = 'all'
+            set_selected_unit(request, 'all')
             
             # Adicionar mensagem de sucesso
             messages.success(request, 'Visualização de "Todas as unidades" selecionada com sucesso!')
@@ -70,7 +73,7 @@ def select_unit(request):
             unit = request.user.units.get(id=unit_id)
         
         # Salvar unidade selecionada na sessão
-        request.session['selected_unit_id'] = int(unit_id)
+        set_selected_unit(request, int(unit_id))
         
         # Adicionar mensagem de sucesso usando o sistema Django
         messages.success(request, f'Unidade "{unit.name}" selecionada com sucesso!')
@@ -79,3 +82,12 @@ def select_unit(request):
         
     except Exception as e:
         return JsonResponse({'success': False, 'message': 'Erro interno do servidor'})
+
+
+@login_required
+def db_pool_stats(request):
+    """Métricas do pool de conexões do worker que atendeu a requisição (somente superusuários)"""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden(render(request, 'errors/403.html'))
+    return JsonResponse(pool_stats())
+
@@ -1,7 +1,15 @@
 import os
+import time
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
+_boot_started = time.perf_counter()
+
 application = get_wsgi_application()
+
+# Compila os templates antes do worker aceitar requisições (WARM_TEMPLATES_ON_BOOT)
+from core.template_warmup import warm_templates_on_boot  # noqa: E402
+
+warm_templates_on_boot(_boot_started)
@@ -47,7 +47,8 @@ fi
 
 # Executar migrações
 log_info "Executando migrações do banco de dados..."
-python manage.py migrate --noinput
+# Migrações podem passar do statement_timeout das requisições
+DB_STATEMENT_TIMEOUT=0 python manage.py migrate --noinput
 if [ $? -eq 0 ]; then
     log_success "Migrações executadas com sucesso!"
 else
@@ -55,6 +56,10 @@ else
     exit 1
 fi
 
+# Tabela do cache em banco (usada quando REDIS_URL não está definido)
+log_info "Criando tabela de cache..."
+python manage.py createcachetable
+
 # Coletar arquivos estáticos
 log_info "Coletando arquivos estáticos..."
 python manage.py collectstatic --noinput
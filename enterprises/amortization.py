@@ -0,0 +1,197 @@
+"""
+Cálculo das parcelas de financiamento (período anual)
+
+Mesma regra do cálculo original de calculate_parcelas:
+    - o saldo começa em valor * (1 + juros) e rende juros todo ano;
+    - na carência não há parcela;
+    - no pagamento a parcela é saldo / parcelas restantes e o saldo restante volta a render.
+
+A recorrência tem forma fechada, o que permite calcular todos os anos de
+vários projetos de uma vez (NumPy, quando instalado):
+    saldo(ano)   = valor * (1 + j) ** ano * fator(ano)
+    fator(ano)   = 1 na carência e (n - k + 1) / n no k-ésimo ano de pagamento
+    parcela(ano) = valor * (1 + j) ** ano / n
+    juros(ano)   = saldo(ano) * j
+
+Os valores de cada ano são arredondados em centavos (Decimal) e os totais são
+a soma exata desses valores, então o fluxo exibido sempre fecha com os totais.
+Os cronogramas ficam em memória por (valor, juros, carência, parcelas, aprovação).
+"""
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - o cálculo em Decimal é usado no lugar
+    np = None
+
+
+CENTAVOS = Decimal('0.01')
+
+# Cronogramas mantidos em memória por worker (LRU)
+SCHEDULE_CACHE_SIZE = 4096
+_schedule_cache = OrderedDict()
+_schedule_lock = threading.Lock()
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def schedule_key(value, fees, grace, installments, approval_date):
+    """Chave do cronograma, ou None quando faltam dados do financiamento"""
+    if not value or not fees or grace is None or not installments or not approval_date:
+        return None
+    grace, installments = int(grace), int(installments)
+    if grace < 0 or installments <= 0:
+        return None
+    return (Decimal(str(value)), Decimal(str(fees)), grace, installments, approval_date)
+
+
+def project_schedule_key(project):
+    return schedule_key(project.value, project.fees, project.payment_grace, project.installments, project.approval_date)
+
+
+# ==================== CÁLCULO ====================
+
+def _add_years(day, years):
+    """Mesmo resultado de day + relativedelta(years=years) (29/02 vira 28/02), sem o custo do relativedelta"""
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        return day.replace(year=day.year + years, day=28)
+
+
+def _build_schedule(key, saldos, parcelas, juros):
+    """Monta o dicionário no formato de calculate_parcelas a partir dos valores anuais (já em centavos)"""
+    value, _, grace, _, approval_date = key
+
+    fluxo = []
+    for index, (saldo, parcela, juro) in enumerate(zip(saldos, parcelas, juros)):
+        ano = index + 1
+        fluxo.append({
+            'ano': ano,
+            'saldo_devedor': saldo,
+            'valor_parcela': parcela,
+            'juros': juro,
+            'data_vencimento': _add_years(approval_date, ano),
+            'status': 'carencia' if ano <= grace else 'pagamento',
+        })
+
+    total_juros = sum((periodo['juros'] for periodo in fluxo), Decimal('0'))
+    return {
+        'valor_inicial': value,
+        'valor_juros': total_juros,
+        'valor_total': value + total_juros,
+        'fluxo': fluxo,
+        'inicio_pagamento': _add_years(approval_date, grace),
+    }
+
+
+def _compute_decimal(key):
+    value, fees, grace, installments, _ = key
+    rate = fees / Decimal('100')
+
+    saldos, parcelas, juros = [], [], []
+    growth = Decimal('1')
+    for ano in range(1, grace + installments + 1):
+        growth *= (1 + rate)
+        if ano <= grace:
+            saldo = value * growth
+            parcela = Decimal('0')
+        else:
+            k = ano - grace
+            saldo = value * growth * (installments - k + 1) / installments
+            parcela = value * growth / installments
+        saldos.append(_money(saldo))
+        parcelas.append(_money(parcela))
+        juros.append(_money(saldo * rate))
+    return _build_schedule(key, saldos, parcelas, juros)
+
+
+def _compute_numpy(keys):
+    """Calcula os cronogramas de todos os projetos em uma única operação vetorizada"""
+    values = np.array([float(key[0]) for key in keys])
+    rates = np.array([float(key[1]) / 100 for key in keys])
+    graces = np.array([key[2] for key in keys])
+    installments = np.array([key[3] for key in keys])
+
+    years = np.arange(1, int((graces + installments).max()) + 1)[None, :]
+    graces_col, installments_col = graces[:, None], installments[:, None]
+
+    growth = (1 + rates[:, None]) ** years
+    in_grace = years <= graces_col
+    in_term = years <= graces_col + installments_col
+    remaining = installments_col - (years - graces_col) + 1
+
+    saldos = values[:, None] * growth * np.where(in_grace, 1.0, remaining / installments_col)
+    parcelas = np.where(in_grace, 0.0, values[:, None] * growth / installments_col)
+    juros = saldos * rates[:, None]
+
+    # Arredonda em centavos nos arrays e converte para Decimal a partir de inteiros (sem erro de float)
+    def to_cents(values):
+        return np.floor(values * 100 + 0.5).astype(np.int64).tolist()
+
+    saldos, parcelas, juros = to_cents(saldos), to_cents(parcelas), to_cents(juros)
+
+    schedules = {}
+    for row, key in enumerate(keys):
+        size = int(in_term[row].sum())
+        schedules[key] = _build_schedule(
+            key,
+            [Decimal(cents).scaleb(-2) for cents in saldos[row][:size]],
+            [Decimal(cents).scaleb(-2) for cents in parcelas[row][:size]],
+            [Decimal(cents).scaleb(-2) for cents in juros[row][:size]],
+        )
+    return schedules
+
+
+def compute_schedules(keys):
+    """Cronogramas das chaves informadas, calculando de uma vez só as que não estão em memória"""
+    keys = [key for key in dict.fromkeys(keys) if key is not None]
+    schedules = {}
+    missing = []
+
+    with _schedule_lock:
+        for key in keys:
+            if key in _schedule_cache:
+                _schedule_cache.move_to_end(key)
+                schedules[key] = _schedule_cache[key]
+            else:
+                missing.append(key)
+
+    if missing:
+        if np is not None:
+            computed = _compute_numpy(missing)
+        else:
+            computed = {key: _compute_decimal(key) for key in missing}
+        schedules.update(computed)
+
+        with _schedule_lock:
+            _schedule_cache.update(computed)
+            while len(_schedule_cache) > SCHEDULE_CACHE_SIZE:
+                _schedule_cache.popitem(last=False)
+
+    return schedules
+
+
+# ==================== API ====================
+
+def get_schedule(project):
+    """
+    Cronograma de um projeto (mesmo formato de calculate_parcelas) ou None sem dados de financiamento
+    O resultado é compartilhado entre chamadas: não altere o dicionário retornado
+    """
+    key = project_schedule_key(project)
+    if key is None:
+        return None
+    return compute_schedules([key])[key]
+
+
+def get_schedules(projects):
+    """Cronogramas de vários projetos de uma vez: {project.pk: cronograma ou None}"""
+    keys = {project.pk: project_schedule_key(project) for project in projects}
+    schedules = compute_schedules(keys.values())
+    return {pk: schedules.get(key) for pk, key in keys.items()}
+
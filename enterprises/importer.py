@@ -0,0 +1,334 @@
+"""
+Importação de clientes em massa a partir de CSV
+
+O arquivo é lido em streaming e processado em lotes: cada lote é normalizado,
+deduplicado contra os clientes existentes com uma única consulta e gravado com
+bulk_create (clientes e vínculos com unidades). Assim a memória fica limitada
+ao tamanho do lote e o número de consultas cresce por lote, não por linha.
+
+Formato (com ou sem cabeçalho):
+    Nome, Endereço, Telefone, Data Nascimento, CPF, Unidade, Projetista[, Email]
+
+Observação: bulk_create não chama save() nem dispara signals, por isso
+birthday_key, cpf_digits e phone_digits são preenchidos em save_batch, que
+também gera a nova versão dos dados dos gráficos (reports.charts). Os
+signals de auditoria de Client só registram alterações de clientes
+existentes, então nada se perde aqui.
+"""
+import csv
+import io
+import time
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.birthdays import birthday_key
+from core.digits import digits_or_none, only_digits
+from reports.charts import bump_data_version
+from units.models import Unit
+from .models import Client
+
+
+DATE_FORMATS = ['%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d-%m-%y', '%Y-%m-%d']
+HEADER_NAMES = {'nome', 'name', 'cliente'}
+
+# Limite de mensagens de erro guardadas no relatório
+MAX_ERROR_MESSAGES = 200
+
+
+def normalize_cpf(value):
+    """Retorna o CPF formatado (XXX.XXX.XXX-XX) ou None se inválido"""
+    digits = only_digits(value) if value else ''
+    if len(digits) != 11:
+        return None
+    return f'{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}'
+
+
+def normalize_phone(value):
+    """Mesmas regras do importador original: DDD 69 como padrão para números sem DDD"""
+    if not value:
+        return None
+    phone = only_digits(value)
+    if len(phone) == 11:
+        return f'({phone[:2]}) {phone[2:7]}-{phone[7:]}'
+    if len(phone) == 9 and phone.startswith('9'):
+        return f'(69) {phone[:5]}-{phone[5:]}'
+    return phone or None
+
+
+def parse_date(value):
+    if not value:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def open_csv(file_obj):
+    """
+    Abre o CSV em modo texto e detecta o delimitador
+    Aceita caminho ou arquivo binário (upload/storage)
+    """
+    if isinstance(file_obj, str):
+        text_file = open(file_obj, 'r', encoding='utf-8-sig', newline='')
+    else:
+        text_file = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+
+    sample = text_file.read(4096)
+    text_file.seek(0)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        delimiter = ','
+
+    return text_file, csv.reader(text_file, delimiter=delimiter)
+
+
+class ClientImporter:
+    """
+    Motor de importação usado pelo comando import_clients_csv e pelo upload web
+
+    Args:
+        enterprise: empresa dos clientes importados
+        user: usuário responsável (created_by)
+        batch_size: linhas por lote (uma transação e uma consulta de deduplicação por lote)
+        dry_run: valida sem gravar
+        create_units: cria unidades que não existirem (apenas no comando)
+        allowed_units: restringe as unidades que podem ser vinculadas (upload web)
+        default_unit: unidade usada quando a linha não tem unidade válida
+        on_progress: callback(rows_done, stats) chamado ao fim de cada lote (checkpoint)
+        initial_stats: estatísticas salvas no checkpoint, ao retomar uma importação
+    """
+
+    def __init__(self, enterprise, user=None, batch_size=2000, dry_run=False, create_units=True,
+                 allowed_units=None, default_unit=None, on_progress=None, initial_stats=None):
+        self.enterprise = enterprise
+        self.user = user
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.create_units = create_units
+        self.default_unit = default_unit
+        self.on_progress = on_progress
+
+        units = Unit.objects.filter(enterprise=enterprise)
+        if allowed_units is not None:
+            units = units.filter(pk__in=[unit.pk for unit in allowed_units])
+        self.units_by_name = {unit.name.strip().lower(): unit for unit in units}
+
+        # Em dry-run nada é gravado: os CPFs/emails vistos ficam em memória para deduplicar
+        self.seen_keys = set()
+
+        self.stats = {
+            'rows': 0,
+            'imported': 0,
+            'duplicates': 0,
+            'skipped': 0,
+            'errors': 0,
+            'units_created': 0,
+            'error_messages': [],
+        }
+        if initial_stats:
+            self.stats.update({key: initial_stats[key] for key in self.stats if key in initial_stats})
+
+    # ==================== LEITURA ====================
+
+    def iter_batches(self, reader, start_row=0):
+        """Gera lotes de (número da linha, linha) pulando as linhas já importadas"""
+        batch = []
+        for row_num, row in enumerate(reader, 1):
+            if row_num == 1 and row and row[0].strip().lower() in HEADER_NAMES:
+                continue
+            if row_num <= start_row:
+                continue
+            batch.append((row_num, row))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # ==================== NORMALIZAÇÃO ====================
+
+    def _add_error(self, row_num, message):
+        self.stats['errors'] += 1
+        if len(self.stats['error_messages']) < MAX_ERROR_MESSAGES:
+            self.stats['error_messages'].append(f'Linha {row_num}: {message}')
+
+    def normalize_batch(self, batch):
+        """Valida e normaliza o lote inteiro, retornando dicionários prontos para gravar"""
+        rows = []
+        for row_num, row in batch:
+            if not any(cell.strip() for cell in row) or len(row) < 6:
+                self.stats['skipped'] += 1
+                continue
+
+            cells = [cell.strip() for cell in row] + [''] * (8 - len(row))
+            name, address, phone, birth_date, cpf, unit_name, designer, email = cells[:8]
+
+            if not name:
+                self.stats['skipped'] += 1
+                continue
+
+            parsed_birth_date = parse_date(birth_date)
+            formatted_cpf = normalize_cpf(cpf)
+            if birth_date and not parsed_birth_date:
+                self._add_error(row_num, f'data inválida "{birth_date}" (importado sem data)')
+
+            rows.append({
+                'row_num': row_num,
+                'name': name[:255],
+                'address': address[:255] or None,
+                'phone': normalize_phone(phone),
+                'date_of_birth': parsed_birth_date,
+                'cpf': formatted_cpf,
+                'cpf_digits': digits_or_none(formatted_cpf),
+                'email': email.lower()[:254] if '@' in email else None,
+                'unit_name': unit_name,
+                'observations': f'Projetista: {designer}' if designer else None,
+            })
+        return rows
+
+    # ==================== DEDUPLICAÇÃO ====================
+
+    def remove_duplicates(self, rows):
+        """
+        Remove linhas cujo CPF/email já existe na empresa ou no próprio arquivo (uma consulta por lote)
+        O CPF é comparado pelos dígitos (cpf_digits), independente da formatação do cadastro existente
+        """
+        cpfs = {row['cpf_digits'] for row in rows if row['cpf_digits']}
+        emails = {row['email'] for row in rows if row['email']}
+
+        existing = set()
+        if cpfs or emails:
+            query = Q()
+            if cpfs:
+                query |= Q(cpf_digits__in=cpfs)
+            if emails:
+                query |= Q(email__in=emails)
+            for cpf, email in Client.objects.filter(query, enterprise=self.enterprise).values_list('cpf_digits', 'email'):
+                if cpf:
+                    existing.add(('cpf', cpf))
+                if email:
+                    existing.add(('email', email))
+
+        unique_rows = []
+        for row in rows:
+            keys = [key for key in (('cpf', row['cpf_digits']), ('email', row['email'])) if key[1]]
+            if any(key in existing or key in self.seen_keys for key in keys):
+                self.stats['duplicates'] += 1
+                continue
+            if self.dry_run:
+                self.seen_keys.update(keys)
+            else:
+                # Dentro do mesmo lote (os lotes anteriores já estão no banco)
+                existing.update(keys)
+            unique_rows.append(row)
+        return unique_rows
+
+    # ==================== UNIDADES ====================
+
+    def resolve_units(self, rows):
+        """Resolve as unidades do lote, criando as que faltam em uma única operação"""
+        missing = {}
+        for row in rows:
+            key = row['unit_name'].lower()
+            if key and key not in self.units_by_name and self.create_units:
+                missing.setdefault(key, row['unit_name'])
+
+        if missing and not self.dry_run:
+            created = Unit.objects.bulk_create([
+                Unit(name=name, enterprise=self.enterprise, location='Importado via CSV', is_active=True)
+                for name in missing.values()
+            ])
+            for unit in created:
+                self.units_by_name[unit.name.strip().lower()] = unit
+            self.stats['units_created'] += len(created)
+        elif missing:
+            self.stats['units_created'] += len(missing)
+
+        for row in rows:
+            row['unit'] = self.units_by_name.get(row['unit_name'].lower()) or self.default_unit
+
+    # ==================== GRAVAÇÃO ====================
+
+    def save_batch(self, rows):
+        clients = [
+            Client(
+                name=row['name'],
+                email=row['email'],
+                cpf=row['cpf'],
+                cpf_digits=row['cpf_digits'],
+                phone=row['phone'],
+                phone_digits=digits_or_none(row['phone']),
+                address=row['address'],
+                date_of_birth=row['date_of_birth'],
+                birthday_key=birthday_key(row['date_of_birth']),
+                observations=row['observations'],
+                enterprise=self.enterprise,
+                created_by=self.user,
+                status='INATIVO',
+                is_active=True,
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            Client.objects.bulk_create(clients, batch_size=self.batch_size)
+
+            # Vínculos com unidades direto na tabela intermediária
+            ClientUnit = Client.units.through
+            ClientUnit.objects.bulk_create(
+                [
+                    ClientUnit(client_id=client.pk, unit_id=row['unit'].pk)
+                    for client, row in zip(clients, rows)
+                    if row['unit'] is not None
+                ],
+                batch_size=self.batch_size,
+            )
+
+        # bulk_create não dispara os signals que versionam os dados dos gráficos
+        bump_data_version(self.enterprise.pk)
+
+    def process_batch(self, batch):
+        self.stats['rows'] += len(batch)
+        rows = self.remove_duplicates(self.normalize_batch(batch))
+        if not rows:
+            return
+        self.resolve_units(rows)
+        if not self.dry_run:
+            self.save_batch(rows)
+        self.stats['imported'] += len(rows)
+
+    # ==================== EXECUÇÃO ====================
+
+    def run(self, file_obj, start_row=0):
+        """
+        Importa o arquivo a partir da linha `start_row` (retomada de checkpoint)
+        Retorna as estatísticas, incluindo linhas por segundo
+        """
+        started = time.monotonic()
+        text_file, reader = open_csv(file_obj)
+        rows_done = start_row
+
+        try:
+            for batch in self.iter_batches(reader, start_row):
+                self.process_batch(batch)
+                rows_done = batch[-1][0]
+                if self.on_progress:
+                    self.on_progress(rows_done, self.progress(started))
+        finally:
+            text_file.close()
+
+        return self.progress(started)
+
+    def progress(self, started):
+        elapsed = time.monotonic() - started
+        return dict(
+            self.stats,
+            elapsed=round(elapsed, 2),
+            rows_per_second=round(self.stats['rows'] / elapsed, 1) if elapsed else 0,
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:36
+
+import django.db.models.deletion
+import enterprises.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0003_remove_email_unique_and_fix_activity'),
+        ('units', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to=enterprises.models.client_import_upload_path, verbose_name='Arquivo')),
+                ('original_name', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Importando'), ('done', 'Concluída'), ('error', 'Erro')], default='pending', max_length=10, verbose_name='Status')),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('stats', models.JSONField(blank=True, default=dict, verbose_name='Estatísticas')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('default_unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='client_imports', to='units.unit', verbose_name='Unidade padrão')),
+                ('enterprise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='client_imports', to='enterprises.enterprise', verbose_name='Empresa')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='client_imports', to=settings.AUTH_USER_MODEL, verbose_name='Enviado por')),
+            ],
+            options={
+                'verbose_name': 'Importação de Clientes',
+                'verbose_name_plural': 'Importações de Clientes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_birthday_key(apps, schema_editor):
+    """Preenche a chave de aniversário (mês * 100 + dia) com um único UPDATE"""
+    Client = apps.get_model('enterprises', 'Client')
+    Client.objects.filter(date_of_birth__isnull=False).update(
+        birthday_key=ExtractMonth('date_of_birth') * 100 + ExtractDay('date_of_birth')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0004_clientimport'),
+        ('units', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='birthday_key',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Chave de Aniversário'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['enterprise', 'birthday_key'], name='client_birthday_idx'),
+        ),
+        migrations.RunPython(fill_birthday_key, migrations.RunPython.noop),
+    ]
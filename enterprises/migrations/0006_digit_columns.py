@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def only_digits(value):
+    return ''.join(filter(str.isdigit, value or '')) or None
+
+
+def fill_digit_columns(apps, schema_editor):
+    """
+    Preenche cpf_digits/phone_digits em lotes
+    Antes de gravar, procura CPFs repetidos na mesma empresa (mesmos dígitos com outra formatação):
+    a constraint única falharia no meio do lote, então a migração para com a lista para correção manual
+    """
+    Client = apps.get_model('enterprises', 'Client')
+    rows = [
+        (pk, enterprise_id, only_digits(cpf), only_digits(phone))
+        for pk, enterprise_id, cpf, phone in Client.objects.values_list('pk', 'enterprise_id', 'cpf', 'phone').iterator()
+    ]
+
+    seen, duplicates = {}, []
+    for pk, enterprise_id, cpf_digits, _ in rows:
+        if cpf_digits is None:
+            continue
+        key = (enterprise_id, cpf_digits)
+        if key in seen:
+            duplicates.append(f'{cpf_digits} (ids {seen[key]} e {pk})')
+        else:
+            seen[key] = pk
+    if duplicates:
+        raise RuntimeError(
+            'CPFs repetidos na mesma empresa; corrija antes de migrar: ' + ', '.join(duplicates[:50])
+        )
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        Client.objects.bulk_update(
+            [
+                Client(pk=pk, cpf_digits=cpf_digits, phone_digits=phone_digits)
+                for pk, enterprise_id, cpf_digits, phone_digits in rows[start:start + BATCH_SIZE]
+            ],
+            ['cpf_digits', 'phone_digits'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0005_birthday_key'),
+        ('units', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='cpf_digits',
+            field=models.CharField(blank=True, editable=False, max_length=14, null=True, verbose_name='CPF (dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, verbose_name='Telefone (dígitos)'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['enterprise', 'phone_digits'], name='client_phone_digits_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='client',
+            constraint=models.UniqueConstraint(condition=models.Q(('cpf_digits__isnull', False)), fields=('enterprise', 'cpf_digits'), name='client_unique_cpf_per_enterprise'),
+        ),
+        migrations.RunPython(fill_digit_columns, migrations.RunPython.noop),
+    ]
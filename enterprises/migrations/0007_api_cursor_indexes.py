@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0006_digit_columns'),
+        ('units', '0003_api_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['enterprise', '-created_at', '-id'], name='client_api_cursor_idx'),
+        ),
+    ]
@@ -5,6 +5,9 @@ from django.db import models
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 
+from core.birthdays import birthday_key
+from core.digits import digits_or_none
+
 def enterprise_directory_path(instance, filename):
     unique_filename = f"{uuid.uuid4()}.{filename.split('.')[-1]}"
     return f'enterprise_images/{unique_filename}'
@@ -239,10 +242,15 @@ class Client(models.Model):
     email = models.EmailField(blank=True, null=True, verbose_name="Email")
     cpf = models.CharField(max_length=14, blank=True, null=True, verbose_name="CPF", help_text="CPF do cliente (formato: XXX.XXX.XXX-XX)")
     phone = models.CharField(max_length=20, blank=True, null=True, verbose_name="Phone")
+    # Somente dígitos de cpf/phone, mantidos no save() (ver core/digits.py)
+    cpf_digits = models.CharField(max_length=14, blank=True, null=True, editable=False, verbose_name="CPF (dígitos)")
+    phone_digits = models.CharField(max_length=20, blank=True, null=True, editable=False, verbose_name="Telefone (dígitos)")
     address = models.CharField(max_length=255, blank=True, null=True, verbose_name="Address")
     city = models.CharField(max_length=100, blank=True, null=True, verbose_name="City")
     observations = models.TextField(blank=True, null=True, verbose_name="Observations")
     date_of_birth = models.DateField(blank=True, null=True, verbose_name="Date of Birth")
+    # Mês * 100 + dia de date_of_birth, mantido no save() (ver core/birthdays.py)
+    birthday_key = models.PositiveSmallIntegerField(blank=True, null=True, editable=False, verbose_name="Chave de Aniversário")
     
     # Novos campos adicionados
     producer_classification = models.CharField(
@@ -293,6 +301,20 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['enterprise', 'birthday_key'], name='client_birthday_idx'),
+            models.Index(fields=['enterprise', 'phone_digits'], name='client_phone_digits_idx'),
+            # Paginação por cursor da API sobre (created_at, id)
+            models.Index(fields=['enterprise', '-created_at', '-id'], name='client_api_cursor_idx'),
+        ]
+        constraints = [
+            # Um CPF por empresa; clientes sem CPF (NULL) ficam fora da constraint
+            models.UniqueConstraint(
+                fields=['enterprise', 'cpf_digits'],
+                condition=models.Q(cpf_digits__isnull=False),
+                name='client_unique_cpf_per_enterprise',
+            ),
+        ]
 
     def __str__(self):
         active_status = "Ativo" if self.is_active else "Inativo"
@@ -326,6 +348,16 @@ class Client(models.Model):
         }
         return status_icons.get(self.status, 'fas fa-user')
     
+    def save(self, *args, **kwargs):
+        self.birthday_key = birthday_key(self.date_of_birth)
+        self.cpf_digits = digits_or_none(self.cpf)
+        self.phone_digits = digits_or_none(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'date_of_birth': 'birthday_key', 'cpf': 'cpf_digits', 'phone': 'phone_digits'}
+            kwargs['update_fields'] = {*update_fields, *(derived[field] for field in update_fields if field in derived)}
+        super().save(*args, **kwargs)
+    
     def delete(self, *args, **kwargs):
         """Sobrescrever delete para garantir que documentos sejam removidos corretamente"""
         # Deletar todos os documentos associados primeiro
@@ -422,3 +454,40 @@ class ClientBankAccount(models.Model):
             'SALARIO': 'CS',
         }
         return type_dict.get(self.account_type, self.account_type)
+
+
+def client_import_upload_path(instance, filename):
+    return f"imports/clients/{instance.enterprise_id}/{filename}"
+
+
+class ClientImport(models.Model):
+    """Importação de clientes via upload de CSV, processada pelo worker em segundo plano"""
+    STATUS_CHOICES = [
+        ('pending', 'Na fila'),
+        ('running', 'Importando'),
+        ('done', 'Concluída'),
+        ('error', 'Erro'),
+    ]
+
+    enterprise = models.ForeignKey(Enterprise, on_delete=models.CASCADE, related_name='client_imports', verbose_name="Empresa")
+    uploaded_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='client_imports', verbose_name="Enviado por")
+    default_unit = models.ForeignKey('units.Unit', on_delete=models.SET_NULL, null=True, blank=True, related_name='client_imports', verbose_name="Unidade padrão")
+    file = models.FileField(upload_to=client_import_upload_path, verbose_name="Arquivo")
+    original_name = models.CharField(max_length=255, verbose_name="Nome do Arquivo")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+
+    # Checkpoint: última linha gravada e estatísticas acumuladas (permite retomar após falha)
+    rows_done = models.PositiveIntegerField(default=0, verbose_name="Linhas Processadas")
+    stats = models.JSONField(default=dict, blank=True, verbose_name="Estatísticas")
+    error = models.TextField(blank=True, verbose_name="Erro")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Concluída em")
+
+    class Meta:
+        verbose_name = "Importação de Clientes"
+        verbose_name_plural = "Importações de Clientes"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.original_name} ({self.get_status_display()})"
@@ -0,0 +1,57 @@
+"""
+Tarefas em segundo plano do app enterprises (executadas pelo run_worker)
+"""
+from django.utils import timezone
+
+from jobs.registry import task
+
+
+@task(queue='imports', max_attempts=3)
+def import_clients_task(import_id):
+    """
+    Importa o CSV enviado pela web usando o mesmo motor do comando import_clients_csv
+    Em caso de falha, a nova tentativa retoma do checkpoint (rows_done)
+    """
+    from .importer import ClientImporter
+    from .models import ClientImport
+    
+    client_import = ClientImport.objects.select_related('enterprise', 'uploaded_by', 'default_unit').get(pk=import_id)
+    client_import.status = 'running'
+    client_import.save(update_fields=['status'])
+    
+    # Mesma regra de get_accessible_units_from_request, sem depender da requisição
+    user = client_import.uploaded_by
+    if user is None:
+        allowed_units = []
+    elif user.has_perm('users.view_all_units'):
+        allowed_units = list(client_import.enterprise.units.filter(is_active=True))
+    else:
+        allowed_units = list(user.units.filter(is_active=True))
+    
+    def on_progress(rows_done, stats):
+        ClientImport.objects.filter(pk=import_id).update(rows_done=rows_done, stats=stats)
+    
+    importer = ClientImporter(
+        client_import.enterprise,
+        user=user,
+        create_units=False,
+        allowed_units=allowed_units,
+        default_unit=client_import.default_unit,
+        on_progress=on_progress,
+        initial_stats=client_import.stats,
+    )
+    
+    try:
+        with client_import.file.open('rb') as csv_file:
+            stats = importer.run(csv_file, start_row=client_import.rows_done)
+    except Exception as e:
+        ClientImport.objects.filter(pk=import_id).update(status='error', error=str(e))
+        raise
+    
+    ClientImport.objects.filter(pk=import_id).update(
+        status='done',
+        stats=stats,
+        error='',
+        finished_at=timezone.now(),
+    )
+    print(f"✅ Importação #{import_id}: {stats['imported']} cliente(s) importado(s) ({stats['rows_per_second']:.0f} linhas/s)")
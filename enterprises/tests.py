@@ -1,3 +1,116 @@
-from django.test import TestCase
+import random
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.test import SimpleTestCase
+
+from . import amortization
+from .amortization import compute_schedules, get_schedule, schedule_key
+
+
+def legacy_calculate_parcelas(projeto):
+    """calculate_parcelas anterior ao cálculo em forma fechada (saldo atualizado ano a ano em Decimal)"""
+    valor_inicial = Decimal(str(projeto.value))
+    juros_anual = Decimal(str(projeto.fees)) / Decimal('100')
+    anos_carencia = int(projeto.payment_grace)
+    anos_pagamento = int(projeto.installments)
+    data_base = projeto.approval_date
+
+    fluxo_anual = []
+    saldo_devedor = valor_inicial * (Decimal('1') + juros_anual)
+
+    for ano in range(1, anos_carencia + anos_pagamento + 1):
+        juros = saldo_devedor * juros_anual
+        if ano <= anos_carencia:
+            fluxo_anual.append({
+                'ano': ano,
+                'saldo_devedor': saldo_devedor,
+                'valor_parcela': Decimal('0'),
+                'juros': juros,
+                'data_vencimento': data_base + relativedelta(years=ano),
+                'status': 'carencia',
+            })
+            saldo_devedor = saldo_devedor + juros
+        else:
+            parcelas_restantes = anos_carencia + anos_pagamento - ano + 1
+            valor_parcela = saldo_devedor / Decimal(str(parcelas_restantes))
+            fluxo_anual.append({
+                'ano': ano,
+                'saldo_devedor': saldo_devedor,
+                'valor_parcela': valor_parcela,
+                'juros': juros,
+                'data_vencimento': data_base + relativedelta(years=ano),
+                'status': 'pagamento',
+            })
+            saldo_devedor = (saldo_devedor - valor_parcela) * (Decimal('1') + juros_anual)
+
+    total_juros = sum(periodo['juros'] for periodo in fluxo_anual)
+    return {
+        'valor_inicial': valor_inicial,
+        'valor_juros': total_juros,
+        'valor_total': valor_inicial + total_juros,
+        'fluxo': fluxo_anual,
+        'inicio_pagamento': projeto.approval_date + relativedelta(years=anos_carencia),
+    }
+
+
+def random_projects(count, seed=2024):
+    rng = random.Random(seed)
+    approval_dates = [date(2020, 2, 29), date(2024, 2, 29), date(2019, 12, 31), date(2023, 6, 15), date(2025, 1, 1)]
+    return [
+        SimpleNamespace(
+            value=Decimal(rng.randint(100000, 500000000)) / 100,
+            fees=Decimal(rng.randint(50, 1500)) / 100,
+            payment_grace=rng.randint(0, 5),
+            installments=rng.randint(1, 15),
+            approval_date=rng.choice(approval_dates),
+        )
+        for _ in range(count)
+    ]
+
+
+class AmortizationScheduleTests(SimpleTestCase):
+    """O cronograma em forma fechada (NumPy e Decimal) confere centavo a centavo com o cálculo ano a ano"""
+
+    def assertMatchesLegacy(self, schedule, projeto):
+        expected = legacy_calculate_parcelas(projeto)
+        self.assertEqual(schedule['valor_inicial'], expected['valor_inicial'])
+        self.assertEqual(schedule['inicio_pagamento'], expected['inicio_pagamento'])
+        self.assertEqual(len(schedule['fluxo']), len(expected['fluxo']))
+        for periodo, esperado in zip(schedule['fluxo'], expected['fluxo']):
+            for field in ('ano', 'data_vencimento', 'status'):
+                self.assertEqual(periodo[field], esperado[field], f'{vars(projeto)} ano {esperado["ano"]}: {field}')
+            for field in ('saldo_devedor', 'valor_parcela', 'juros'):
+                self.assertEqual(periodo[field], amortization._money(esperado[field]), f'{vars(projeto)} ano {esperado["ano"]}: {field}')
+
+        # Totais: soma exata dos juros já arredondados (no máximo meio centavo de diferença por ano)
+        self.assertEqual(schedule['valor_juros'], sum(periodo['juros'] for periodo in schedule['fluxo']))
+        self.assertEqual(schedule['valor_total'], schedule['valor_inicial'] + schedule['valor_juros'])
+        self.assertLessEqual(abs(schedule['valor_juros'] - expected['valor_juros']), Decimal('0.005') * len(expected['fluxo']))
+
+    def test_random_schedules_match_legacy(self):
+        projects = random_projects(300)
+        keys = [schedule_key(p.value, p.fees, p.payment_grace, p.installments, p.approval_date) for p in projects]
+
+        engines = {'decimal': {key: amortization._compute_decimal(key) for key in keys}}
+        if amortization.np is not None:
+            engines['numpy'] = amortization._compute_numpy(list(dict.fromkeys(keys)))
+
+        for engine, schedules in engines.items():
+            for projeto, key in zip(projects, keys):
+                with self.subTest(engine=engine, project=vars(projeto)):
+                    self.assertMatchesLegacy(schedules[key], projeto)
+
+    def test_get_schedule_matches_legacy(self):
+        for projeto in random_projects(20, seed=7):
+            self.assertMatchesLegacy(get_schedule(projeto), projeto)
+
+    def test_incomplete_financing_has_no_schedule(self):
+        complete = dict(value=Decimal('1000'), fees=Decimal('5'), payment_grace=1, installments=3, approval_date=date(2024, 1, 10))
+        for field, missing in (('value', None), ('fees', None), ('payment_grace', None), ('installments', 0), ('approval_date', None)):
+            with self.subTest(field=field):
+                self.assertIsNone(get_schedule(SimpleNamespace(**{**complete, field: missing})))
+        self.assertIsNone(get_schedule(SimpleNamespace(**{**complete, 'payment_grace': -1})))
+        self.assertEqual(compute_schedules([None]), {})
@@ -5,9 +5,12 @@ urlpatterns = [
     path('create-enterprise/', views.create_enterprise, name='create_enterprise'),
     path('register_client/', views.register_client_view, name='register_client'),
     path('view-client/<int:client_id>/', views.view_client_view, name='view_client'),
+    path('client-document/<int:document_id>/download/', views.client_document_download_view, name='client_document_download'),
     path('toggle-client-status/<int:client_id>/', views.toggle_client_status_view, name='toggle_client_status'),
     path('project-client/<int:project_id>/', views.client_project_details_view, name='details_project_client'),
     path('list_clients/', views.client_list_view, name='list_clients'),
+    path('import-clients/', views.import_clients_view, name='import_clients'),
+    path('import-clients/<int:import_id>/status/', views.import_clients_status_view, name='import_clients_status'),
 
     # Messages
     path('list-messages/', views.list_messages_view, name='list_messages'),
@@ -1,5 +1,7 @@
 import os
 from datetime import date
+from functools import partial
+from django.utils.functional import SimpleLazyObject
 from units.models import Unit
 from django.db import transaction
 from django.utils import timezone
@@ -8,7 +10,15 @@ from django.core.exceptions import ValidationError
 from projects.models import Project
 from .models import InternalMessage
 from django.http import JsonResponse
-from .utils import calculate_parcelas 
+from .amortization import get_schedules
+from django.conf import settings
+from django.db.models import Max
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from core.pagination import CursorPage
+from core.streaming import stream_field_file
+from core.digits import only_digits
+from search.utils import filter_clients
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.templatetags.static import static
 from django.contrib.auth.decorators import login_required
@@ -226,7 +236,7 @@ def register_client_view(request):
             cpf = form_data['cpf']
             if cpf and cpf.strip():
                 cpf_formatted = cpf.strip()
-                if Client.objects.filter(cpf=cpf_formatted, enterprise=request.user.enterprise).exists():
+                if Client.objects.filter(cpf_digits=only_digits(cpf_formatted), enterprise=request.user.enterprise).exists():
                     messages.error(request, f'Já existe um cliente cadastrado com o CPF "{cpf_formatted}". Por favor, verifique os dados.')
                     return render(request, 'enterprises/register_client.html', context)
             
@@ -519,7 +529,7 @@ def view_client_view(request, client_id):
                     
                     # Verificar se CPF já existe (apenas se foi fornecido e é diferente do atual)
                     new_cpf = request.POST.get('cpf', '').strip() or None
-                    if new_cpf and new_cpf != client.cpf and Client.objects.filter(cpf=new_cpf, enterprise=client.enterprise).exists():
+                    if new_cpf and only_digits(new_cpf) != client.cpf_digits and Client.objects.filter(cpf_digits=only_digits(new_cpf), enterprise=client.enterprise).exists():
                         messages.error(request, f'Já existe um cliente cadastrado com o CPF "{new_cpf}". Por favor, verifique os dados.')
                         return redirect('view_client', client_id=client.id)
                     
@@ -626,31 +636,34 @@ def view_client_view(request, client_id):
         from .models import CLIENT_STATUS_CHOICES, PRODUCER_CLASSIFICATION_CHOICES, ACTIVITY_CHOICES
         from projects.models import Bank
         
-        # Buscar histórico do cliente
-        client_history = client.history.all().order_by('-timestamp')[:20]  # Últimas 20 alterações
+        # Histórico do cliente paginado por cursor (20 alterações por página)
+        client_history = CursorPage(client.history.all(), cursor=request.GET.get('history_before'), page_size=20)
+        # Versão dos fragmentos: documentos e contas bancárias também geram registros de histórico
+        history_version = client.history.aggregate(last=Max('id'))['last'] or 0
         
         # Buscar bancos disponíveis para o formulário de conta bancária
         available_banks = Bank.objects.filter(enterprise=request.user.enterprise, is_active=True).order_by('name')
         
         # Buscar projetos do cliente
-        from enterprises.utils import calculate_parcelas
-        projects = client.projects.filter(is_active=True).order_by('-created_at')
+        projects = (
+            client.projects.filter(is_active=True)
+            .select_related('credit_line', 'bank', 'client')
+            .order_by('-created_at')
+        )
         
-        # Calcular parcelas para cada projeto que tem os dados necessários
+        # Parcelas de todos os projetos calculadas de uma vez, só se algum modal não estiver em cache
+        schedules = SimpleLazyObject(lambda: get_schedules(projects))
         for project in projects:
-            if project.value and project.fees and project.payment_grace and project.installments and project.approval_date:
-                try:
-                    project.parcelas = calculate_parcelas(project)
-                except:
-                    project.parcelas = None
-            else:
-                project.parcelas = None
+            project.parcelas = partial(schedules.get, project.pk)
         
         context = {
             'enterprise': request.user.enterprise,
             'client': client,
             'client_documents': client.documents.all(),
             'client_history': client_history,
+            'history_version': history_version,
+            'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+            'document_cache_timeout': settings.DOCUMENT_FRAGMENT_CACHE_TIMEOUT,
             'projects': projects,
             'today': date.today(),
             'status_choices': CLIENT_STATUS_CHOICES,
@@ -728,7 +741,8 @@ def client_list_view(request):
         clients = clients.filter(status=status_filter)
     
     if search_filter:
-        clients = clients.filter(name__icontains=search_filter)
+        # Nome, CPF, telefone ou cidade, sem acentos (índices de busca em search/indexes.py)
+        clients = filter_clients(clients, search_filter)
     
     clients = clients.order_by('-is_active', 'name')  # Ativos primeiro, depois por nome
     paginator = Paginator(clients, 15)
@@ -750,6 +764,68 @@ def client_list_view(request):
 
     return render(request, 'enterprises/list_clients.html', context)
 
+# Importar clientes via CSV
+@login_required
+def import_clients_view(request):
+    from core.mixins import get_accessible_units_from_request
+    from .models import ClientImport
+    from .tasks import import_clients_task
+    
+    if not request.user.has_perm('users.add_clients'):
+        messages.error(request, 'Você não tem permissão para importar clientes.')
+        return redirect('list_clients')
+    
+    accessible_units = get_accessible_units_from_request(request)
+    
+    if request.method == 'POST':
+        csv_file = request.FILES.get('csv_file')
+        default_unit = accessible_units.filter(id=request.POST.get('default_unit') or None).first()
+        
+        if not csv_file or not csv_file.name.lower().endswith('.csv'):
+            messages.error(request, 'Selecione um arquivo .csv para importar.')
+            return redirect('import_clients')
+        
+        client_import = ClientImport(
+            enterprise=request.user.enterprise,
+            uploaded_by=request.user,
+            default_unit=default_unit,
+            original_name=csv_file.name[:255],
+        )
+        client_import.file.save(f"{timezone.now():%Y%m%d%H%M%S}_{csv_file.name}", csv_file, save=False)
+        client_import.save()
+        
+        import_clients_task.enqueue(import_id=client_import.id)
+        
+        messages.success(request, f'Arquivo "{csv_file.name}" recebido! A importação está sendo processada em segundo plano.')
+        return redirect('import_clients')
+    
+    context = {
+        'enterprise': request.user.enterprise,
+        'accessible_units': accessible_units,
+        'imports': ClientImport.objects.filter(enterprise=request.user.enterprise, uploaded_by=request.user)[:10],
+    }
+    
+    return render(request, 'enterprises/import_clients.html', context)
+
+# Status da importação (consultado via AJAX)
+@login_required
+def import_clients_status_view(request, import_id):
+    from .models import ClientImport
+    
+    client_import = get_object_or_404(ClientImport, id=import_id, uploaded_by=request.user)
+    stats = client_import.stats or {}
+    
+    return JsonResponse({
+        'status': client_import.status,
+        'status_display': client_import.get_status_display(),
+        'rows_done': client_import.rows_done,
+        'imported': stats.get('imported', 0),
+        'duplicates': stats.get('duplicates', 0),
+        'skipped': stats.get('skipped', 0),
+        'rows_per_second': stats.get('rows_per_second', 0),
+        'error': client_import.error,
+    })
+
 # Ativar/Desativar cliente
 @login_required
 def toggle_client_status_view(request, client_id):
@@ -1155,4 +1231,28 @@ def test_redirect_view(request):
         )
         return redirect(user.enterprise.get_absolute_url())
     
-    return render(request, 'enterprises/test_redirect.html', context)
\ No newline at end of file
+    return render(request, 'enterprises/test_redirect.html', context)
+
+
+def _get_accessible_document(user, document_id):
+    """Documento do cliente se o usuário pode ver o cliente (mesmas regras de view_client_view)"""
+    if not user.has_perm('users.view_clients'):
+        return None
+    documents = ClientDocument.objects.filter(id=document_id, client__enterprise_id=user.enterprise_id)
+    if user.has_perm('users.view_unit_clients') and not user.has_perm('users.view_all_clients'):
+        documents = documents.filter(client__units__in=user.units.all())
+    return documents.first()
+
+
+@login_required
+async def client_document_download_view(request, document_id):
+    """
+    Download de documento do cliente servido pela aplicação (view async, ver core/streaming.py)
+    O acesso é conferido a cada download e o link, ao contrário da URL assinada do S3, não expira
+    """
+    user = await request.auser()
+    document = await sync_to_async(_get_accessible_document)(user, document_id)
+    if document is None:
+        raise Http404("Documento não encontrado")
+    return stream_field_file(request, document.file, document.file_name, document.file_type, document.file_size)
+
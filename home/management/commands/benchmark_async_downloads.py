@@ -0,0 +1,131 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from projects.models import ProjectDocument
+
+
+class SlowStorage:
+    """Storage com atraso em cada abertura e leitura (simula um S3 lento)"""
+
+    def __init__(self, storage, latency):
+        self._storage = storage
+        self._latency = latency
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+    def open(self, name, mode='rb'):
+        time.sleep(self._latency)
+        return SlowFile(self._storage.open(name, mode), self._latency)
+
+
+class SlowFile:
+    def __init__(self, file, latency):
+        self._file = file
+        self._latency = latency
+
+    def read(self, size=-1):
+        time.sleep(self._latency)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Command(BaseCommand):
+    help = 'Compara downloads de documentos em WSGI (sequencial, um worker síncrono) e ASGI (concorrente) com storage lento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Usuário usado nas requisições')
+        parser.add_argument('--document', type=int, help='Id do ProjectDocument (padrão: o primeiro acessível)')
+        parser.add_argument('--requests', type=int, default=20, help='Quantidade de downloads por modo')
+        parser.add_argument('--concurrency', type=int, default=10, help='Downloads simultâneos no modo ASGI')
+        parser.add_argument('--latency', type=float, default=0.1, help='Atraso do storage por operação (segundos)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['email']} não encontrado")
+
+        documents = ProjectDocument.objects.filter(project__enterprise_id=user.enterprise_id)
+        if options['document']:
+            documents = documents.filter(id=options['document'])
+        document = documents.first()
+        if document is None:
+            raise CommandError('Nenhum documento de projeto encontrado para o benchmark')
+
+        url = reverse('project_document_download', args=[document.id])
+        total = max(options['requests'], 1)
+        field = ProjectDocument._meta.get_field('file')
+        original_storage = field.storage
+        field.storage = SlowStorage(original_storage, options['latency'])
+
+        self.stdout.write(
+            f"📦 {document.file_name} ({document.file_size} bytes) | {total} downloads | "
+            f"atraso do storage {options['latency'] * 1000:.0f}ms por operação"
+        )
+        try:
+            sync_stats = self._run_sync(user, url, total)
+            async_stats = async_to_sync(self._run_async)(user, url, total, max(options['concurrency'], 1))
+        finally:
+            field.storage = original_storage
+
+        for label, (elapsed, latencies) in (('WSGI (1 worker síncrono)', sync_stats), (f"ASGI (concorrência {options['concurrency']})", async_stats)):
+            self.stdout.write(
+                f"   {label:<28} {total / elapsed:7.1f} req/s | p50 até concluir {statistics.median(latencies) * 1000:7.0f}ms | "
+                f"total {elapsed:.2f}s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ ASGI {sync_stats[0] / async_stats[0]:.1f}x mais rápido com o storage lento"
+        ))
+
+    def _run_sync(self, user, url, total):
+        """Um worker síncrono atende um download por vez: as requisições entram em fila"""
+        client = Client()
+        client.force_login(user)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(total):
+            response = client.get(url)
+            self._check(response)
+            b''.join(response.streaming_content)
+            # Tempo até concluir, contando a espera na fila do worker
+            latencies.append(time.perf_counter() - started)
+        return time.perf_counter() - started, latencies
+
+    async def _run_async(self, user, url, total, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def download():
+            async with semaphore:
+                response = await client.get(url)
+                self._check(response)
+                async for _ in response.streaming_content:
+                    pass
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(download() for _ in range(total)))
+        return time.perf_counter() - started, latencies
+
+    def _check(self, response):
+        if response.status_code != 200:
+            raise CommandError(f"Download respondeu {response.status_code}")
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+
+ENGINES = [
+    # (rótulo, SESSION_ENGINE, SESSION_SAVE_EVERY_REQUEST)
+    # Referência: sessão no banco gravada em toda requisição (custo de reatribuir selected_unit_id a cada página)
+    ('db + gravação', 'django.contrib.sessions.backends.db', True),
+    ('db', 'django.contrib.sessions.backends.db', False),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db', False),
+    ('cache', 'django.contrib.sessions.backends.cache', False),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies', False),
+]
+
+DEFAULT_PAGES = ['home', 'projects_list', 'list_clients']
+
+
+class Command(BaseCommand):
+    help = 'Compara as consultas de sessão por página em cada SESSION_ENGINE (antes/depois das gravações condicionais)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Usuário usado nas requisições')
+        parser.add_argument('--page', action='append', dest='pages', help='Nome da URL (pode repetir)')
+        parser.add_argument('--requests', type=int, default=5, help='Requisições por página (após a primeira)')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Usuário {options['email']} não encontrado")
+
+        pages = [reverse(name) for name in options['pages'] or DEFAULT_PAGES]
+        repeat = max(options['requests'], 1)
+
+        self.stdout.write(f"📊 {len(pages)} páginas x {repeat} requisições por engine (primeira requisição descartada)")
+        self.stdout.write(f"   {'engine':<16} {'sessão/página':>14} {'gravações/página':>17} {'total/página':>13}")
+
+        for label, engine, save_every_request in ENGINES:
+            with override_settings(SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=save_every_request):
+                client = Client(HTTP_HOST='localhost')
+                client.force_login(user)
+                session_queries = session_writes = total = 0
+                for page in pages:
+                    # Primeira visita define selected_unit_id; as seguintes medem o estado estável
+                    client.get(page)
+                    for _ in range(repeat):
+                        with CaptureQueriesContext(connection) as queries:
+                            response = client.get(page)
+                        if response.status_code != 200:
+                            raise CommandError(f"{page} respondeu {response.status_code}")
+                        for query in queries.captured_queries:
+                            sql = query['sql']
+                            if 'django_session' in sql:
+                                session_queries += 1
+                                if not sql.lstrip().upper().startswith('SELECT'):
+                                    session_writes += 1
+                        total += len(queries)
+
+            count = len(pages) * repeat
+            self.stdout.write(
+                f"   {label:<16} {session_queries / count:>14.1f} {session_writes / count:>17.1f} {total / count:>13.1f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            "✅ cache e signed_cookies não consultam o banco; no cache em banco (sem REDIS_URL) as leituras vão para django_cache"
+        ))
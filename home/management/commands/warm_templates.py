@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from core.template_warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Compila todos os templates do projeto no cached loader e mostra o custo da primeira requisição'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Quantidade de templates mais lentos exibidos')
+
+    def handle(self, *args, **options):
+        stats = warm_templates()
+
+        if not stats['cached_loader']:
+            self.stdout.write(self.style.WARNING(
+                "⚠️ O cached loader não está configurado: os templates serão compilados novamente a cada uso"
+            ))
+
+        self.stdout.write(
+            f"🔥 {stats['templates']} templates compilados em {stats['elapsed_ms']:.0f}ms"
+        )
+
+        # Segunda passada: custo de buscar os mesmos templates já em cache
+        engine = engines['django']
+        started = time.perf_counter()
+        for name, _ in stats['timings']:
+            engine.get_template(name)
+        cached_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"⚡ Mesmos templates já em cache: {cached_ms:.1f}ms")
+
+        if stats['timings'] and options['top']:
+            self.stdout.write("\n🐢 Compilação na primeira requisição (sem aquecimento):")
+            for name, ms in stats['timings'][:options['top']]:
+                self.stdout.write(f"   {ms:8.1f}ms  {name}")
+
+        for name, error in stats['errors']:
+            self.stdout.write(self.style.ERROR(f"❌ {name}: {error}"))
+
+        if not stats['errors']:
+            self.stdout.write(self.style.SUCCESS("✅ Todos os templates compilados"))
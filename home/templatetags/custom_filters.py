@@ -1,6 +1,6 @@
 from django import template
 from decimal import Decimal
-import re
+from core.digits import only_digits, whatsapp_number
 
 register = template.Library()
 
@@ -16,26 +16,16 @@ def div(value, arg):
 
 @register.filter
 def whatsapp_phone(value):
-    """Formata o telefone para uso no WhatsApp (remove caracteres especiais e adiciona código do país)"""
+    """
+    Formata o telefone para uso no WhatsApp (somente dígitos, com código do país)
+    Prefira passar o valor pré-calculado (client.phone_digits): sem expressão regular a cada renderização
+    """
     if not value:
         return ''
-    
-    # Remove todos os caracteres que não são dígitos
-    phone_digits = re.sub(r'\D', '', str(value))
-    
-    # Se o número não tem código do país, adiciona o código do Brasil (55)
-    if len(phone_digits) == 10:  # Telefone fixo (11) 9999-9999 -> 11999999999
-        phone_digits = '55' + phone_digits
-    elif len(phone_digits) == 11:  # Celular (11) 99999-9999 -> 5511999999999
-        phone_digits = '55' + phone_digits
-    elif len(phone_digits) == 13 and phone_digits.startswith('55'):  # Já tem código do país
-        pass  # Mantém como está
-    else:
-        # Se não conseguir determinar o formato, tenta adicionar 55 na frente
-        if not phone_digits.startswith('55'):
-            phone_digits = '55' + phone_digits
-    
-    return phone_digits
+    value = str(value)
+    if not value.isdigit():
+        value = only_digits(value)
+    return whatsapp_number(value)
 
 @register.filter
 def lookup(dictionary, key):
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'queue', 'status', 'priority', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'queue', 'task']
+    search_fields = ['task', 'locked_by', 'last_error']
+    readonly_fields = ['created_at', 'locked_by', 'locked_at', 'finished_at', 'last_error']
+    actions = ['retry_jobs']
+
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(status='queued', attempts=0, run_at=timezone.now())
+        self.message_user(request, f"{updated} tarefa(s) devolvida(s) para a fila.")
+    retry_jobs.short_description = 'Executar novamente'
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "jobs"
+    verbose_name = "Fila de Tarefas"
+
+    def ready(self):
+        # Registra as tarefas definidas em <app>/tasks.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from jobs.utils import claim_jobs, run_job, requeue_stale_jobs, purge_finished_jobs
+
+
+class Command(BaseCommand):
+    help = 'Executa o worker da fila de tarefas em segundo plano'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', type=str, default='', help='Filas atendidas, separadas por vírgula (padrão: todas)')
+        parser.add_argument('--concurrency', type=int, default=1, help='Número de tarefas executadas em paralelo por este worker')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Segundos de espera quando a fila está vazia')
+        parser.add_argument('--once', action='store_true', help='Processa as tarefas disponíveis e encerra')
+        parser.add_argument('--purge-days', type=int, default=7, help='Remove tarefas concluídas há mais de N dias')
+
+    def handle(self, *args, **options):
+        queues = [queue.strip() for queue in options['queues'].split(',') if queue.strip()]
+        concurrency = max(options['concurrency'], 1)
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 Worker {worker_id} iniciado | filas: {', '.join(queues) or 'todas'} | concorrência: {concurrency}"
+        ))
+
+        recovered = requeue_stale_jobs()
+        if recovered:
+            self.stdout.write(self.style.WARNING(f"⚠️  {recovered} tarefa(s) presa(s) devolvida(s) para a fila"))
+
+        last_maintenance = time.monotonic()
+        processed = 0
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while self.running:
+                close_old_connections()
+                jobs = claim_jobs(worker_id, queues=queues or None, limit=concurrency)
+
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                else:
+                    results = list(executor.map(self.execute, jobs))
+                    processed += len(results)
+                    failed = results.count(False)
+                    self.stdout.write(f"✅ {len(results) - failed} concluída(s) | ❌ {failed} com erro")
+
+                # Manutenção periódica: tarefas presas e limpeza do histórico
+                if time.monotonic() - last_maintenance > 300:
+                    requeue_stale_jobs()
+                    purge_finished_jobs(options['purge_days'])
+                    last_maintenance = time.monotonic()
+
+        self.stdout.write(self.style.SUCCESS(f"👋 Worker encerrado. Tarefas processadas: {processed}"))
+
+    def execute(self, job):
+        try:
+            return run_job(job)
+        finally:
+            # Cada thread usa sua própria conexão com o banco
+            connection.close()
+
+    def stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING("⏹️  Encerrando após as tarefas em andamento..."))
+        self.running = False
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(default='default', max_length=50, verbose_name='Fila')),
+                ('task', models.CharField(max_length=200, verbose_name='Tarefa')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Maior valor é executado primeiro', verbose_name='Prioridade')),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Executando'), ('done', 'Concluída'), ('failed', 'Falhou')], default='queued', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Executar em')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada em')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizada em')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'queue', 'run_at'], name='jobs_ready_idx'), models.Index(fields=['status', 'locked_at'], name='jobs_locked_idx')],
+            },
+        ),
+    ]
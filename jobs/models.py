@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tarefa em segundo plano armazenada no banco de dados"""
+    STATUS_CHOICES = [
+        ('queued', 'Na fila'),
+        ('running', 'Executando'),
+        ('done', 'Concluída'),
+        ('failed', 'Falhou'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default', verbose_name="Fila")
+    task = models.CharField(max_length=200, verbose_name="Tarefa")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parâmetros")
+    priority = models.SmallIntegerField(default=0, verbose_name="Prioridade", help_text="Maior valor é executado primeiro")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name="Status")
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Executar em")
+
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciada em")
+    last_error = models.TextField(blank=True, verbose_name="Último Erro")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalizada em")
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-created_at']
+        indexes = [
+            # Busca de tarefas prontas para execução pelos workers
+            models.Index(fields=['status', 'queue', 'run_at'], name='jobs_ready_idx'),
+            # Recuperação de tarefas de workers que morreram
+            models.Index(fields=['status', 'locked_at'], name='jobs_locked_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.queue}] - {self.get_status_display()}"
@@ -0,0 +1,59 @@
+"""
+Registro das tarefas executadas pela fila
+
+Uso:
+    from jobs.registry import task
+
+    @task(queue='emails', max_attempts=5)
+    def send_report(report_id):
+        ...
+
+    send_report.enqueue(report_id=10)
+"""
+from functools import wraps
+
+
+_registry = {}
+
+
+class TaskNotRegistered(Exception):
+    pass
+
+
+def task(name=None, queue='default', priority=0, max_attempts=3):
+    """Registra uma função como tarefa da fila (parâmetros devem ser serializáveis em JSON)"""
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        func.task_name = task_name
+        func.queue = queue
+        func.priority = priority
+        func.max_attempts = max_attempts
+
+        @wraps(func)
+        def enqueue(run_at=None, **kwargs):
+            from .utils import enqueue as enqueue_job
+            return enqueue_job(
+                task_name,
+                payload=kwargs,
+                queue=queue,
+                priority=priority,
+                max_attempts=max_attempts,
+                run_at=run_at,
+            )
+
+        func.enqueue = enqueue
+        _registry[task_name] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise TaskNotRegistered(f"Tarefa não registrada: {name}")
+
+
+def registered_tasks():
+    return dict(_registry)
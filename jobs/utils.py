@@ -0,0 +1,210 @@
+"""
+Operações da fila de tarefas: enfileirar, reservar, executar e reagendar
+"""
+from datetime import timedelta
+import logging
+import random
+import traceback
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_queue_limits():
+    """Limite de tarefas simultâneas por fila (somando todos os workers)"""
+    return getattr(settings, 'JOBS_QUEUE_CONCURRENCY', {})
+
+
+def enqueue(task_name, payload=None, queue='default', priority=0, max_attempts=3, run_at=None):
+    """
+    Adiciona uma tarefa na fila
+    Com JOBS_ALWAYS_EAGER ativo (desenvolvimento sem worker) a tarefa roda na hora
+    """
+    job = Job.objects.create(
+        task=task_name,
+        payload=payload or {},
+        queue=queue,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+    if getattr(settings, 'JOBS_ALWAYS_EAGER', False) and run_at is None:
+        # Executa só depois do commit, para a tarefa enxergar os dados da requisição
+        transaction.on_commit(lambda: _run_eager(job.pk))
+
+    return job
+
+
+def _run_eager(job_id):
+    job = claim_job_by_id(job_id, worker_id='eager')
+    if job:
+        run_job(job)
+
+
+def compute_backoff(attempts):
+    """Espera exponencial com jitter: 30s, 60s, 120s, ... até JOBS_MAX_BACKOFF"""
+    base = getattr(settings, 'JOBS_BACKOFF_BASE', 30)
+    max_backoff = getattr(settings, 'JOBS_MAX_BACKOFF', 3600)
+    delay = min(base * (2 ** max(attempts - 1, 0)), max_backoff)
+    return timedelta(seconds=delay + random.uniform(0, delay * 0.1))
+
+
+def _claim_values(worker_id, now):
+    return {
+        'status': 'running',
+        'locked_by': worker_id,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+    }
+
+
+def claim_job_by_id(job_id, worker_id):
+    """Reserva uma tarefa específica (usado no modo eager)"""
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=job_id, status='queued').update(**_claim_values(worker_id, now))
+    return Job.objects.get(pk=job_id) if claimed else None
+
+
+def _available_slots(queues):
+    """
+    Calcula quantas tarefas ainda podem ser iniciadas em cada fila com limite
+    Filas sem limite configurado não aparecem no resultado
+    """
+    limits = get_queue_limits()
+    limited = [queue for queue in (queues or limits.keys()) if queue in limits]
+    if not limited:
+        return {}
+
+    running = dict(
+        Job.objects.filter(status='running', queue__in=limited)
+        .values('queue').annotate(total=Count('id')).values_list('queue', 'total')
+    )
+    return {queue: max(limits[queue] - running.get(queue, 0), 0) for queue in limited}
+
+
+def claim_jobs(worker_id, queues=None, limit=1):
+    """
+    Reserva até `limit` tarefas prontas para execução
+
+    No PostgreSQL usa SELECT ... FOR UPDATE SKIP LOCKED, então vários workers
+    podem buscar tarefas ao mesmo tempo sem disputar as mesmas linhas.
+    No SQLite (sem SKIP LOCKED) cada candidata é reservada com um UPDATE
+    condicional em status='queued'; se outro worker chegou antes, a linha
+    simplesmente não é atualizada e passamos para a próxima.
+    """
+    now = timezone.now()
+    slots = _available_slots(queues)
+    blocked_queues = [queue for queue, free in slots.items() if free == 0]
+
+    candidates = Job.objects.filter(status='queued', run_at__lte=now)
+    if queues:
+        candidates = candidates.filter(queue__in=queues)
+    if blocked_queues:
+        candidates = candidates.exclude(queue__in=blocked_queues)
+    candidates = candidates.order_by('-priority', 'run_at', 'id')
+
+    # Busca algumas candidatas a mais para compensar filas que atingirem o limite
+    fetch_size = limit * 2 if slots else limit
+
+    claimed_ids = []
+    taken_per_queue = {}
+
+    def accept(queue):
+        if queue in slots and taken_per_queue.get(queue, 0) >= slots[queue]:
+            return False
+        taken_per_queue[queue] = taken_per_queue.get(queue, 0) + 1
+        return True
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            rows = candidates.select_for_update(skip_locked=True).values_list('id', 'queue')[:fetch_size]
+            for job_id, queue in rows:
+                if len(claimed_ids) >= limit:
+                    break
+                if accept(queue):
+                    claimed_ids.append(job_id)
+            if claimed_ids:
+                Job.objects.filter(id__in=claimed_ids).update(**_claim_values(worker_id, now))
+    else:
+        for job_id, queue in list(candidates.values_list('id', 'queue')[:fetch_size]):
+            if len(claimed_ids) >= limit:
+                break
+            if not accept(queue):
+                continue
+            if Job.objects.filter(id=job_id, status='queued').update(**_claim_values(worker_id, now)):
+                claimed_ids.append(job_id)
+            else:
+                taken_per_queue[queue] -= 1
+
+    if not claimed_ids:
+        return []
+
+    return list(Job.objects.filter(id__in=claimed_ids).order_by('-priority', 'run_at', 'id'))
+
+
+def run_job(job):
+    """Executa a tarefa e registra sucesso, novo agendamento ou falha definitiva"""
+    try:
+        func = get_task(job.task)
+        func(**job.payload)
+    except Exception as e:
+        error = f"{e}\n{traceback.format_exc()}"
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed',
+                last_error=error,
+                finished_at=timezone.now(),
+                locked_by='',
+                locked_at=None,
+            )
+            logger.error("Tarefa %s (#%s) falhou definitivamente: %s", job.task, job.pk, e)
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued',
+                last_error=error,
+                run_at=timezone.now() + compute_backoff(job.attempts),
+                locked_by='',
+                locked_at=None,
+            )
+            logger.warning("Tarefa %s (#%s) falhou na tentativa %s: %s", job.task, job.pk, job.attempts, e)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='done',
+        last_error='',
+        finished_at=timezone.now(),
+        locked_by='',
+        locked_at=None,
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """
+    Devolve para a fila tarefas presas em 'running' por workers que morreram
+    (deploy, OOM, reinício do container)
+    """
+    timeout = getattr(settings, 'JOBS_LOCK_TIMEOUT', 1800)
+    limit = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status='running', locked_at__lt=limit).update(
+        status='queued',
+        run_at=timezone.now(),
+        locked_by='',
+        locked_at=None,
+    )
+
+
+def purge_finished_jobs(days=7):
+    """Remove tarefas concluídas há mais de `days` dias"""
+    limit = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status='done', finished_at__lt=limit).delete()
+    return deleted
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'provider', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status', 'provider']
+    search_fields = ['to', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'locked_at', 'last_error']
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        updated = queryset.filter(status='failed').update(status='queued', attempts=0, send_after=timezone.now())
+        if updated:
+            from .utils import schedule_flush
+            schedule_flush()
+        self.message_user(request, f"{updated} email(s) devolvido(s) para a fila.")
+    retry_emails.short_description = 'Reenviar'
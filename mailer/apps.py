@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class MailerConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "mailer"
+    verbose_name = "Envio de Emails"
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from mailer.utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Envia imediatamente os emails pendentes da caixa de saída'
+
+    def handle(self, *args, **options):
+        stats = send_queued_emails()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {stats['sent']} enviado(s) | ⏳ {stats['deferred']} adiado(s) | ❌ {stats['failed']} com erro"
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='default', max_length=50, verbose_name='Provedor')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Remetente')),
+                ('to', models.EmailField(max_length=254, verbose_name='Destinatário')),
+                ('subject', models.CharField(max_length=255, verbose_name='Assunto')),
+                ('html_body', models.TextField(verbose_name='Conteúdo HTML')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Maior valor é enviado primeiro', verbose_name='Prioridade')),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('failed', 'Falhou')], default='queued', max_length=10, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5, verbose_name='Máximo de Tentativas')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Enviar após')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Reservado em')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+            ],
+            options={
+                'verbose_name': 'Email de Saída',
+                'verbose_name_plural': 'Emails de Saída',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'send_after'], name='mailer_ready_idx'), models.Index(fields=['provider', 'sent_at'], name='mailer_rate_idx')],
+            },
+        ),
+    ]
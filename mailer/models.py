@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """Caixa de saída: emails transacionais aguardando envio pelo worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Na fila'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falhou'),
+    ]
+
+    provider = models.CharField(max_length=50, default='default', verbose_name="Provedor")
+    from_email = models.CharField(max_length=254, verbose_name="Remetente")
+    to = models.EmailField(verbose_name="Destinatário")
+    subject = models.CharField(max_length=255, verbose_name="Assunto")
+    html_body = models.TextField(verbose_name="Conteúdo HTML")
+    priority = models.SmallIntegerField(default=0, verbose_name="Prioridade", help_text="Maior valor é enviado primeiro")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', verbose_name="Status")
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_attempts = models.PositiveSmallIntegerField(default=5, verbose_name="Máximo de Tentativas")
+    send_after = models.DateTimeField(default=timezone.now, verbose_name="Enviar após")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="Reservado em")
+    last_error = models.TextField(blank=True, verbose_name="Último Erro")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado em")
+
+    class Meta:
+        verbose_name = "Email de Saída"
+        verbose_name_plural = "Emails de Saída"
+        ordering = ['-created_at']
+        indexes = [
+            # Busca dos emails prontos para envio
+            models.Index(fields=['status', 'send_after'], name='mailer_ready_idx'),
+            # Contagem de envios recentes para o limite por provedor
+            models.Index(fields=['provider', 'sent_at'], name='mailer_rate_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {self.to} ({self.get_status_display()})"
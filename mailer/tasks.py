@@ -0,0 +1,20 @@
+"""
+Tarefas em segundo plano do app mailer (executadas pelo run_worker)
+"""
+from django.utils import timezone
+
+from jobs.registry import task
+
+
+@task(queue='emails', priority=10, max_attempts=3)
+def flush_outbox():
+    """Envia todos os emails prontos da caixa de saída"""
+    from .utils import send_queued_emails, next_pending_send, schedule_flush
+    
+    stats = send_queued_emails()
+    print(f"📧 Caixa de saída: ✅ {stats['sent']} enviado(s) | ⏳ {stats['deferred']} adiado(s) | ❌ {stats['failed']} com erro")
+    
+    # Reagenda para retentativas e emails adiados pelo limite do provedor
+    next_send = next_pending_send()
+    if next_send:
+        schedule_flush(run_at=max(next_send, timezone.now()))
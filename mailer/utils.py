@@ -0,0 +1,231 @@
+"""
+Serviço de envio de emails transacionais
+
+Os emails são renderizados na requisição, gravados na caixa de saída
+(OutboundEmail) e enviados em lote pelo worker da fila de tarefas,
+reaproveitando uma única conexão SMTP por provedor e respeitando o
+limite de envios por minuto de cada provedor.
+"""
+from datetime import timedelta
+from functools import lru_cache
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Min
+from django.template import loader
+from django.utils import timezone
+
+from jobs.utils import compute_backoff
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+# Tempo máximo em 'sending' antes de considerar que o worker morreu
+SENDING_TIMEOUT = timedelta(minutes=15)
+
+
+@lru_cache(maxsize=64)
+def get_email_template(template_name):
+    """Template compilado mantido em memória por worker"""
+    return loader.get_template(template_name)
+
+
+def render_email(template_name, context):
+    return get_email_template(template_name).render(context)
+
+
+def get_provider_config(provider):
+    """
+    Configuração do provedor definida em MAILER_PROVIDERS
+    backend/options são repassados para get_connection()
+    """
+    config = {
+        'backend': None,
+        'options': {},
+        'rate_per_minute': None,
+        'batch_size': 50,
+    }
+    config.update(getattr(settings, 'MAILER_PROVIDERS', {}).get(provider, {}))
+    return config
+
+
+def queue_email(to, subject, template_name, context, from_email=None, provider='default', priority=0):
+    """
+    Renderiza o email e grava na caixa de saída
+    O envio acontece no worker (python manage.py run_worker)
+    """
+    email = OutboundEmail.objects.create(
+        provider=provider,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=to,
+        subject=subject,
+        html_body=render_email(template_name, context),
+        priority=priority,
+    )
+    transaction.on_commit(schedule_flush)
+    return email
+
+
+def schedule_flush(run_at=None):
+    """
+    Agenda o envio da caixa de saída
+    Basta um job pendente: ele envia todos os emails na fila, então
+    cadastrar dezenas de usuários gera um único job e uma única conexão
+    Um job pendente agendado para depois (retentativa ou limite do provedor)
+    é antecipado para `run_at`, para não segurar os emails novos
+    """
+    from jobs.models import Job
+    from .tasks import flush_outbox
+
+    requested = run_at or timezone.now()
+    pending = Job.objects.filter(task=flush_outbox.task_name, status='queued')
+    pending.filter(run_at__gt=requested).update(run_at=requested)
+    if not pending.exists():
+        flush_outbox.enqueue(run_at=run_at)
+
+
+def requeue_stale_emails():
+    """Devolve para a fila emails presos em 'sending' por workers que morreram"""
+    return OutboundEmail.objects.filter(
+        status='sending', locked_at__lt=timezone.now() - SENDING_TIMEOUT
+    ).update(status='queued', locked_at=None)
+
+
+def claim_emails(limit):
+    """
+    Reserva até `limit` emails prontos para envio
+    SKIP LOCKED no PostgreSQL; UPDATE condicional no SQLite
+    """
+    now = timezone.now()
+    ready = (
+        OutboundEmail.objects
+        .filter(status='queued', send_after__lte=now)
+        .order_by('-priority', 'send_after', 'id')
+    )
+    claim_values = {'status': 'sending', 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            OutboundEmail.objects.filter(id__in=ids).update(**claim_values)
+    else:
+        ids = []
+        for email_id in list(ready.values_list('id', flat=True)[:limit]):
+            if OutboundEmail.objects.filter(id=email_id, status='queued').update(**claim_values):
+                ids.append(email_id)
+
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('-priority', 'send_after', 'id'))
+
+
+def remaining_quota(provider, config):
+    """Quantos emails o provedor ainda aceita no último minuto (None = sem limite)"""
+    rate = config['rate_per_minute']
+    if not rate:
+        return None
+    sent_last_minute = OutboundEmail.objects.filter(
+        provider=provider,
+        sent_at__gte=timezone.now() - timedelta(minutes=1),
+    ).count()
+    return max(rate - sent_last_minute, 0)
+
+
+def _defer(emails, delay):
+    """Devolve emails reservados para a fila sem contar como tentativa"""
+    OutboundEmail.objects.filter(id__in=[email.id for email in emails]).update(
+        status='queued',
+        locked_at=None,
+        attempts=F('attempts') - 1,
+        send_after=timezone.now() + delay,
+    )
+
+
+def _mark_failure(email, error):
+    if email.attempts >= email.max_attempts:
+        values = {'status': 'failed'}
+        logger.error("Email #%s para %s falhou definitivamente: %s", email.id, email.to, error)
+    else:
+        values = {'status': 'queued', 'send_after': timezone.now() + compute_backoff(email.attempts)}
+        logger.warning("Email #%s para %s falhou na tentativa %s: %s", email.id, email.to, email.attempts, error)
+
+    OutboundEmail.objects.filter(id=email.id).update(last_error=str(error), locked_at=None, **values)
+
+
+def send_provider_batch(provider, emails):
+    """Envia os emails de um provedor usando uma única conexão"""
+    config = get_provider_config(provider)
+    sent_ids = []
+
+    mail_connection = get_connection(backend=config['backend'], **config['options'])
+    try:
+        mail_connection.open()
+    except Exception as e:
+        for email in emails:
+            _mark_failure(email, e)
+        return 0
+
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.html_body,
+                from_email=email.from_email,
+                to=[email.to],
+                connection=mail_connection,
+            )
+            message.content_subtype = "html"
+            try:
+                mail_connection.send_messages([message])
+                sent_ids.append(email.id)
+            except Exception as e:
+                _mark_failure(email, e)
+    finally:
+        mail_connection.close()
+
+    if sent_ids:
+        OutboundEmail.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), locked_at=None, last_error=''
+        )
+    return len(sent_ids)
+
+
+def send_queued_emails(max_batches=20):
+    """
+    Envia a caixa de saída em lotes
+    Retorna estatísticas do envio
+    """
+    stats = {'sent': 0, 'failed': 0, 'deferred': 0}
+    requeue_stale_emails()
+
+    batch_size = get_provider_config('default')['batch_size']
+
+    for _ in range(max_batches):
+        emails = claim_emails(batch_size)
+        if not emails:
+            break
+
+        by_provider = {}
+        for email in emails:
+            by_provider.setdefault(email.provider, []).append(email)
+
+        for provider, provider_emails in by_provider.items():
+            quota = remaining_quota(provider, get_provider_config(provider))
+            if quota is not None and quota < len(provider_emails):
+                # Limite do provedor atingido: o excedente volta para a fila
+                _defer(provider_emails[quota:], timedelta(minutes=1))
+                stats['deferred'] += len(provider_emails) - quota
+                provider_emails = provider_emails[:quota]
+
+            if provider_emails:
+                sent = send_provider_batch(provider, provider_emails)
+                stats['sent'] += sent
+                stats['failed'] += len(provider_emails) - sent
+
+    return stats
+
+
+def next_pending_send():
+    """Data do próximo email aguardando envio (retentativas e excedentes do limite)"""
+    return OutboundEmail.objects.filter(status='queued').aggregate(next=Min('send_after'))['next']
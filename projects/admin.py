@@ -1,3 +1,24 @@
 from django.contrib import admin
+from .installments import mark_installments_paid, mark_installments_pending
+from .models import ProjectInstallment
 
-# Register your models here.
+
+@admin.register(ProjectInstallment)
+class ProjectInstallmentAdmin(admin.ModelAdmin):
+    list_display = ['project', 'number', 'due_date', 'amount', 'status', 'paid_at', 'unit', 'enterprise']
+    list_filter = ['status', 'enterprise', 'unit']
+    search_fields = ['project__client__name', 'project__credit_line__name']
+    date_hierarchy = 'due_date'
+    list_select_related = ['project__client', 'project__credit_line', 'unit', 'enterprise']
+    readonly_fields = ['project', 'enterprise', 'unit', 'number', 'due_date', 'amount', 'interest', 'balance', 'created_at']
+    actions = ['mark_paid', 'mark_pending']
+
+    def mark_paid(self, request, queryset):
+        updated = mark_installments_paid(queryset)
+        self.message_user(request, f"{updated} parcela(s) marcada(s) como paga(s).")
+    mark_paid.short_description = 'Marcar como pagas'
+
+    def mark_pending(self, request, queryset):
+        updated = mark_installments_pending(queryset)
+        self.message_user(request, f"{updated} parcela(s) devolvida(s) para pendente.")
+    mark_pending.short_description = 'Estornar pagamento'
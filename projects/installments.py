@@ -0,0 +1,128 @@
+"""
+Parcelas persistidas dos financiamentos (ProjectInstallment)
+
+O cronograma de cada projeto vem de enterprises.amortization e é gravado em
+ProjectInstallment para que os vencimentos possam ser consultados por faixa de
+data, usando o índice (enterprise, unit, due_date, status), em vez de serem
+recalculados projeto a projeto.
+
+As parcelas são regeneradas quando um projeto aprovado é criado ou quando
+algum campo do financiamento muda (ver projects/signals.py). Para os projetos
+já existentes use o comando generate_installments.
+
+Parcelas só passam a PAGO pela baixa explícita (mark_installments_paid, ação
+"Marcar como pagas" do admin); nenhum campo do projeto quita parcelas. Parcelas
+já baixadas mantêm o status e a data de pagamento ao serem regeneradas.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from enterprises.amortization import compute_schedules, schedule_key
+from .models import FINANCED_STATUSES, Project, ProjectInstallment
+
+
+# Campos que alteram o cronograma (ou em qual empresa/unidade ele aparece)
+INSTALLMENT_FIELDS = (
+    'status', 'value', 'fees', 'payment_grace', 'installments',
+    'approval_date', 'unit_id', 'enterprise_id', 'is_active',
+)
+
+_PROJECT_COLUMNS = (
+    'pk', 'enterprise_id', 'unit_id', 'status', 'is_active',
+    'value', 'fees', 'payment_grace', 'installments', 'approval_date',
+)
+
+
+def installments_outdated(previous, instance):
+    """True quando a alteração do projeto exige regerar as parcelas"""
+    return any(str(getattr(previous, field)) != str(getattr(instance, field)) for field in INSTALLMENT_FIELDS)
+
+
+def _build_installments(row, schedule, paid):
+    installments = []
+    number = 0
+    for periodo in schedule['fluxo']:
+        if periodo['status'] != 'pagamento':
+            continue
+        number += 1
+        paid_at = paid.get((row['pk'], number))
+        installments.append(ProjectInstallment(
+            project_id=row['pk'],
+            enterprise_id=row['enterprise_id'],
+            unit_id=row['unit_id'],
+            number=number,
+            due_date=periodo['data_vencimento'],
+            amount=periodo['valor_parcela'],
+            interest=periodo['juros'],
+            balance=periodo['saldo_devedor'],
+            status='PAGO' if (row['pk'], number) in paid else 'PENDENTE',
+            paid_at=paid_at,
+        ))
+    return installments
+
+
+def regenerate_project_installments(project_ids, batch_size=1000):
+    """
+    Regera as parcelas dos projetos informados (um lote = poucas consultas)
+    Projetos fora das fases de financiamento, inativos, sem empresa ou sem dados de financiamento ficam sem parcelas
+    Retorna o número de parcelas gravadas
+    """
+    # Sempre relê do banco: em formulários os campos da instância podem estar como texto
+    rows = list(Project.objects.filter(pk__in=project_ids).values(*_PROJECT_COLUMNS))
+
+    keys = {}
+    for row in rows:
+        if row['is_active'] and row['enterprise_id'] and row['status'] in FINANCED_STATUSES:
+            keys[row['pk']] = schedule_key(
+                row['value'], row['fees'], row['payment_grace'], row['installments'], row['approval_date']
+            )
+    schedules = compute_schedules(keys.values())
+
+    with transaction.atomic():
+        existing = ProjectInstallment.objects.filter(project_id__in=project_ids)
+        paid = {
+            (project_id, number): paid_at
+            for project_id, number, paid_at in existing.filter(status='PAGO').values_list('project_id', 'number', 'paid_at')
+        }
+        existing.delete()
+
+        installments = []
+        for row in rows:
+            key = keys.get(row['pk'])
+            if key is not None:
+                installments.extend(_build_installments(row, schedules[key], paid))
+        ProjectInstallment.objects.bulk_create(installments, batch_size=batch_size)
+
+    return len(installments)
+
+
+def regenerate_all_installments(queryset=None, batch_size=500, on_progress=None):
+    """
+    Regera as parcelas de todos os projetos do queryset em lotes (backfill)
+    on_progress: callback(projetos processados, parcelas gravadas) ao fim de cada lote
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+
+    project_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    total = 0
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        total += regenerate_project_installments(batch)
+        if on_progress:
+            on_progress(start + len(batch), total)
+    return len(project_ids), total
+
+
+def mark_installments_paid(queryset, paid_at=None):
+    """
+    Baixa explícita das parcelas pendentes do queryset (PENDENTE -> PAGO)
+    paid_at: data do pagamento (padrão: hoje)
+    Retorna o número de parcelas baixadas
+    """
+    return queryset.filter(status='PENDENTE').update(status='PAGO', paid_at=paid_at or timezone.localdate())
+
+
+def mark_installments_pending(queryset):
+    """Estorna a baixa das parcelas do queryset (PAGO -> PENDENTE)"""
+    return queryset.filter(status='PAGO').update(status='PENDENTE', paid_at=None)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.installments import regenerate_all_installments
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Gera (ou regera) as parcelas persistidas dos financiamentos dos projetos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Projetos por lote (uma transação por lote)')
+        parser.add_argument('--enterprise', type=int, help='ID da empresa (padrão: todas)')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['enterprise']:
+            projects = projects.filter(enterprise_id=options['enterprise'])
+
+        self.stdout.write("🧮 Gerando parcelas dos projetos...")
+        started = time.monotonic()
+
+        def on_progress(done, installments):
+            self.stdout.write(f"   📦 {done} projetos processados, {installments} parcelas gravadas")
+
+        total_projects, total_installments = regenerate_all_installments(
+            projects, batch_size=options['batch_size'], on_progress=on_progress
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total_installments} parcelas geradas para {total_projects} projetos em {elapsed:.1f}s"
+        ))
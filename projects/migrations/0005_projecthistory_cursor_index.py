@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_received_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projecthistory',
+            index=models.Index(fields=['project', '-id'], name='project_history_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0004_clientimport'),
+        ('projects', '0005_projecthistory_cursor_index'),
+        ('units', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectInstallment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(verbose_name='Parcela')),
+                ('due_date', models.DateField(verbose_name='Vencimento')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Valor da Parcela')),
+                ('interest', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Juros')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saldo Devedor')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PAGO', 'Pago')], default='PENDENTE', max_length=10, verbose_name='Status')),
+                ('paid_at', models.DateField(blank=True, null=True, verbose_name='Pago em')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enterprise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_installments', to='enterprises.enterprise')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installment_schedule', to='projects.project')),
+                ('unit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_installments', to='units.unit')),
+            ],
+            options={
+                'verbose_name': 'Parcela do Projeto',
+                'verbose_name_plural': 'Parcelas dos Projetos',
+                'ordering': ['due_date', 'number'],
+                'indexes': [models.Index(fields=['enterprise', 'unit', 'due_date', 'status'], name='installment_unit_due_idx'), models.Index(fields=['enterprise', 'due_date', 'status'], name='installment_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'number'), name='project_installment_unique_number')],
+            },
+        ),
+    ]
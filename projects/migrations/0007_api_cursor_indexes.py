@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0007_api_cursor_indexes'),
+        ('projects', '0006_projectinstallment'),
+        ('units', '0003_api_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['enterprise', '-created_at', '-id'], name='project_api_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projecthistory',
+            index=models.Index(fields=['project', '-timestamp', '-id'], name='project_history_api_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0007_api_cursor_indexes'),
+        ('projects', '0007_api_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('AC', 'Em Acolhimento'), ('PE', 'Com Pendência'), ('AN', 'Em Análise'), ('AP', 'Aprovados'), ('AF', 'Em Formalização'), ('FM', 'Formalizado'), ('LB', 'Liberado'), ('RC', 'Receita')], max_length=2, verbose_name='De')),
+                ('to_status', models.CharField(choices=[('AC', 'Em Acolhimento'), ('PE', 'Com Pendência'), ('AN', 'Em Análise'), ('AP', 'Aprovados'), ('AF', 'Em Formalização'), ('FM', 'Formalizado'), ('LB', 'Liberado'), ('RC', 'Receita')], max_length=2, verbose_name='Para')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='project_status_transitions', to=settings.AUTH_USER_MODEL)),
+                ('enterprise', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='project_status_transitions', to='enterprises.enterprise')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'Transição de Fase',
+                'verbose_name_plural': 'Transições de Fase',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['project', '-created_at'], name='project_transition_idx'), models.Index(fields=['enterprise', 'to_status', '-created_at'], name='project_transition_flow_idx')],
+            },
+        ),
+    ]
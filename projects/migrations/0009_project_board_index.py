@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0007_api_cursor_indexes'),
+        ('projects', '0008_projectstatustransition'),
+        ('units', '0003_api_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['enterprise', 'status', '-created_at', '-id'], name='project_board_idx'),
+        ),
+    ]
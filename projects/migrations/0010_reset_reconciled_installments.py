@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:10
+
+from django.db import migrations
+
+
+def reset_reconciled_installments(apps, schema_editor):
+    """
+    Devolve para PENDENTE as parcelas baixadas a partir do valor recebido do projeto
+    Até aqui não havia baixa explícita: toda parcela PAGO veio dessa conciliação
+    """
+    ProjectInstallment = apps.get_model('projects', 'ProjectInstallment')
+    ProjectInstallment.objects.filter(status='PAGO').update(status='PENDENTE', paid_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_project_board_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_reconciled_installments, migrations.RunPython.noop),
+    ]
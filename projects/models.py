@@ -40,6 +40,14 @@ TYPE_CHOICES = [
     ('OTH', 'Outros'),
 ]
 
+INSTALLMENT_STATUS_CHOICES = [
+    ('PENDENTE', 'Pendente'),
+    ('PAGO', 'Pago'),
+]
+
+# Fases a partir da aprovação: o financiamento existe e as parcelas entram na carteira
+FINANCED_STATUSES = ['AP', 'AF', 'FM', 'LB', 'RC']
+
 def project_document_directory_path(instance, filename):
     unique_filename = f"{uuid.uuid4()}.{filename.split('.')[-1]}"
     return f'project_documents/{instance.project.client.id}/{instance.project.id}/{unique_filename}'
@@ -122,6 +130,12 @@ class Project(models.Model):
         verbose_name = "Projeto"
         verbose_name_plural = "Projetos"
         ordering = ['-created_at']
+        indexes = [
+            # Paginação por cursor da API (created_at < t OR (created_at = t AND id < i))
+            models.Index(fields=['enterprise', '-created_at', '-id'], name='project_api_cursor_idx'),
+            # Colunas do quadro da esteira: primeiros cartões e cursor de cada fase
+            models.Index(fields=['enterprise', 'status', '-created_at', '-id'], name='project_board_idx'),
+        ]
 
     def __str__(self):
         status = "Ativo" if self.is_active else "Inativo"
@@ -135,6 +149,14 @@ class ProjectHistory(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     changes = models.JSONField(verbose_name="Alterações")
 
+    class Meta:
+        indexes = [
+            # Paginação por cursor da linha do tempo (id < cursor ORDER BY id DESC)
+            models.Index(fields=['project', '-id'], name='project_history_cursor_idx'),
+            # Paginação por cursor da API sobre (timestamp, id)
+            models.Index(fields=['project', '-timestamp', '-id'], name='project_history_api_idx'),
+        ]
+
     def __str__(self):
         return f"Histórico de {self.project.credit_line.name} - {self.project.client.name} em {self.timestamp}"
 
@@ -159,3 +181,61 @@ class ProjectDocument(models.Model):
                 # Se falhar, continua com a exclusão do registro no banco
                 pass
         super().delete(*args, **kwargs)
+
+
+# Parcelas do financiamento (geradas a partir de enterprises.amortization)
+class ProjectInstallment(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='installment_schedule')
+    # Empresa e unidade copiadas do projeto para consultar vencimentos sem JOIN
+    enterprise = models.ForeignKey(Enterprise, on_delete=models.CASCADE, related_name='project_installments')
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name='project_installments')
+    number = models.PositiveSmallIntegerField(verbose_name="Parcela")
+    due_date = models.DateField(verbose_name="Vencimento")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Valor da Parcela")
+    interest = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Juros")
+    balance = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Saldo Devedor")
+    status = models.CharField(max_length=10, choices=INSTALLMENT_STATUS_CHOICES, default='PENDENTE', verbose_name="Status")
+    paid_at = models.DateField(blank=True, null=True, verbose_name="Pago em")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Parcela do Projeto"
+        verbose_name_plural = "Parcelas dos Projetos"
+        ordering = ['due_date', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'number'], name='project_installment_unique_number'),
+        ]
+        indexes = [
+            # Vencimentos por unidade: uma varredura por faixa de data
+            models.Index(fields=['enterprise', 'unit', 'due_date', 'status'], name='installment_unit_due_idx'),
+            # Vencimentos da carteira inteira (todas as unidades)
+            models.Index(fields=['enterprise', 'due_date', 'status'], name='installment_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Parcela {self.number} do projeto #{self.project_id} - {self.due_date:%d/%m/%Y}"
+
+
+# Mudanças de fase (status) dos projetos: uma linha por transição, individual ou em lote
+class ProjectStatusTransition(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_transitions')
+    # Empresa copiada do projeto para consultar o fluxo da carteira sem JOIN
+    enterprise = models.ForeignKey(Enterprise, on_delete=models.CASCADE, null=True, related_name='project_status_transitions')
+    from_status = models.CharField(max_length=2, choices=PROJECT_STATUS_CHOICES, verbose_name="De")
+    to_status = models.CharField(max_length=2, choices=PROJECT_STATUS_CHOICES, verbose_name="Para")
+    changed_by = models.ForeignKey(User, blank=True, null=True, on_delete=models.SET_NULL, related_name='project_status_transitions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Transição de Fase"
+        verbose_name_plural = "Transições de Fase"
+        ordering = ['-created_at']
+        indexes = [
+            # Linha do tempo de um projeto
+            models.Index(fields=['project', '-created_at'], name='project_transition_idx'),
+            # Entradas em cada fase por período (fluxo da esteira)
+            models.Index(fields=['enterprise', 'to_status', '-created_at'], name='project_transition_flow_idx'),
+        ]
+
+    def __str__(self):
+        return f"Projeto #{self.project_id}: {self.get_from_status_display()} -> {self.get_to_status_display()}"
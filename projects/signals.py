@@ -2,8 +2,9 @@ from datetime import date
 from django.utils import timezone
 from django.dispatch import receiver
 from .middleware import get_current_user
+from .installments import installments_outdated, regenerate_project_installments
 from django.contrib.auth import get_user_model
-from .models import Project, ProjectHistory, ProjectDocument
+from .models import Project, ProjectHistory, ProjectDocument, ProjectStatusTransition
 from django.db.models.signals import pre_save, post_save, post_delete
 from .models import PROJECT_STATUS_CHOICES, ACTIVITY_CHOICES, SIZE_CHOICES
 PROJECT_STATUS_MAP = dict(PROJECT_STATUS_CHOICES)
@@ -84,6 +85,8 @@ def track_project_changes(sender, instance, **kwargs):
 
     try:
         previous = Project.objects.get(pk=instance.pk)
+        # Parcelas regeradas no post_save (ver regenerate_installments)
+        instance._installments_outdated = installments_outdated(previous, instance)
         changes = {}
         current_user = get_current_user()
         user_name = get_user_display_name(current_user)
@@ -139,9 +142,25 @@ def track_project_changes(sender, instance, **kwargs):
                 changes=changes,
             )
 
+        # Mudanças em lote gravam as transições direto (ver projects/transitions.py)
+        if previous.status != instance.status:
+            ProjectStatusTransition.objects.create(
+                project=instance,
+                enterprise_id=instance.enterprise_id,
+                from_status=previous.status,
+                to_status=instance.status,
+                changed_by=current_user if getattr(current_user, 'is_authenticated', False) else None,
+            )
+
     except Project.DoesNotExist:
         pass
 
+@receiver(post_save, sender=Project)
+def regenerate_installments(sender, instance, created, **kwargs):
+    if created or getattr(instance, '_installments_outdated', False):
+        instance._installments_outdated = False
+        regenerate_project_installments([instance.pk])
+
 @receiver(post_save, sender=ProjectDocument)
 def track_document_addition(sender, instance, created, **kwargs):
     if created:
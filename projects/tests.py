@@ -1,3 +1,307 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db.models.query import QuerySet
 from django.test import TestCase
+from django.utils import timezone
+
+from enterprises.amortization import compute_schedules, schedule_key
+from enterprises.models import Client, Enterprise
+from units.models import Unit
+from users.catalog import invalidate_catalog
+from users.models import User
+from users.permissions import create_custom_permissions
+from .installments import (
+    mark_installments_paid,
+    mark_installments_pending,
+    regenerate_all_installments,
+    regenerate_project_installments,
+)
+from .models import Bank, CreditLine, Project, ProjectHistory, ProjectInstallment, ProjectStatusTransition
+from .transitions import bulk_transition
+
+
+class ProjectFixturesMixin:
+    """Empresa, unidade, cliente, banco e linha de crédito para criar projetos nos testes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.enterprise = Enterprise.objects.create(name='Empresa Teste', cnpj_or_cpf='00000000000100', subdomain='teste')
+        cls.unit = Unit.objects.create(name='Unidade Centro', location='Centro', enterprise=cls.enterprise)
+        cls.other_unit = Unit.objects.create(name='Unidade Norte', location='Norte', enterprise=cls.enterprise)
+        cls.customer = Client.objects.create(name='Cliente Teste', enterprise=cls.enterprise)
+        cls.bank = Bank.objects.create(name='Banco Teste', enterprise=cls.enterprise)
+        cls.credit_line = CreditLine.objects.create(name='Pronaf', enterprise=cls.enterprise)
+
+    def create_project(self, **fields):
+        values = {
+            'client': self.customer,
+            'enterprise': self.enterprise,
+            'unit': self.unit,
+            'bank': self.bank,
+            'credit_line': self.credit_line,
+            'status': 'AP',
+            'value': Decimal('100000.00'),
+            'fees': Decimal('5.00'),
+            'payment_grace': 1,
+            'installments': 4,
+            'approval_date': timezone.localdate() - timedelta(days=30),
+        }
+        values.update(fields)
+        return Project.objects.create(**values)
+
+
+class ProjectInstallmentTests(ProjectFixturesMixin, TestCase):
+    """Parcelas persistidas: geração pelos signals, regeração, backfill e baixa explícita"""
+
+    def expected_installments(self, project):
+        key = schedule_key(project.value, project.fees, project.payment_grace, project.installments, project.approval_date)
+        fluxo = compute_schedules([key])[key]['fluxo']
+        return [(periodo['data_vencimento'], periodo['valor_parcela']) for periodo in fluxo if periodo['status'] == 'pagamento']
+
+    def installments(self, project):
+        return list(ProjectInstallment.objects.filter(project=project).order_by('number'))
+
+    def test_approved_project_gets_schedule(self):
+        project = self.create_project()
+        installments = self.installments(project)
+
+        self.assertEqual([installment.number for installment in installments], [1, 2, 3, 4])
+        self.assertEqual([(installment.due_date, installment.amount) for installment in installments], self.expected_installments(project))
+        for installment in installments:
+            self.assertEqual((installment.enterprise_id, installment.unit_id), (self.enterprise.pk, self.unit.pk))
+            self.assertEqual((installment.status, installment.paid_at), ('PENDENTE', None))
+
+    def test_only_financed_projects_have_installments(self):
+        project = self.create_project(status='AN')
+        self.assertEqual(self.installments(project), [])
+
+        project.status = 'AP'
+        project.save()
+        self.assertEqual(len(self.installments(project)), 4)
+
+        project.status = 'AN'
+        project.save()
+        self.assertEqual(self.installments(project), [])
+
+        project = self.create_project(fees=None)
+        self.assertEqual(self.installments(project), [])
+
+        project = self.create_project(is_active=False)
+        self.assertEqual(self.installments(project), [])
+
+    def test_financing_change_regenerates(self):
+        project = self.create_project()
+        project.installments = 6
+        project.fees = Decimal('7.50')
+        project.unit = self.other_unit
+        project.save()
+
+        installments = self.installments(project)
+        self.assertEqual([(installment.due_date, installment.amount) for installment in installments], self.expected_installments(project))
+        self.assertEqual({installment.unit_id for installment in installments}, {self.other_unit.pk})
+
+    def test_received_value_does_not_pay_installments(self):
+        # Valor Recebido é a base de royalties/marketing, não pagamento do financiamento
+        project = self.create_project(approval_date=date(2025, 6, 1), received_value=Decimal('100000.00'))
+        self.assertTrue(all(installment.status == 'PENDENTE' for installment in self.installments(project)))
+
+        project.received_value = Decimal('250000.00')
+        project.save()
+        installments = self.installments(project)
+        self.assertTrue(all(installment.status == 'PENDENTE' and installment.paid_at is None for installment in installments))
+
+    def test_paid_installments_survive_regeneration(self):
+        project = self.create_project()
+        first = ProjectInstallment.objects.filter(project=project, number=1)
+        self.assertEqual(mark_installments_paid(first, paid_at=date(2026, 1, 5)), 1)
+        self.assertEqual(mark_installments_paid(first), 0)  # Já paga: a data não muda
+
+        project.fees = Decimal('6.00')
+        project.save()
+
+        installments = self.installments(project)
+        self.assertEqual([(installment.due_date, installment.amount) for installment in installments], self.expected_installments(project))
+        self.assertEqual((installments[0].status, installments[0].paid_at), ('PAGO', date(2026, 1, 5)))
+        self.assertTrue(all(installment.status == 'PENDENTE' for installment in installments[1:]))
+
+        self.assertEqual(mark_installments_pending(ProjectInstallment.objects.filter(project=project)), 1)
+        regenerate_project_installments([project.pk])
+        self.assertTrue(all(installment.status == 'PENDENTE' and installment.paid_at is None for installment in self.installments(project)))
+
+    def test_backfill_in_batches(self):
+        projects = [self.create_project(installments=count) for count in (1, 2, 3, 4, 5)]
+        projects.append(self.create_project(status='AC'))
+        ProjectInstallment.objects.all().delete()
+
+        progress = []
+        total_projects, total_installments = regenerate_all_installments(
+            Project.objects.all(), batch_size=2, on_progress=lambda done, saved: progress.append((done, saved))
+        )
+
+        self.assertEqual((total_projects, total_installments), (6, 15))
+        self.assertEqual(progress, [(2, 3), (4, 10), (6, 15)])
+        for project in projects:
+            self.assertEqual(len(self.installments(project)), project.installments if project.status == 'AP' else 0)
+
+    def test_generate_installments_command(self):
+        project = self.create_project()
+        ProjectInstallment.objects.all().delete()
+
+        call_command('generate_installments', '--batch-size', '10', '--enterprise', str(self.enterprise.pk), stdout=StringIO())
+        self.assertEqual(len(self.installments(project)), 4)
+
+
+class BulkTransitionTests(ProjectFixturesMixin, TestCase):
+    """Mudança de fase em lote: mesmas regras dos botões de fase de project_details_view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_custom_permissions()
+        cls.other_enterprise = Enterprise.objects.create(name='Outra Empresa', cnpj_or_cpf='00000000000200', subdomain='outra')
+
+    def setUp(self):
+        invalidate_catalog()
+        self.user = User.objects.create_user('gestor@teste.com', 'Gestor', password='x', enterprise=self.enterprise)
+        self.user.units.add(self.unit)
+
+    def grant(self, *codenames):
+        self.user.custom_permissions.add(*Permission.objects.filter(content_type__app_label='users', codename__in=codenames))
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def transition(self, *items):
+        return bulk_transition(self.user, [{'id': project.pk if isinstance(project, Project) else project, 'status': status} for project, status in items])
+
+    def status_of(self, project):
+        return Project.objects.values_list('status', flat=True).get(pk=project.pk)
+
+    def test_one_step_at_a_time(self):
+        project = self.create_project(status='AC')
+        skipped = self.create_project(status='AC')
+        same = self.create_project(status='PE')
+        invalid = self.create_project(status='PE')
+
+        results = self.transition((project, 'PE'), (skipped, 'AN'), (same, 'PE'), (invalid, 'XX'))
+
+        self.assertEqual(results[0], {'id': project.pk, 'ok': True, 'from': 'AC', 'to': 'PE'})
+        self.assertEqual(results[1]['error'], 'Transição não permitida: Em Acolhimento para Em Análise.')
+        self.assertEqual(results[2]['error'], 'Projeto já está nesta fase.')
+        self.assertEqual(results[3]['error'], 'Fase inválida.')
+        self.assertEqual(
+            [self.status_of(p) for p in (project, skipped, same, invalid)],
+            ['PE', 'AC', 'PE', 'PE'],
+        )
+
+        # Voltar uma fase também é um passo
+        self.assertTrue(self.transition((project, 'AC'))[0]['ok'])
+        self.assertEqual(self.status_of(project), 'AC')
+
+    def test_release_requires_permission_and_unit_or_designer(self):
+        own_unit = self.create_project(status='FM')
+        designed = self.create_project(status='FM', unit=self.other_unit, project_designer=self.user)
+        foreign = self.create_project(status='FM', unit=self.other_unit)
+
+        results = self.transition((own_unit, 'LB'))
+        self.assertEqual(results[0]['error'], 'Você não tem permissão para liberar projetos.')
+
+        self.grant('change_project_release')
+        results = self.transition((own_unit, 'LB'), (designed, 'LB'), (foreign, 'LB'))
+        self.assertTrue(results[0]['ok'])
+        self.assertTrue(results[1]['ok'])
+        self.assertEqual(results[2]['error'], 'Você só pode liberar projetos da sua unidade ou projetos que você é o projetista.')
+        self.assertEqual([self.status_of(p) for p in (own_unit, designed, foreign)], ['LB', 'LB', 'FM'])
+
+    def test_revenue_requires_permission(self):
+        project = self.create_project(status='LB')
+
+        results = self.transition((project, 'RC'))
+        self.assertEqual(results[0]['error'], 'Você não tem permissão para mover o projeto para a fase Receita.')
+
+        self.grant('change_project_to_revenue')
+        self.assertTrue(self.transition((project, 'RC'))[0]['ok'])
+
+        # Voltar de Receita não exige a permissão de avanço
+        self.user.custom_permissions.clear()
+        self.user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(self.transition((project, 'LB'))[0]['ok'])
+
+    def test_duplicate_unknown_and_invalid_ids(self):
+        project = self.create_project(status='AC')
+        other_enterprise_project = self.create_project(status='AC', enterprise=self.other_enterprise)
+
+        results = bulk_transition(self.user, [
+            {'id': project.pk, 'status': 'PE'},
+            {'id': project.pk, 'status': 'PE'},
+            {'id': 999999, 'status': 'PE'},
+            {'id': other_enterprise_project.pk, 'status': 'PE'},
+            {'id': str(project.pk), 'status': 'PE'},
+            {'id': True, 'status': 'PE'},
+            {'status': 'PE'},
+            'invalido',
+        ])
+
+        self.assertEqual(results[0]['ok'], True)
+        self.assertEqual(
+            [result.get('error') for result in results[1:]],
+            ['Projeto repetido no lote.', 'Projeto não encontrado.', 'Projeto não encontrado.']
+            + ['Informe o id do projeto.'] * 4,
+        )
+        self.assertEqual(self.status_of(project), 'PE')
+        self.assertEqual(self.status_of(other_enterprise_project), 'AC')
+
+    def test_lost_race_is_reported(self):
+        project = self.create_project(status='AC')
+        raced = self.create_project(status='AC')
+
+        class StaleRead:
+            """Leitura dos projetos seguida de outra operação mudando a fase de `raced` antes do UPDATE"""
+            def __init__(self, queryset):
+                self.queryset = queryset
+
+            def values(self, *fields):
+                rows = list(self.queryset.values(*fields))
+                Project.objects.filter(pk=raced.pk).update(status='AN')
+                return rows
+
+        with mock.patch.object(QuerySet, 'select_for_update', lambda queryset, **kwargs: StaleRead(queryset)):
+            results = self.transition((project, 'PE'), (raced, 'PE'))
+
+        self.assertTrue(results[0]['ok'])
+        self.assertEqual(results[1], {'id': raced.pk, 'ok': False, 'error': 'A fase do projeto foi alterada por outra operação.'})
+        self.assertEqual(self.status_of(raced), 'AN')
+        self.assertFalse(ProjectStatusTransition.objects.filter(project=raced).exists())
+
+    def test_history_transitions_and_installments(self):
+        entering = self.create_project(status='AN')
+        leaving = self.create_project(status='AP')
+        inside = self.create_project(status='AP')
+        self.assertEqual(ProjectInstallment.objects.filter(project=entering).count(), 0)
+        self.assertEqual(ProjectInstallment.objects.filter(project=leaving).count(), 4)
+
+        paid = ProjectInstallment.objects.filter(project=inside, number=1)
+        mark_installments_paid(paid, paid_at=date(2026, 3, 1))
+
+        results = self.transition((entering, 'AP'), (leaving, 'AN'), (inside, 'AF'))
+        self.assertTrue(all(result['ok'] for result in results))
+
+        self.assertEqual(ProjectInstallment.objects.filter(project=entering).count(), 4)
+        self.assertEqual(ProjectInstallment.objects.filter(project=leaving).count(), 0)
+        # Continua nas fases de financiamento: parcelas (e a baixa) intactas
+        self.assertEqual(paid.get().paid_at, date(2026, 3, 1))
 
-# Create your tests here.
+        transitions = ProjectStatusTransition.objects.filter(project__in=[entering, leaving, inside])
+        self.assertEqual(
+            sorted(transitions.values_list('project_id', 'from_status', 'to_status', 'changed_by_id', 'enterprise_id')),
+            sorted([
+                (entering.pk, 'AN', 'AP', self.user.pk, self.enterprise.pk),
+                (leaving.pk, 'AP', 'AN', self.user.pk, self.enterprise.pk),
+                (inside.pk, 'AP', 'AF', self.user.pk, self.enterprise.pk),
+            ]),
+        )
+        history = ProjectHistory.objects.filter(project=entering).latest('id').changes['status']
+        self.assertEqual((history['de'], history['para'], history['usuario']), ('Em Análise', 'Aprovados', 'Gestor'))
@@ -0,0 +1,170 @@
+"""
+Mudança de fase em lote (esteira de projetos)
+
+Mesmas regras dos botões "Próxima fase" / "Fase anterior" de
+project_details_view: um passo por vez na ordem de PROJECT_STATUS_CHOICES;
+Liberado (LB) exige change_project_release e que o projeto seja da unidade do
+usuário ou tenha o usuário como projetista; Receita (RC) exige
+change_project_to_revenue.
+
+Em vez de um save() por projeto (consulta do pre_save, INSERT do histórico,
+regeração de parcelas e invalidação dos gráficos a cada item), o lote:
+    - lê os projetos pedidos numa consulta, travados até o fim da transação;
+    - aplica um UPDATE ... WHERE id IN (...) AND status = <anterior> por par (de, para);
+    - grava histórico e transições (ProjectStatusTransition) com bulk_create;
+    - regera numa chamada as parcelas dos projetos que entram ou saem das
+      fases de financiamento e invalida os gráficos uma vez por empresa.
+Cada item recebe o seu resultado: aplicado ou o motivo da recusa.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from reports.charts import bump_data_version
+from .installments import regenerate_project_installments
+from .models import FINANCED_STATUSES, PROJECT_STATUS_CHOICES, Project, ProjectHistory, ProjectStatusTransition
+from .signals import get_user_display_name
+
+
+MAX_TRANSITIONS = 500
+
+STATUS_ORDER = {status: index for index, (status, _) in enumerate(PROJECT_STATUS_CHOICES)}
+STATUS_LABELS = dict(PROJECT_STATUS_CHOICES)
+RELEASE_STATUS = 'LB'
+REVENUE_STATUS = PROJECT_STATUS_CHOICES[-1][0]
+
+_PROJECT_COLUMNS = ('pk', 'status', 'unit_id', 'enterprise_id', 'project_designer_id')
+
+
+def allowed_targets(status):
+    """Fases para onde um projeto em `status` pode ir (a anterior e a próxima)"""
+    index = STATUS_ORDER[status]
+    return [code for code, position in STATUS_ORDER.items() if abs(position - index) == 1]
+
+
+def transition_error(user, project, to_status, user_unit_ids):
+    """Motivo da recusa da transição (None se permitida); `project` é um dict com _PROJECT_COLUMNS"""
+    from_status = project['status']
+    if to_status not in STATUS_ORDER:
+        return 'Fase inválida.'
+    if from_status == to_status:
+        return 'Projeto já está nesta fase.'
+    if to_status not in allowed_targets(from_status):
+        return f'Transição não permitida: {STATUS_LABELS[from_status]} para {STATUS_LABELS[to_status]}.'
+
+    if STATUS_ORDER[to_status] > STATUS_ORDER[from_status]:
+        if to_status == RELEASE_STATUS:
+            if not user.has_perm('users.change_project_release'):
+                return 'Você não tem permissão para liberar projetos.'
+            if project['project_designer_id'] != user.pk and project['unit_id'] not in user_unit_ids():
+                return 'Você só pode liberar projetos da sua unidade ou projetos que você é o projetista.'
+        elif to_status == REVENUE_STATUS and not user.has_perm('users.change_project_to_revenue'):
+            return 'Você não tem permissão para mover o projeto para a fase Receita.'
+    return None
+
+
+def bulk_transition(user, items, queryset=None):
+    """
+    Aplica as mudanças de fase de `items` ([{'id': <projeto>, 'status': <fase de destino>}, ...])
+    queryset: projetos visíveis ao usuário; ids fora dele são "não encontrados"
+    Retorna os resultados na ordem dos itens:
+        {'id', 'ok': True, 'from', 'to'} ou {'id', 'ok': False, 'error'}
+    """
+    if queryset is None:
+        queryset = Project.objects.filter(enterprise_id=user.enterprise_id)
+
+    results = []
+    requested = {}
+    for item in items:
+        pk = item.get('id') if isinstance(item, dict) else None
+        result = {'id': pk, 'ok': False}
+        results.append(result)
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            result['error'] = 'Informe o id do projeto.'
+        elif pk in requested:
+            result['error'] = 'Projeto repetido no lote.'
+        else:
+            requested[pk] = (result, item.get('status'))
+
+    unit_ids = None
+
+    def user_unit_ids():
+        nonlocal unit_ids
+        if unit_ids is None:
+            unit_ids = set(user.units.values_list('id', flat=True))
+        return unit_ids
+
+    with transaction.atomic():
+        projects = {
+            row['pk']: row
+            for row in queryset.filter(pk__in=requested).select_for_update().values(*_PROJECT_COLUMNS)
+        }
+
+        # Agrupa por (de, para): um UPDATE por par
+        groups = {}
+        for pk, (result, to_status) in requested.items():
+            project = projects.get(pk)
+            error = 'Projeto não encontrado.' if project is None else transition_error(user, project, to_status, user_unit_ids)
+            if error:
+                result['error'] = error
+                continue
+            groups.setdefault((project['status'], to_status), []).append(pk)
+
+        now = timezone.now()
+        applied = []
+        for (from_status, to_status), pks in groups.items():
+            updated = Project.objects.filter(pk__in=pks, status=from_status).update(status=to_status, updated_at=now)
+            if updated != len(pks):
+                # Sem a trava (ex.: SQLite) outra operação pode ter mudado a fase entre a leitura e o UPDATE
+                changed = set(Project.objects.filter(pk__in=pks, status=to_status, updated_at=now).values_list('pk', flat=True))
+                for pk in set(pks) - changed:
+                    requested[pk][0]['error'] = 'A fase do projeto foi alterada por outra operação.'
+                pks = [pk for pk in pks if pk in changed]
+            for pk in pks:
+                requested[pk][0].update({'ok': True, 'from': from_status, 'to': to_status})
+                applied.append((projects[pk], from_status, to_status))
+
+        if applied:
+            _record(user, applied, now)
+
+    return results
+
+
+def _record(user, applied, now):
+    """Histórico, transições, parcelas e versão dos gráficos do lote aplicado"""
+    user_name = get_user_display_name(user)
+    changed_at = now.strftime('%d/%m/%Y %H:%M:%S')
+
+    ProjectHistory.objects.bulk_create([
+        ProjectHistory(project_id=project['pk'], changes={
+            'status': {
+                'usuario': user_name,
+                'campo': 'Status',
+                'de': STATUS_LABELS[from_status],
+                'para': STATUS_LABELS[to_status],
+                'data': changed_at,
+            }
+        })
+        for project, from_status, to_status in applied
+    ])
+    ProjectStatusTransition.objects.bulk_create([
+        ProjectStatusTransition(
+            project_id=project['pk'],
+            enterprise_id=project['enterprise_id'],
+            from_status=from_status,
+            to_status=to_status,
+            changed_by=user,
+        )
+        for project, from_status, to_status in applied
+    ])
+
+    # Só quem entra ou sai das fases de financiamento muda de parcelas
+    financed = set(FINANCED_STATUSES)
+    outdated = [
+        project['pk'] for project, from_status, to_status in applied
+        if (from_status in financed) != (to_status in financed)
+    ]
+    if outdated:
+        regenerate_project_installments(outdated)
+
+    for enterprise_id in {project['enterprise_id'] for project, _, _ in applied}:
+        bump_data_version(enterprise_id)
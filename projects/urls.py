@@ -6,6 +6,7 @@ urlpatterns = [
     path('projects-list/', views.projects_list_view, name='projects_list'),
     path('project-details/<int:project_id>/', views.project_details_view, name='project_details'),
     path('create-project/', views.create_project_view, name='create_project'),
+    path('document/<int:document_id>/download/', views.project_document_download_view, name='project_document_download'),
 
     # Esteira de projetos e pagamentos
     path('conveyor/', views.conveyor_projects_view, name='conveyor_projects'),
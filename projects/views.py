@@ -1,5 +1,7 @@
 from datetime import date
 from decimal import Decimal
+from django.conf import settings
+from django.db.models import Max
 from django.contrib import messages
 from django.shortcuts import render
 from enterprises.models import Client
@@ -7,6 +9,10 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from .models import Project, Enterprise, User, CreditLine, Bank, ProjectDocument, ProjectHistory, PROJECT_STATUS_CHOICES, ACTIVITY_CHOICES, SIZE_CHOICES, TYPE_CHOICES
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from core.pagination import CursorPage
+from core.streaming import stream_field_file
 from core.mixins import get_selected_unit_from_request, is_all_units_selected_from_request, get_accessible_units_from_request
 
 # Cria um novo projeto
@@ -634,7 +640,7 @@ def conveyor_payments_view(request):
     # Filtrar projetos que estão em LB (Liberado)
     projects = Project.objects.filter(
         status='LB',
-    )
+    ).select_related('client', 'unit', 'credit_line')  # Colunas do cartão sem consulta por linha
     
     # Aplicar filtro de unidade baseado na sessão
     if is_all_units_selected:
@@ -711,7 +717,7 @@ def conveyor_confirm_payments_view(request):
     projects = Project.objects.filter(
         status='RC',
         project_finalized=False
-    ).order_by('-id')  # Ordenar por data de criação
+    ).select_related('client', 'unit', 'credit_line').order_by('-id')  # Ordenar por data de criação
     
     # Aplicar filtro de unidade baseado na sessão
     if is_all_units_selected:
@@ -811,7 +817,7 @@ def conveyor_projects_view(request):
     projects = Project.objects.filter(
         status='AC',
         project_designer__isnull=True
-    )
+    ).select_related('client', 'unit', 'credit_line')  # Colunas do cartão sem consulta por linha
     
     # Aplicar filtro de unidade baseado na sessão
     if is_all_units_selected:
@@ -1160,8 +1166,15 @@ def project_details_view(request, project_id):
     ).first()
     credit_lines = CreditLine.objects.filter(enterprise=project.enterprise)
     banks = Bank.objects.filter(enterprise=project.enterprise)
+    # Documentos e histórico são consultados só quando o fragmento não está em cache
     project_documents = ProjectDocument.objects.filter(project=project)
-    project_history = ProjectHistory.objects.filter(project=project).order_by('-timestamp')
+    history_page = CursorPage(
+        ProjectHistory.objects.filter(project=project),
+        cursor=request.GET.get('history_before'),
+        page_size=settings.HISTORY_PAGE_SIZE,
+    )
+    # Versão dos fragmentos: todo documento adicionado/removido também gera um registro de histórico
+    history_version = ProjectHistory.objects.filter(project=project).aggregate(last=Max('id'))['last'] or 0
 
     # Calcular valores de royalties e marketing se o projeto tem valor recebido
     royalties_value = None
@@ -1186,8 +1199,40 @@ def project_details_view(request, project_id):
         'size_choices': SIZE_CHOICES,
         'activity_choices': ACTIVITY_CHOICES,
         'project_documents': project_documents,
-        'project_history': project_history,
+        'history_page': history_page,
+        'history_version': history_version,
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'document_cache_timeout': settings.DOCUMENT_FRAGMENT_CACHE_TIMEOUT,
         'royalties_value': royalties_value,
         'marketing_value': marketing_value,
         'total_to_receive': total_to_receive,
-    })
\ No newline at end of file
+    })
+
+
+def _get_accessible_document(user, document_id):
+    """Documento do projeto se o usuário pode ver o projeto (mesmas regras de project_details_view)"""
+    if not user.has_perm('users.view_projects'):
+        return None
+    document = ProjectDocument.objects.select_related('project').filter(
+        id=document_id, project__enterprise_id=user.enterprise_id
+    ).first()
+    if document is None:
+        return None
+    if user.has_perm('users.view_own_projects') and not user.has_perm('users.view_unit_projects'):
+        if document.project.project_designer_id != user.id:
+            return None
+    return document
+
+
+@login_required
+async def project_document_download_view(request, document_id):
+    """
+    Download de documento do projeto servido pela aplicação (view async, ver core/streaming.py)
+    O acesso é conferido a cada download e o link, ao contrário da URL assinada do S3, não expira
+    """
+    user = await request.auser()
+    document = await sync_to_async(_get_accessible_document)(user, document_id)
+    if document is None:
+        raise Http404("Documento não encontrado")
+    return stream_field_file(request, document.file, document.file_name, document.file_type, document.file_size)
+
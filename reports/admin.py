@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ReportCache, ReportSettings, ScheduledReport
+from .models import ReportCache, ReportSettings, ScheduledReport, ReportExport
 
 
 @admin.register(ReportCache)
@@ -42,3 +42,11 @@ class ScheduledReportAdmin(admin.ModelAdmin):
     list_filter = ['frequency', 'is_active', 'report_type']
     search_fields = ['user__name', 'user__email', 'report_type']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ['report_type', 'enterprise', 'requested_by', 'status', 'created_at', 'finished_at']
+    list_filter = ['status', 'report_type', 'enterprise']
+    search_fields = ['report_type', 'requested_by__name', 'requested_by__email']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'error']
@@ -0,0 +1,300 @@
+"""
+Dados dos gráficos (dashboard inicial e relatórios) em JSON colunar
+
+As mesmas séries montadas por home.views.home e pelas páginas de relatório,
+servidas pelas APIs /reports/api/*. Cada série vem em colunas
+({'label': [...], 'count': [...], 'value': [...]}), sem repetir as chaves
+por linha.
+
+ETags fortes: cada empresa tem um número de versão dos dados no cache
+(DATA_VERSION_KEY), incrementado pelos signals de Project, Client, Unit,
+Bank, CreditLine e dos vínculos com unidades (reports/signals.py) e pelas
+gravações em lote (importação de clientes). A ETag combina a versão com o
+escopo do usuário (permissões, cargos, unidade selecionada, parâmetros e
+data), então conferir If-None-Match não consulta o banco; com os dados
+inalterados a atualização automática dos gráficos recebe 304.
+"""
+import hashlib
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from core.mixins import (
+    get_accessible_units_from_request,
+    get_selected_unit_from_request,
+    is_all_units_selected_from_request,
+)
+from enterprises.models import Client, CLIENT_STATUS_CHOICES
+from projects.models import Bank, Project, PROJECT_STATUS_CHOICES
+from units.models import Unit
+from .queries import related_count, related_sum
+from .utils import (
+    get_user_accessible_clients,
+    get_user_accessible_projects,
+    get_user_accessible_units,
+    repurchase_clients_subquery,
+)
+
+
+DATA_VERSION_KEY = 'reports:data:version:{enterprise_id}'
+
+APPROVED_STATUSES = ['AP', 'AF', 'FM', 'LB', 'RC']
+IN_PROGRESS_STATUSES = ['AC', 'PE', 'AN', 'AP', 'AF', 'FM', 'LB']  # Não inclui 'RC' (finalizado)
+MONTH_NAMES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+# ==================== VERSÃO DOS DADOS / ETAG ====================
+
+def get_data_version(enterprise_id):
+    key = DATA_VERSION_KEY.format(enterprise_id=enterprise_id)
+    version = cache.get(key)
+    if version is None:
+        # Começa do relógio: se a chave sair do cache, a versão nova não repete uma ETag antiga
+        version = int(time.time() * 1000)
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def _bump(enterprise_id):
+    key = DATA_VERSION_KEY.format(enterprise_id=enterprise_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def bump_data_version(enterprise_id):
+    """Invalida as ETags dos gráficos da empresa (após o commit, como o catálogo de permissões)"""
+    if enterprise_id:
+        transaction.on_commit(lambda: _bump(enterprise_id))
+
+
+def chart_etag(request, name, params=()):
+    """
+    ETag forte do gráfico `name` para o usuário da requisição
+    Além da sessão, só lê a versão dos dados no cache (com DatabaseCache, uma consulta à tabela django_cache)
+    """
+    user = request.user
+    parts = [
+        name,
+        user.enterprise_id,
+        get_data_version(user.enterprise_id),
+        user.pk,
+        format(user.permission_mask, 'x'),
+        format(user.role_mask, 'x'),
+        request.session.get('selected_unit_id'),
+        timezone.localdate().isoformat(),
+        *params,
+    ]
+    return '"%s"' % hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+# ==================== AUXILIARES ====================
+
+def _number(value):
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(round(value, 2))
+    return value
+
+
+def _columns(rows, columns):
+    """Linhas (dicts) em colunas: {'coluna': [valor da linha 1, valor da linha 2, ...]}"""
+    rows = list(rows)
+    return {
+        name: [_number(source(row) if callable(source) else row[source]) for row in rows]
+        for name, source in columns.items()
+    }
+
+
+def _period_start(period_days):
+    return timezone.now().date() - timedelta(days=period_days)
+
+
+# ==================== DASHBOARD INICIAL (home.views.home) ====================
+
+def dashboard_scope(request):
+    """
+    Projetos e clientes ativos do dashboard inicial conforme a unidade selecionada na sessão
+    Retorna (projetos, clientes)
+    """
+    user = request.user
+    enterprise = user.enterprise
+    can_view_all_units = user.has_perm('users.view_all_units')
+    selected_unit = None if is_all_units_selected_from_request(request) else get_selected_unit_from_request(request)
+
+    projects = Project.objects.filter(enterprise=enterprise, is_active=True)
+    clients = Client.objects.filter(enterprise=enterprise, status='ATIVO', is_active=True)
+
+    if selected_unit:
+        # Unidade específica: precisa ter acesso a ela
+        if can_view_all_units or user.units.filter(id=selected_unit.id).exists():
+            projects = projects.filter(unit=selected_unit)
+        else:
+            projects = projects.none()
+        clients = clients.filter(units=selected_unit)
+    elif not can_view_all_units:
+        # "Todas as unidades" (ou nenhuma selecionada) sem view_all_units: unidades vinculadas ao usuário
+        user_units = user.units.all()
+        projects = projects.filter(unit__in=user_units) if user_units.exists() else projects.none()
+        clients = clients.filter(units__in=user_units).distinct()
+
+    return projects, clients
+
+
+def units_monthly_series(projects, today=None):
+    """Valor dos projetos por unidade nos últimos 6 meses (gráfico de barras do dashboard)"""
+    today = today or timezone.now().date()
+    rows = projects.filter(
+        created_at__date__gte=today - timedelta(days=180)
+    ).annotate(
+        year=ExtractYear('created_at'),
+        month=ExtractMonth('created_at')
+    ).values('unit__name', 'year', 'month').annotate(
+        total_value=Sum('value')
+    ).order_by('unit__name', 'year', 'month')
+
+    values = {}
+    months = set()
+    for row in rows:
+        month = (row['year'], row['month'])
+        months.add(month)
+        values.setdefault(row['unit__name'], {})[month] = float(row['total_value'] or 0)
+
+    months = sorted(months)
+    return {
+        'labels': [f"{MONTH_NAMES[month - 1]} {year}" for year, month in months],
+        'series': [
+            {'name': unit_name, 'data': [monthly.get(month, 0) for month in months]}
+            for unit_name, monthly in values.items()
+        ],
+    }
+
+
+def top_counts(projects, field, limit=5):
+    """Quantidade de projetos pelos `limit` maiores valores de `field` (gráficos donut do dashboard)"""
+    rows = projects.values(field).annotate(project_count=Count('id')).order_by('-project_count')[:limit]
+    rows = [row for row in rows if row[field]]
+    return _columns(rows, {'labels': field, 'values': 'project_count'})
+
+
+def dashboard_data(request):
+    projects, clients = dashboard_scope(request)
+    return {
+        'kpis': {
+            'total_value': _number(projects.aggregate(total=Coalesce(Sum('value'), Decimal('0')))['total']),
+            'projects_in_progress': projects.filter(status__in=IN_PROGRESS_STATUSES).count(),
+            'units': get_accessible_units_from_request(request).count(),
+            'active_clients': clients.count(),
+        },
+        'units_monthly': units_monthly_series(projects),
+        'credit_lines': top_counts(projects, 'credit_line__name'),
+        'banks': top_counts(projects, 'bank__name'),
+    }
+
+
+# ==================== RELATÓRIOS ====================
+
+def operations_data(user, period_days=365, unit_id=None, bank_id=None):
+    """Séries de reports.views.operations_performance_view"""
+    projects = get_user_accessible_projects(user, Project.objects.filter(
+        enterprise_id=user.enterprise_id,
+        created_at__date__gte=_period_start(period_days),
+        is_active=True
+    ))
+    if unit_id:
+        projects = projects.filter(unit_id=unit_id)
+    if bank_id:
+        projects = projects.filter(bank_id=bank_id)
+
+    status_names = dict(PROJECT_STATUS_CHOICES)
+    metrics = {'count': 'count', 'value': 'total_value'}
+    return {
+        'status': _columns(
+            projects.values('status').annotate(count=Count('id'), total_value=Sum('value')).order_by('status'),
+            {'code': 'status', 'label': lambda row: status_names.get(row['status'], row['status']), **metrics},
+        ),
+        'credit_lines': _columns(
+            projects.values('credit_line__name', 'credit_line__type_credit').annotate(
+                count=Count('id'), total_value=Sum('value')
+            ).order_by('-count'),
+            {'label': 'credit_line__name', 'type': 'credit_line__type_credit', **metrics},
+        ),
+        'banks': _columns(
+            projects.values('bank__name').annotate(count=Count('id'), total_value=Sum('value')).order_by('-count'),
+            {'label': 'bank__name', **metrics},
+        ),
+    }
+
+
+def clients_data(user):
+    """Séries de reports.views.clients_indicators_view"""
+    clients = get_user_accessible_clients(user, Client.objects.filter(enterprise_id=user.enterprise_id, is_active=True))
+    status_names = dict(CLIENT_STATUS_CHOICES)
+
+    total_active = clients.filter(status='ATIVO').count()
+    repurchase = clients.annotate(project_count=Count('projects')).filter(project_count__gt=1).count()
+
+    units = get_user_accessible_units(user).annotate(
+        total_clients=Count('clients'),
+        active_clients=Count('clients', filter=Q(clients__status='ATIVO')),
+        repurchase_clients=repurchase_clients_subquery(user.enterprise),
+    ).values('name', 'total_clients', 'active_clients', 'repurchase_clients')
+
+    return {
+        'total_active': total_active,
+        'repurchase_rate': round(repurchase / total_active * 100, 1) if total_active else 0,
+        'status': _columns(
+            clients.values('status').annotate(count=Count('id')).order_by('status'),
+            {'code': 'status', 'label': lambda row: status_names.get(row['status'], row['status']), 'count': 'count'},
+        ),
+        'units': _columns(units, {
+            'label': 'name',
+            'total': 'total_clients',
+            'active': 'active_clients',
+            'repurchase': 'repurchase_clients',
+        }),
+    }
+
+
+def performance_data(user):
+    """Séries de reports.views.performance_unidades_view e performance_bancos_view"""
+    ClientUnit = Client.units.through
+    units = Unit.objects.filter(enterprise_id=user.enterprise_id, is_active=True).annotate(
+        total_projects=related_count(Project.objects.all(), 'unit'),
+        approved_projects=related_count(Project.objects.filter(status__in=APPROVED_STATUSES), 'unit'),
+        total_value=related_sum(Project.objects.all(), 'unit', 'value'),
+        active_clients=related_count(ClientUnit.objects.filter(client__status='ATIVO'), 'unit')
+    ).order_by('-total_projects').values('name', 'total_projects', 'approved_projects', 'total_value', 'active_clients')
+
+    banks = Bank.objects.filter(enterprise_id=user.enterprise_id, is_active=True).annotate(
+        total_projects=Count('projects'),
+        approved_projects=Count('projects', filter=Q(projects__status__in=APPROVED_STATUSES)),
+        total_value=Sum('projects__value'),
+        avg_ticket=Avg('projects__value')
+    ).order_by('-total_projects').values('name', 'total_projects', 'approved_projects', 'total_value', 'avg_ticket')
+
+    return {
+        'units': _columns(units, {
+            'label': 'name',
+            'projects': 'total_projects',
+            'approved': 'approved_projects',
+            'value': 'total_value',
+            'active_clients': 'active_clients',
+        }),
+        'banks': _columns(banks, {
+            'label': 'name',
+            'projects': 'total_projects',
+            'approved': 'approved_projects',
+            'value': 'total_value',
+            'avg_ticket': 'avg_ticket',
+        }),
+    }
@@ -0,0 +1,48 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.scheduler import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Gera e envia por email os relatórios agendados que estão vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Agendamentos processados por lote')
+        parser.add_argument('--loop', action='store_true', help='Mantém o scheduler rodando (modo daemon)')
+        parser.add_argument('--interval', type=int, default=60, help='Segundos entre verificações no modo --loop')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while self.running:
+            close_old_connections()
+
+            # Processa lotes até não haver mais agendamentos vencidos
+            while self.running:
+                started = time.monotonic()
+                stats = process_batch(options['batch_size'])
+                if not stats['claimed']:
+                    break
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"📊 {stats['claimed']} agendamento(s) | {stats['groups']} relatório(s) gerado(s) | "
+                    f"✅ {stats['sent']} enviado(s) | ⏭️  {stats['skipped']} ignorado(s) | "
+                    f"❌ {stats['failed']} com erro | {elapsed:.1f}s"
+                )
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS("✅ Relatórios agendados processados"))
+
+    def stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING("⏹️  Encerrando após o lote atual..."))
+        self.running = False
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:28
+
+import django.db.models.deletion
+import reports.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprises', '0003_remove_email_unique_and_fix_activity'),
+        ('reports', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(max_length=50, verbose_name='Tipo de Relatório')),
+                ('export_format', models.CharField(default='pdf', max_length=10, verbose_name='Formato')),
+                ('period_days', models.IntegerField(default=365, verbose_name='Período (dias)')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Gerando'), ('done', 'Concluído'), ('error', 'Erro')], default='pending', max_length=10, verbose_name='Status')),
+                ('file', models.FileField(blank=True, null=True, upload_to=reports.models.report_export_upload_path, verbose_name='Arquivo')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('enterprise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_exports', to='enterprises.enterprise', verbose_name='Empresa')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_exports', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Exportação de Relatório',
+                'verbose_name_plural': 'Exportações de Relatórios',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['requested_by', '-created_at'], name='reports_rep_request_d355fa_idx')],
+            },
+        ),
+    ]
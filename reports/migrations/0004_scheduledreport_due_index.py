@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportexport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledreport',
+            index=models.Index(fields=['is_active', 'next_run'], name='scheduled_report_due_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_scheduledreport_due_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledreport',
+            name='failed_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas com Erro'),
+        ),
+        migrations.AddField(
+            model_name='scheduledreport',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Nova Tentativa'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledreport',
+            index=models.Index(fields=['is_active', 'retry_at'], name='scheduled_report_retry_idx'),
+        ),
+    ]
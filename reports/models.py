@@ -70,6 +70,9 @@ class ScheduledReport(models.Model):
         verbose_name="Frequência"
     )
     next_run = models.DateTimeField(verbose_name="Próxima Execução")
+    # Nova tentativa após falha na geração/envio; não altera o horário do agendamento (next_run)
+    retry_at = models.DateTimeField(blank=True, null=True, verbose_name="Nova Tentativa")
+    failed_attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas com Erro")
     is_active = models.BooleanField(default=True, verbose_name="Ativo")
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -78,3 +81,51 @@ class ScheduledReport(models.Model):
     class Meta:
         verbose_name = "Relatório Agendado"
         verbose_name_plural = "Relatórios Agendados"
+        indexes = [
+            # Busca dos agendamentos vencidos pelo scheduler
+            models.Index(fields=['is_active', 'next_run'], name='scheduled_report_due_idx'),
+            # Novas tentativas pendentes
+            models.Index(fields=['is_active', 'retry_at'], name='scheduled_report_retry_idx'),
+        ]
+
+
+def report_export_upload_path(instance, filename):
+    return f"reports/exports/{instance.enterprise_id}/{filename}"
+
+
+class ReportExport(models.Model):
+    """Arquivos de relatório gerados em segundo plano"""
+    STATUS_CHOICES = [
+        ('pending', 'Na fila'),
+        ('running', 'Gerando'),
+        ('done', 'Concluído'),
+        ('error', 'Erro'),
+    ]
+
+    enterprise = models.ForeignKey(Enterprise, on_delete=models.CASCADE, related_name='report_exports', verbose_name="Empresa")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_exports', verbose_name="Solicitado por")
+    report_type = models.CharField(max_length=50, verbose_name="Tipo de Relatório")
+    export_format = models.CharField(max_length=10, default='pdf', verbose_name="Formato")
+    period_days = models.IntegerField(default=365, verbose_name="Período (dias)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    file = models.FileField(upload_to=report_export_upload_path, null=True, blank=True, verbose_name="Arquivo")
+    error = models.TextField(blank=True, verbose_name="Erro")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+
+    class Meta:
+        verbose_name = "Exportação de Relatório"
+        verbose_name_plural = "Exportações de Relatórios"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} ({self.get_status_display()}) - {self.created_at:%d/%m/%Y %H:%M}"
+
+    @property
+    def is_ready(self):
+        return self.status == 'done' and bool(self.file)
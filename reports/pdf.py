@@ -0,0 +1,499 @@
+"""
+Geração de relatórios em PDF com reportlab (platypus)
+
+Estilos, fontes e identidade visual da empresa ficam em cache por processo
+(worker), e os dados são lidos do banco em streaming com .iterator() para
+que relatórios grandes não carreguem todas as linhas em memória.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+from io import BytesIO
+import threading
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.db_router import replica_reads
+from projects.models import Project, PROJECT_STATUS_CHOICES
+from enterprises.models import Client, CLIENT_STATUS_CHOICES
+from units.models import Unit, Transaction
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+APPROVED_STATUSES = ['AP', 'AF', 'FM', 'LB', 'RC']
+STATUS_MAP = dict(PROJECT_STATUS_CHOICES)
+CLIENT_STATUS_MAP = dict(CLIENT_STATUS_CHOICES)
+
+# Quantidade de linhas por tabela: tabelas menores quebram entre páginas muito mais rápido
+TABLE_CHUNK_SIZE = 250
+
+# Tamanho do lote lido do banco em streaming
+QUERY_CHUNK_SIZE = 2000
+
+# Limite de empresas mantidas no cache de identidade visual por worker
+BRANDING_CACHE_SIZE = 64
+
+_branding_cache = {}
+_branding_lock = threading.Lock()
+
+
+# ==================== FONTES, ESTILOS E IDENTIDADE VISUAL ====================
+
+@lru_cache(maxsize=1)
+def get_font_names():
+    """
+    Registra as fontes do relatório uma única vez por worker.
+    Usa REPORTS_PDF_FONT / REPORTS_PDF_FONT_BOLD (arquivos .ttf) se configurados,
+    senão usa Helvetica embutida no reportlab.
+    """
+    regular_path = getattr(settings, 'REPORTS_PDF_FONT', None)
+    bold_path = getattr(settings, 'REPORTS_PDF_FONT_BOLD', None)
+
+    if regular_path and bold_path:
+        try:
+            pdfmetrics.registerFont(TTFont('NexiunRegular', regular_path))
+            pdfmetrics.registerFont(TTFont('NexiunBold', bold_path))
+            return 'NexiunRegular', 'NexiunBold'
+        except Exception:
+            # Fonte inválida ou inexistente - segue com a fonte padrão
+            pass
+
+    return 'Helvetica', 'Helvetica-Bold'
+
+
+@lru_cache(maxsize=1)
+def get_base_styles():
+    """Monta a folha de estilos base uma única vez por worker"""
+    regular, bold = get_font_names()
+    sample = getSampleStyleSheet()
+
+    return {
+        'title': ParagraphStyle('NexiunTitle', parent=sample['Title'], fontName=bold, fontSize=16, leading=20, spaceAfter=6),
+        'subtitle': ParagraphStyle('NexiunSubtitle', parent=sample['Normal'], fontName=regular, fontSize=9, textColor=colors.grey, spaceAfter=12),
+        'heading': ParagraphStyle('NexiunHeading', parent=sample['Heading2'], fontName=bold, fontSize=12, leading=15, spaceBefore=10, spaceAfter=6),
+        'body': ParagraphStyle('NexiunBody', parent=sample['Normal'], fontName=regular, fontSize=9, leading=11),
+        'cell': ParagraphStyle('NexiunCell', parent=sample['Normal'], fontName=regular, fontSize=8, leading=10),
+        'cell_right': ParagraphStyle('NexiunCellRight', parent=sample['Normal'], fontName=regular, fontSize=8, leading=10, alignment=TA_RIGHT),
+        'fonts': (regular, bold),
+    }
+
+
+def _hex_color(value, fallback):
+    try:
+        return colors.HexColor(value)
+    except Exception:
+        return colors.HexColor(fallback)
+
+
+def _load_logo(enterprise):
+    """Carrega o logo claro da empresa (apenas imagens raster; SVG não é suportado pelo reportlab)"""
+    logo = enterprise.logo_light
+    if not logo or str(logo).lower().endswith('.svg'):
+        return None
+
+    try:
+        with logo.open('rb') as logo_file:
+            return ImageReader(BytesIO(logo_file.read()))
+    except Exception:
+        return None
+
+
+def get_enterprise_branding(enterprise):
+    """
+    Retorna cores e logo da empresa para o relatório.
+    O cache é por worker e chaveado por (id, updated_at), então qualquer alteração
+    nas configurações da empresa gera uma nova entrada automaticamente.
+    """
+    cache_key = (enterprise.pk, enterprise.updated_at)
+
+    with _branding_lock:
+        branding = _branding_cache.get(cache_key)
+    if branding is not None:
+        return branding
+
+    branding = {
+        'name': enterprise.name,
+        'primary': _hex_color(enterprise.primary_color, '#05677D'),
+        'secondary': _hex_color(enterprise.secondary_color, '#FFB845'),
+        'text': _hex_color(enterprise.text_icons_color, '#FFFFFF'),
+        'logo': _load_logo(enterprise),
+    }
+
+    with _branding_lock:
+        # Remove versões antigas da mesma empresa e limita o tamanho do cache
+        for key in [key for key in _branding_cache if key[0] == enterprise.pk]:
+            del _branding_cache[key]
+        if len(_branding_cache) >= BRANDING_CACHE_SIZE:
+            _branding_cache.pop(next(iter(_branding_cache)))
+        _branding_cache[cache_key] = branding
+
+    return branding
+
+
+# ==================== FORMATAÇÃO ====================
+
+def format_currency(value):
+    """Formata valores no padrão brasileiro (R$ 1.234,56)"""
+    value = Decimal(value or 0)
+    formatted = f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    return f"R$ {formatted}"
+
+
+def format_date(value):
+    return value.strftime('%d/%m/%Y') if value else '-'
+
+
+# ==================== FLOWABLES ====================
+
+def _table_style(branding, fonts):
+    regular, bold = fonts
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), branding['primary']),
+        ('TEXTCOLOR', (0, 0), (-1, 0), branding['text']),
+        ('FONTNAME', (0, 0), (-1, 0), bold),
+        ('FONTNAME', (0, 1), (-1, -1), regular),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F4F6F8')]),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#D0D5DB')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ])
+
+
+def table_flowables(headers, rows, branding, col_widths=None):
+    """
+    Converte um iterável de linhas em tabelas do platypus.
+    As linhas são consumidas em blocos de TABLE_CHUNK_SIZE para manter o
+    custo de layout linear, mesmo em relatórios com centenas de páginas.
+    """
+    styles = get_base_styles()
+    table_style = _table_style(branding, styles['fonts'])
+
+    chunk = []
+    emitted = False
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= TABLE_CHUNK_SIZE:
+            yield Table([headers] + chunk, colWidths=col_widths, repeatRows=1, style=table_style)
+            chunk = []
+            emitted = True
+
+    if chunk or not emitted:
+        if not chunk:
+            chunk = [['Nenhum registro encontrado'] + [''] * (len(headers) - 1)]
+        yield Table([headers] + chunk, colWidths=col_widths, repeatRows=1, style=table_style)
+
+
+def summary_flowables(items, branding):
+    """Bloco de indicadores (rótulo/valor) exibido no topo dos relatórios"""
+    styles = get_base_styles()
+    rows = [[Paragraph(label, styles['body']), Paragraph(str(value), styles['body'])] for label, value in items]
+    table = Table(rows, colWidths=[9 * cm, 8 * cm])
+    table.setStyle(TableStyle([
+        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#D0D5DB')),
+        ('TEXTCOLOR', (0, 0), (0, -1), branding['primary']),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]))
+    yield table
+
+
+# ==================== CONSULTAS BASE ====================
+
+def _base_projects(enterprise, user=None):
+    projects = Project.objects.filter(enterprise=enterprise, is_active=True)
+    if user is not None:
+        from .utils import get_user_accessible_projects
+        projects = get_user_accessible_projects(user, projects)
+    return projects
+
+
+def _base_clients(enterprise, user=None):
+    clients = Client.objects.filter(enterprise=enterprise, is_active=True)
+    if user is not None:
+        from .utils import get_user_accessible_clients
+        # Subquery evita linhas duplicadas (cliente em várias unidades) nas agregações
+        clients = clients.filter(pk__in=get_user_accessible_clients(user, clients).values('pk'))
+    return clients
+
+
+def _base_units(enterprise, user=None):
+    if user is not None:
+        from .utils import get_user_accessible_units
+        return get_user_accessible_units(user)
+    return Unit.objects.filter(enterprise=enterprise, is_active=True)
+
+
+# ==================== RELATÓRIOS ====================
+
+def build_dashboard(enterprise, branding, user=None, period_days=365):
+    """Visão geral: indicadores principais, status, bancos e unidades"""
+    styles = get_base_styles()
+    start_date = timezone.now().date() - timedelta(days=period_days)
+    projects = _base_projects(enterprise, user).filter(created_at__date__gte=start_date)
+
+    totals = projects.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(status__in=APPROVED_STATUSES)),
+        value=Sum('value'),
+    )
+    approval_rate = (totals['approved'] / totals['total'] * 100) if totals['total'] else 0
+    active_clients = _base_clients(enterprise, user).filter(status='ATIVO').count()
+
+    yield Paragraph(f"Período: últimos {period_days} dias", styles['subtitle'])
+    yield from summary_flowables([
+        ('Total de propostas', totals['total']),
+        ('Propostas aprovadas', totals['approved']),
+        ('Taxa de aprovação', f"{approval_rate:.1f}%"),
+        ('Valor total', format_currency(totals['value'])),
+        ('Clientes ativos', active_clients),
+    ], branding)
+
+    yield Paragraph('Propostas por status', styles['heading'])
+    by_status = projects.values('status').annotate(count=Count('id'), total=Sum('value')).order_by('status')
+    yield from table_flowables(
+        ['Status', 'Quantidade', 'Valor'],
+        ([STATUS_MAP.get(row['status'], row['status']), row['count'], format_currency(row['total'])] for row in by_status),
+        branding,
+    )
+
+    yield Paragraph('Bancos', styles['heading'])
+    by_bank = projects.values('bank__name').annotate(count=Count('id'), total=Sum('value')).order_by('-count')
+    yield from table_flowables(
+        ['Banco', 'Quantidade', 'Valor'],
+        ([row['bank__name'], row['count'], format_currency(row['total'])] for row in by_bank),
+        branding,
+    )
+
+    yield Paragraph('Unidades', styles['heading'])
+    by_unit = projects.values('unit__name').annotate(count=Count('id'), total=Sum('value')).order_by('-count')
+    yield from table_flowables(
+        ['Unidade', 'Quantidade', 'Valor'],
+        ([row['unit__name'], row['count'], format_currency(row['total'])] for row in by_unit),
+        branding,
+    )
+
+
+def build_operations_performance(enterprise, branding, user=None, period_days=365):
+    """Listagem das operações do período (uma linha por projeto)"""
+    styles = get_base_styles()
+    start_date = timezone.now().date() - timedelta(days=period_days)
+    projects = _base_projects(enterprise, user).filter(created_at__date__gte=start_date)
+
+    yield Paragraph(f"Período: últimos {period_days} dias", styles['subtitle'])
+
+    rows = projects.order_by('-created_at').values_list(
+        'client__name', 'credit_line__name', 'bank__name', 'unit__name', 'status', 'value', 'created_at'
+    ).iterator(chunk_size=QUERY_CHUNK_SIZE)
+
+    yield from table_flowables(
+        ['Cliente', 'Linha de Crédito', 'Banco', 'Unidade', 'Status', 'Valor', 'Criado em'],
+        (
+            [
+                Paragraph(escape(client_name or '-'), styles['cell']),
+                Paragraph(escape(credit_line or '-'), styles['cell']),
+                Paragraph(escape(bank or '-'), styles['cell']),
+                Paragraph(escape(unit or '-'), styles['cell']),
+                STATUS_MAP.get(status, status),
+                Paragraph(format_currency(value), styles['cell_right']),
+                format_date(timezone.localtime(created_at)),
+            ]
+            for client_name, credit_line, bank, unit, status, value, created_at in rows
+        ),
+        branding,
+        col_widths=[4 * cm, 3 * cm, 2.6 * cm, 2.4 * cm, 2.2 * cm, 2.4 * cm, 1.9 * cm],
+    )
+
+
+def build_royalties(enterprise, branding, user=None, period_days=365):
+    """Royalties e fundo de marketing devidos por unidade no período"""
+    styles = get_base_styles()
+    period_end = timezone.now().date()
+    period_start = period_end - timedelta(days=period_days)
+
+    units = list(_base_units(enterprise, user).order_by('name'))
+    receitas_by_unit = dict(
+        Transaction.objects.filter(
+            unit__in=units,
+            category='RECEITA_CREDITO_RURAL',
+            transaction_type='ENTRADA',
+            date__range=[period_start, period_end],
+            is_active=True,
+        ).values('unit_id').annotate(total=Sum('amount')).values_list('unit_id', 'total')
+    )
+
+    rows = []
+    total_due = Decimal('0')
+    for unit in units:
+        receitas = receitas_by_unit.get(unit.id) or Decimal('0')
+        royalties_value = receitas * unit.royalties_percentage / 100
+        marketing_value = receitas * unit.marketing_percentage / 100
+        total_due += royalties_value + marketing_value
+        rows.append([
+            Paragraph(escape(unit.name), styles['cell']),
+            format_currency(receitas),
+            f"{unit.royalties_percentage}%",
+            format_currency(royalties_value),
+            f"{unit.marketing_percentage}%",
+            format_currency(marketing_value),
+            format_currency(royalties_value + marketing_value),
+        ])
+
+    yield Paragraph(f"Período: {format_date(period_start)} a {format_date(period_end)}", styles['subtitle'])
+    yield from summary_flowables([('Total devido pela rede', format_currency(total_due))], branding)
+    yield Spacer(1, 0.4 * cm)
+    yield from table_flowables(
+        ['Unidade', 'Receitas', 'Royalties %', 'Royalties', 'Marketing %', 'Marketing', 'Total'],
+        rows,
+        branding,
+    )
+
+
+def build_client_portfolio(enterprise, branding, user=None, period_days=None):
+    """Carteira de clientes com quantidade e valor de projetos de cada um"""
+    styles = get_base_styles()
+    clients = _base_clients(enterprise, user)
+
+    by_status = dict(clients.values('status').annotate(count=Count('id')).values_list('status', 'count'))
+    yield from summary_flowables([
+        ('Total de clientes', sum(by_status.values())),
+        ('Ativos', by_status.get('ATIVO', 0)),
+        ('Em negociação', by_status.get('EM_NEGOCIACAO', 0)),
+        ('Interessados', by_status.get('INTERESSADO', 0)),
+        ('Inativos', by_status.get('INATIVO', 0)),
+    ], branding)
+    yield Spacer(1, 0.4 * cm)
+
+    rows = clients.annotate(
+        project_count=Count('projects', filter=Q(projects__is_active=True)),
+        project_value=Sum('projects__value', filter=Q(projects__is_active=True)),
+    ).order_by('name').values_list(
+        'name', 'cpf', 'phone', 'city', 'status', 'project_count', 'project_value'
+    ).iterator(chunk_size=QUERY_CHUNK_SIZE)
+
+    yield from table_flowables(
+        ['Cliente', 'CPF', 'Telefone', 'Cidade', 'Situação', 'Projetos', 'Valor'],
+        (
+            [
+                Paragraph(escape(name), styles['cell']),
+                cpf or '-',
+                phone or '-',
+                Paragraph(escape(city or '-'), styles['cell']),
+                CLIENT_STATUS_MAP.get(status, status),
+                project_count,
+                Paragraph(format_currency(project_value), styles['cell_right']),
+            ]
+            for name, cpf, phone, city, status, project_count, project_value in rows
+        ),
+        branding,
+        col_widths=[4.5 * cm, 2.7 * cm, 2.6 * cm, 2.6 * cm, 2.2 * cm, 1.4 * cm, 2.5 * cm],
+    )
+
+
+def estimate_operations_rows(enterprise, user=None, period_days=365):
+    start_date = timezone.now().date() - timedelta(days=period_days)
+    return _base_projects(enterprise, user).filter(created_at__date__gte=start_date).count()
+
+
+def estimate_client_rows(enterprise, user=None, period_days=None):
+    return _base_clients(enterprise, user).count()
+
+
+# Relatórios disponíveis em PDF: tipo -> (título, builder, estimativa de linhas)
+PDF_REPORTS = {
+    'dashboard': ('Dashboard de Indicadores', build_dashboard, None),
+    'operations_performance': ('Performance de Operações', build_operations_performance, estimate_operations_rows),
+    'royalties': ('Royalties por Unidade', build_royalties, None),
+    'client_portfolio': ('Carteira de Clientes', build_client_portfolio, estimate_client_rows),
+}
+
+
+def estimate_report_rows(enterprise, report_type, user=None, period_days=365):
+    """Estima o número de linhas do relatório para decidir se roda em segundo plano"""
+    _, _, estimator = PDF_REPORTS[report_type]
+    if estimator is None:
+        return 0
+    return estimator(enterprise, user=user, period_days=period_days)
+
+
+# ==================== DOCUMENTO ====================
+
+def _page_decorator(title, branding):
+    regular, bold = get_base_styles()['fonts']
+    generated_at = timezone.localtime().strftime('%d/%m/%Y %H:%M')
+
+    def draw(canvas, doc):
+        width, height = doc.pagesize
+        canvas.saveState()
+
+        # Faixa superior com a cor primária da empresa
+        canvas.setFillColor(branding['primary'])
+        canvas.rect(0, height - 1.6 * cm, width, 1.6 * cm, stroke=0, fill=1)
+
+        text_x = doc.leftMargin
+        if branding['logo'] is not None:
+            canvas.drawImage(
+                branding['logo'], doc.leftMargin, height - 1.35 * cm,
+                width=3 * cm, height=1.1 * cm, preserveAspectRatio=True, mask='auto'
+            )
+            text_x += 3.3 * cm
+
+        canvas.setFillColor(branding['text'])
+        canvas.setFont(bold, 11)
+        canvas.drawString(text_x, height - 0.95 * cm, f"{branding['name']} - {title}")
+
+        # Rodapé com data de geração e número da página
+        canvas.setFillColor(colors.grey)
+        canvas.setFont(regular, 7)
+        canvas.drawString(doc.leftMargin, 0.8 * cm, f"Gerado em {generated_at}")
+        canvas.drawRightString(width - doc.rightMargin, 0.8 * cm, f"Página {doc.page}")
+        canvas.restoreState()
+
+    return draw
+
+
+def build_report_pdf(enterprise, report_type, output, user=None, period_days=365):
+    """
+    Renderiza o relatório no arquivo/stream `output`.
+    Retorna o título do relatório.
+    """
+    if report_type not in PDF_REPORTS:
+        raise ValueError(f"Relatório não disponível em PDF: {report_type}")
+
+    title, builder, _ = PDF_REPORTS[report_type]
+    branding = get_enterprise_branding(enterprise)
+    styles = get_base_styles()
+
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        leftMargin=1.2 * cm,
+        rightMargin=1.2 * cm,
+        topMargin=2.2 * cm,
+        bottomMargin=1.5 * cm,
+        title=f"{enterprise.name} - {title}",
+        author='Nexiun',
+    )
+
+    story = [Paragraph(title, styles['title'])]
+    # Consultas do relatório na réplica de leitura, quando configurada
+    with replica_reads():
+        story.extend(builder(enterprise, branding, user=user, period_days=period_days))
+
+    decorator = _page_decorator(title, branding)
+    doc.build(story, onFirstPage=decorator, onLaterPages=decorator)
+
+    return title
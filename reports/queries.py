@@ -0,0 +1,55 @@
+"""
+Métricas de relatório calculadas com subqueries correlacionadas
+
+Anotar Count/Sum de duas relações diferentes na mesma consulta (ex.: projetos
+e clientes de uma unidade, ou unidades e projetos de um captador) faz o banco
+juntar as tabelas como produto cartesiano: as linhas se multiplicam, a consulta
+fica lenta e as somas saem infladas.
+
+Aqui cada métrica é uma subquery independente, agrupada pela chave que liga
+a relação ao registro de fora (OuterRef('pk')). O custo cresce com o número de
+linhas de cada relação, não com o produto delas, e os valores ficam corretos.
+
+Uso:
+    projects = Project.objects.filter(is_active=True)
+    Unit.objects.annotate(
+        total_projects=related_count(projects, 'unit'),
+        total_value=related_sum(projects, 'unit', 'value'),
+        active_clients=related_count(Client.units.through.objects.filter(client__status='ATIVO'), 'unit'),
+    )
+"""
+from django.db.models import Avg, Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def related_aggregate(queryset, link, aggregate, output_field, default=None):
+    """
+    Subquery com `aggregate` sobre as linhas de `queryset` ligadas ao registro de fora por `link`
+    `default` substitui o NULL de quando não há linhas (None mantém o NULL, como no annotate original)
+    """
+    subquery = Subquery(
+        queryset.filter(**{link: OuterRef('pk')})
+        .order_by()
+        .values(link)
+        .annotate(metric=aggregate)
+        .values('metric')[:1],
+        output_field=output_field,
+    )
+    if default is None:
+        return subquery
+    return Coalesce(subquery, Value(default), output_field=output_field)
+
+
+def related_count(queryset, link, field='pk', distinct=False):
+    """Quantidade de linhas (ou de valores distintos de `field`) ligadas ao registro"""
+    return related_aggregate(queryset, link, Count(field, distinct=distinct), IntegerField(), default=0)
+
+
+def related_sum(queryset, link, field, default=None):
+    """Soma de `field` nas linhas ligadas ao registro"""
+    return related_aggregate(queryset, link, Sum(field), DecimalField(max_digits=16, decimal_places=2), default)
+
+
+def related_avg(queryset, link, field):
+    """Média de `field` nas linhas ligadas ao registro"""
+    return related_aggregate(queryset, link, Avg(field), DecimalField(max_digits=16, decimal_places=2))
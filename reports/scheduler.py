@@ -0,0 +1,263 @@
+"""
+Execução dos relatórios agendados (ScheduledReport)
+
+Cada lote de agendamentos vencidos é agrupado por (empresa, tipo, filtros,
+escopo de unidades): o relatório é gerado uma única vez por grupo e enviado
+para todos os inscritos, usando uma única conexão SMTP por lote.
+
+Falhas não mexem no horário do agendamento (next_run): o agendamento ganha
+uma nova tentativa em retry_at, até MAX_RETRIES vezes seguidas. Cada email é
+enviado e registrado separadamente, então só quem não recebeu volta para a fila.
+"""
+from datetime import timedelta
+from io import BytesIO
+import json
+import logging
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.template import loader
+from django.utils import timezone
+
+from .models import ScheduledReport, ReportSettings
+from .pdf import PDF_REPORTS, build_report_pdf
+
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_DELTAS = {
+    'daily': relativedelta(days=1),
+    'weekly': relativedelta(weeks=1),
+    'monthly': relativedelta(months=1),
+}
+
+# Espera antes de tentar novamente um grupo que falhou na geração/envio
+RETRY_DELAY = timedelta(minutes=15)
+# Falhas seguidas antes de desistir até o próximo horário do agendamento
+MAX_RETRIES = 3
+
+# Mesma regra de get_user_accessible_units, avaliada sobre dados pré-carregados
+UNRESTRICTED_ROLES = {'ceo', 'diretor', 'coordenador', 'financeiro'}
+
+
+def compute_next_run(next_run, frequency, now=None):
+    """Avança next_run pela frequência, pulando execuções perdidas (ex: scheduler parado)"""
+    now = now or timezone.now()
+    delta = FREQUENCY_DELTAS.get(frequency, FREQUENCY_DELTAS['weekly'])
+    next_run = next_run + delta
+    while next_run <= now:
+        next_run = next_run + delta
+    return next_run
+
+
+def _due_reports(now):
+    """Agendamentos no horário (next_run) ou com nova tentativa vencida (retry_at)"""
+    return (
+        ScheduledReport.objects
+        .filter(Q(next_run__lte=now) | Q(retry_at__lte=now), is_active=True)
+        .order_by('next_run')
+    )
+
+
+def _claimed_next_run(report, now):
+    """Uma nova tentativa fora do horário não avança o agendamento"""
+    if report.next_run <= now:
+        return compute_next_run(report.next_run, report.frequency, now)
+    return report.next_run
+
+
+def claim_due_reports(batch_size=200):
+    """
+    Reserva um lote de agendamentos vencidos: avança o next_run dos que estão
+    no horário e limpa o retry_at de todos
+
+    No PostgreSQL as linhas são travadas com FOR UPDATE SKIP LOCKED, então
+    vários schedulers podem rodar em paralelo sem enviar o mesmo relatório duas vezes.
+    No SQLite cada agendamento é reservado com UPDATE condicional no next_run antigo.
+    """
+    now = timezone.now()
+    claimed = []
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            reports = list(_due_reports(now).select_for_update(skip_locked=True, of=('self',))[:batch_size])
+            for report in reports:
+                report.next_run = _claimed_next_run(report, now)
+                report.retry_at = None
+            ScheduledReport.objects.bulk_update(reports, ['next_run', 'retry_at'])
+            claimed = reports
+    else:
+        for report in _due_reports(now)[:batch_size]:
+            new_next_run = _claimed_next_run(report, now)
+            updated = ScheduledReport.objects.filter(
+                pk=report.pk, next_run=report.next_run, retry_at=report.retry_at
+            ).update(next_run=new_next_run, retry_at=None)
+            if updated:
+                report.next_run = new_next_run
+                report.retry_at = None
+                claimed.append(report)
+
+    if not claimed:
+        return []
+
+    # Carrega usuário, empresa, cargos e unidades do lote inteiro de uma vez
+    return list(
+        ScheduledReport.objects
+        .filter(pk__in=[report.pk for report in claimed])
+        .select_related('user', 'user__enterprise', 'user__report_settings')
+        .prefetch_related('user__roles', 'user__units')
+    )
+
+
+def _user_scope(user):
+    """Escopo de unidades do usuário: 'all' ou a tupla de ids das unidades vinculadas"""
+    role_codes = {role.code for role in user.roles.all() if role.is_active}
+    if role_codes & UNRESTRICTED_ROLES:
+        return 'all'
+    return tuple(sorted(unit.id for unit in user.units.all() if unit.is_active))
+
+
+def _wants_email(user):
+    if not user.is_active or not user.email or not user.enterprise_id:
+        return False
+    try:
+        return user.report_settings.email_reports_enabled
+    except ReportSettings.DoesNotExist:
+        # Sem configurações salvas: o agendamento por si só já é a inscrição
+        return True
+
+
+def group_reports(reports):
+    """Agrupa os agendamentos que produzem exatamente o mesmo relatório"""
+    groups = {}
+    skipped = []
+
+    for report in reports:
+        user = report.user
+        if not _wants_email(user) or report.report_type not in PDF_REPORTS:
+            skipped.append(report)
+            continue
+
+        key = (
+            user.enterprise_id,
+            report.report_type,
+            json.dumps(report.filters or {}, sort_keys=True),
+            _user_scope(user),
+        )
+        groups.setdefault(key, []).append(report)
+
+    return groups, skipped
+
+
+def _render_pdf(report):
+    """Gera o PDF do grupo usando o primeiro inscrito (todos têm o mesmo escopo)"""
+    user = report.user
+    period_days = int((report.filters or {}).get('period_days', 365))
+    output = BytesIO()
+    title = build_report_pdf(user.enterprise, report.report_type, output, user=user, period_days=period_days)
+    return title, output.getvalue()
+
+
+def _build_message(report, title, pdf_content):
+    user = report.user
+    enterprise = user.enterprise
+
+    context = {
+        'user': user,
+        'enterprise': enterprise,
+        'report_title': title,
+        'frequency': report.get_frequency_display(),
+        'generated_at': timezone.localtime(),
+        'protocol': 'http' if settings.DEBUG else 'https',
+        'domain': enterprise.get_full_domain(),
+    }
+    html_body = loader.get_template('emails/scheduled_report.html').render(context)
+
+    email_message = EmailMessage(
+        subject=f"📊 {title} - {enterprise.name}",
+        body=html_body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email]
+    )
+    email_message.content_subtype = "html"
+    email_message.attach(
+        f"relatorio_{report.report_type}_{timezone.localdate():%Y%m%d}.pdf",
+        pdf_content,
+        'application/pdf'
+    )
+    return email_message
+
+
+def process_batch(batch_size=200):
+    """
+    Processa um lote de agendamentos vencidos
+    Retorna um dicionário com as estatísticas do lote
+    """
+    reports = claim_due_reports(batch_size)
+    stats = {'claimed': len(reports), 'groups': 0, 'sent': 0, 'skipped': 0, 'failed': 0}
+    if not reports:
+        return stats
+
+    groups, skipped = group_reports(reports)
+    stats['groups'] = len(groups)
+    stats['skipped'] = len(skipped)
+
+    email_messages = []
+    failed_ids = []
+
+    for key, group in groups.items():
+        try:
+            title, pdf_content = _render_pdf(group[0])
+        except Exception:
+            logger.exception("Erro ao gerar relatório agendado %s", key[:2])
+            failed_ids.extend(report.pk for report in group)
+            continue
+
+        for report in group:
+            email_messages.append((report, _build_message(report, title, pdf_content)))
+
+    sent_ids = []
+    if email_messages:
+        pending = list(email_messages)
+        try:
+            # Uma única conexão SMTP para o lote inteiro, um envio (e um resultado) por email:
+            # o backend SMTP para no primeiro erro, e os emails anteriores já foram entregues
+            with get_connection() as mail_connection:
+                while pending:
+                    report, email_message = pending.pop(0)
+                    try:
+                        sent = mail_connection.send_messages([email_message]) or 0
+                    except Exception:
+                        logger.exception("Erro ao enviar relatório agendado %s", report.pk)
+                        failed_ids.append(report.pk)
+                        continue
+                    stats['sent'] += sent
+                    sent_ids.append(report.pk)
+        except Exception:
+            # Falha ao abrir/fechar a conexão: só os emails ainda não enviados voltam para a fila
+            logger.exception("Erro na conexão de envio dos relatórios agendados")
+            failed_ids.extend(report.pk for report, _ in pending)
+
+    if sent_ids:
+        ScheduledReport.objects.filter(pk__in=sent_ids, failed_attempts__gt=0).update(failed_attempts=0)
+
+    if failed_ids:
+        _schedule_retry(failed_ids)
+        stats['failed'] = len(failed_ids)
+
+    return stats
+
+
+def _schedule_retry(report_ids):
+    """Nova tentativa em breve, sem mudar o horário do agendamento; após MAX_RETRIES falhas seguidas, só no próximo horário"""
+    can_retry = Q(failed_attempts__lt=MAX_RETRIES)
+    ScheduledReport.objects.filter(pk__in=report_ids).update(
+        retry_at=Case(
+            When(can_retry, then=Value(timezone.now() + RETRY_DELAY)),
+            default=None, output_field=DateTimeField(),
+        ),
+        failed_attempts=Case(When(can_retry, then=F('failed_attempts') + 1), default=Value(0)),
+    )
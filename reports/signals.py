@@ -0,0 +1,29 @@
+"""
+Nova versão dos dados dos gráficos (reports.charts) a cada mudança em projetos,
+clientes, unidades, bancos, linhas de crédito e vínculos com unidades
+As ETags antigas deixam de valer e a próxima atualização recebe os dados novos
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from enterprises.models import Client
+from projects.models import Bank, CreditLine, Project
+from units.models import Unit
+from users.models import User
+from .charts import bump_data_version
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Unit)
+@receiver([post_save, post_delete], sender=Bank)
+@receiver([post_save, post_delete], sender=CreditLine)
+def bump_data_version_on_change(sender, instance, **kwargs):
+    bump_data_version(instance.enterprise_id)
+
+
+@receiver(m2m_changed, sender=Client.units.through)
+@receiver(m2m_changed, sender=User.units.through)
+def bump_data_version_on_units_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_data_version(instance.enterprise_id)
@@ -0,0 +1,15 @@
+"""
+Tarefas em segundo plano do app reports (executadas pelo run_worker)
+"""
+from jobs.registry import task
+
+
+@task(queue='reports', max_attempts=2)
+def generate_report_export_task(export_id):
+    """Gera o PDF de uma ReportExport e salva no storage"""
+    from .utils import generate_report_export
+    
+    export = generate_report_export(export_id)
+    if export.status == 'error':
+        # Propaga o erro para a fila registrar e tentar novamente
+        raise RuntimeError(export.error)
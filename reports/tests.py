@@ -1,3 +1,35 @@
+from decimal import Decimal
+from io import BytesIO
+
 from django.test import TestCase
 
-# Create your tests here.
+from enterprises.models import Client, Enterprise
+from projects.models import Bank, CreditLine, Project
+from units.models import Unit
+from .pdf import PDF_REPORTS, build_report_pdf
+
+
+class PdfReportMarkupTests(TestCase):
+    """Textos cadastrados pelo usuário entram nos Paragraph como texto, não como marcação do reportlab"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.enterprise = Enterprise.objects.create(name='Empresa <Teste>', cnpj_or_cpf='00000000000100', subdomain='teste')
+        unit = Unit.objects.create(name='Unidade <B> & Cia', location='Centro', enterprise=cls.enterprise)
+        client = Client.objects.create(name='A <B> Ltda', city='São <i>José', enterprise=cls.enterprise)
+        Project.objects.create(
+            client=client,
+            enterprise=cls.enterprise,
+            unit=unit,
+            bank=Bank.objects.create(name='Banco </para>', enterprise=cls.enterprise),
+            credit_line=CreditLine.objects.create(name='Pronaf <b>', enterprise=cls.enterprise),
+            status='AC',
+            value=Decimal('1000.00'),
+        )
+
+    def test_reports_render_names_with_markup_characters(self):
+        for report_type in PDF_REPORTS:
+            with self.subTest(report_type=report_type):
+                output = BytesIO()
+                build_report_pdf(self.enterprise, report_type, output)
+                self.assertTrue(output.getvalue().startswith(b'%PDF'))
@@ -50,6 +50,8 @@ urlpatterns = [
     # Configurações e Utilidades
     path('settings/', views.reports_settings_view, name='reports_settings'),
     path('export/', views.reports_export_view, name='reports_export'),
+    path('export/<int:export_id>/status/', views.report_export_status_view, name='report_export_status'),
+    path('export/<int:export_id>/download/', views.report_export_download_view, name='report_export_download'),
     
     # APIs para AJAX e gráficos
     path('api/', include([
@@ -6,9 +6,11 @@ import hashlib
 import json
 from io import BytesIO
 
-from projects.models import Project, ProjectHistory
+from core.db_router import replica_reads
+from projects.models import Project, ProjectHistory, ProjectInstallment
 from enterprises.models import Client
 from units.models import Unit
+from .queries import related_count
 
 
 def calculate_approval_time(enterprise, start_date=None, detailed=False):
@@ -160,6 +162,7 @@ def generate_cache_key(report_type, filters):
     return hashlib.sha256(f"{report_type}_{filter_str}".encode()).hexdigest()
 
 
+@replica_reads()
 def export_to_excel(enterprise, report_type):
     """
     Exporta relatório para Excel
@@ -208,26 +211,89 @@ def export_to_excel(enterprise, report_type):
         return response
 
 
-def export_to_pdf(enterprise, report_type):
+# Relatórios com mais linhas que isso são gerados em segundo plano
+PDF_BACKGROUND_ROW_THRESHOLD = 1500
+
+
+def export_to_pdf(enterprise, report_type, user=None, period_days=365):
     """
     Exporta relatório para PDF
+    Relatórios pequenos são gerados na própria requisição; os grandes devem
+    passar por start_report_export_async para não bloquear o worker
     """
     try:
-        import reportlab
-        # Implementar exportação para PDF usando reportlab
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="relatorio_{report_type}.pdf"'
-        
-        # TODO: Implementar geração do PDF
-        response.write(b'PDF em desenvolvimento')
-        
-        return response
-    
+        from .pdf import build_report_pdf
     except ImportError:
         response = HttpResponse(content_type='text/plain')
         response['Content-Disposition'] = f'attachment; filename="relatorio_{report_type}.txt"'
         response.write('Funcionalidade de PDF requer reportlab instalado')
         return response
+    
+    output = BytesIO()
+    build_report_pdf(enterprise, report_type, output, user=user, period_days=period_days)
+    
+    response = HttpResponse(output.getvalue(), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="relatorio_{report_type}.pdf"'
+    return response
+
+
+def should_export_in_background(enterprise, report_type, user=None, period_days=365):
+    """
+    Verifica se o relatório é grande o suficiente para ser gerado em segundo plano
+    """
+    from .pdf import estimate_report_rows
+    
+    return estimate_report_rows(enterprise, report_type, user=user, period_days=period_days) > PDF_BACKGROUND_ROW_THRESHOLD
+
+
+def generate_report_export(export_id):
+    """
+    Gera o arquivo de uma ReportExport e salva no storage padrão
+    """
+    from django.core.files import File
+    from tempfile import TemporaryFile
+    from .models import ReportExport
+    from .pdf import build_report_pdf
+    
+    export = ReportExport.objects.select_related('enterprise', 'requested_by').get(pk=export_id)
+    export.status = 'running'
+    export.started_at = timezone.now()
+    export.save(update_fields=['status', 'started_at'])
+    
+    try:
+        # Arquivo temporário em disco: PDFs grandes não ficam inteiros em memória
+        with TemporaryFile() as output:
+            build_report_pdf(
+                export.enterprise,
+                export.report_type,
+                output,
+                user=export.requested_by,
+                period_days=export.period_days
+            )
+            output.seek(0)
+            filename = f"relatorio_{export.report_type}_{timezone.now():%Y%m%d%H%M%S}.pdf"
+            export.file.save(filename, File(output), save=False)
+        
+        export.status = 'done'
+        export.error = ''
+        print(f"✅ Relatório {export.report_type} gerado: {export.file.name}")
+    except Exception as e:
+        export.status = 'error'
+        export.error = str(e)
+        print(f"❌ Erro ao gerar relatório {export.report_type}: {e}")
+    
+    export.finished_at = timezone.now()
+    export.save(update_fields=['status', 'file', 'error', 'finished_at'])
+    return export
+
+
+def start_report_export_async(export):
+    """
+    Enfileira a geração do relatório para o worker (python manage.py run_worker)
+    """
+    from .tasks import generate_report_export_task
+    
+    generate_report_export_task.enqueue(export_id=export.pk)
 
 
 def calculate_repurchase_rate(enterprise, group_by=None):
@@ -258,18 +324,53 @@ def calculate_repurchase_rate(enterprise, group_by=None):
     return (repurchase_clients / total_clients * 100) if total_clients > 0 else 0
 
 
-def get_upcoming_deadlines(enterprise, days_ahead=30):
+def get_upcoming_deadlines(enterprise, days_ahead=30, units=None):
     """
-    Retorna operações com vencimento próximo
+    Retorna as parcelas pendentes com vencimento nos próximos `days_ahead` dias
+    Consulta por faixa de data no índice (enterprise, unit, due_date, status) de ProjectInstallment
     """
-    # Esta função precisará ser implementada quando houver
-    # modelo para controle de vencimentos das operações
-    return []
+    today = timezone.now().date()
+    deadlines = ProjectInstallment.objects.filter(
+        enterprise=enterprise,
+        status='PENDENTE',
+        due_date__range=[today, today + timedelta(days=days_ahead)],
+    )
+    if units is not None:
+        deadlines = deadlines.filter(unit__in=units)
+
+    return deadlines.select_related('project', 'project__client', 'project__bank', 'unit').order_by('due_date', 'project_id')
+
+
+def get_deadline_buckets(enterprise, units=None, buckets=(30, 60, 90)):
+    """
+    Totais das parcelas pendentes vencidas e a vencer em 30/60/90 dias em uma única consulta
+    Retorna {'vencidas': {...}, 30: {...}, 60: {...}, 90: {...}} com 'total' e 'parcelas' (acumulados)
+    """
+    today = timezone.now().date()
+    pending = ProjectInstallment.objects.filter(enterprise=enterprise, status='PENDENTE')
+    if units is not None:
+        pending = pending.filter(unit__in=units)
+
+    aggregates = {
+        'vencidas_total': Sum('amount', filter=Q(due_date__lt=today)),
+        'vencidas_parcelas': Count('id', filter=Q(due_date__lt=today)),
+    }
+    for days in buckets:
+        in_range = Q(due_date__range=[today, today + timedelta(days=days)])
+        aggregates[f'd{days}_total'] = Sum('amount', filter=in_range)
+        aggregates[f'd{days}_parcelas'] = Count('id', filter=in_range)
+    result = pending.aggregate(**aggregates)
+
+    data = {'vencidas': {'total': result['vencidas_total'] or 0, 'parcelas': result['vencidas_parcelas']}}
+    for days in buckets:
+        data[days] = {'total': result[f'd{days}_total'] or 0, 'parcelas': result[f'd{days}_parcelas']}
+    return data
 
 
 def calculate_royalties_by_unit(enterprise, period_start=None, period_end=None):
     """
     Calcula royalties por unidade baseado nas transações
+    As receitas de todas as unidades vêm de uma única consulta agrupada por unidade
     """
     from units.models import Transaction, Unit
     
@@ -278,19 +379,22 @@ def calculate_royalties_by_unit(enterprise, period_start=None, period_end=None):
     if not period_end:
         period_end = timezone.now().date()
     
-    royalties_data = []
-    
     units = Unit.objects.filter(enterprise=enterprise, is_active=True)
     
-    for unit in units:
-        # Receitas de crédito rural no período
-        receitas = Transaction.objects.filter(
-            unit=unit,
+    # Receitas de crédito rural no período: {unit_id: total}
+    receitas_by_unit = dict(
+        Transaction.objects.filter(
+            unit__in=units,
             category='RECEITA_CREDITO_RURAL',
             transaction_type='ENTRADA',
             date__range=[period_start, period_end],
             is_active=True
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        ).values('unit_id').annotate(total=Sum('amount')).values_list('unit_id', 'total')
+    )
+    
+    royalties_data = []
+    for unit in units:
+        receitas = receitas_by_unit.get(unit.pk) or 0
         
         # Calcular royalties
         royalties_value = receitas * (unit.royalties_percentage / 100)
@@ -309,6 +413,30 @@ def calculate_royalties_by_unit(enterprise, period_start=None, period_end=None):
     return royalties_data
 
 
+def repurchase_clients_subquery(enterprise):
+    """
+    Subquery com o número de clientes de recompra (mais de um projeto) de cada unidade
+    Uso: units.annotate(repurchase_clients=repurchase_clients_subquery(enterprise))
+    """
+    ClientUnit = Client.units.through
+    
+    # Clientes da empresa com mais de um projeto
+    repurchase_clients = Project.objects.filter(
+        client__enterprise=enterprise
+    ).values('client_id').annotate(
+        project_count=Count('id')
+    ).filter(project_count__gt=1).values('client_id')
+    
+    return related_count(
+        ClientUnit.objects.filter(
+            client__enterprise=enterprise,
+            client__is_active=True,
+            client_id__in=repurchase_clients,
+        ),
+        'unit'
+    )
+
+
 def get_user_accessible_units(user):
     """
     Retorna as unidades que o usuário pode acessar nos relatórios
@@ -323,17 +451,14 @@ def get_user_accessible_units(user):
     if not user or not user.is_authenticated:
         return Unit.objects.none()
     
-    # Obter códigos dos cargos do usuário
-    user_role_codes = list(user.roles.filter(is_active=True).values_list('code', flat=True))
-    
     # Cargos com acesso restrito às suas próprias unidades
     restricted_roles = ['socio_unidade', 'franqueado', 'gerente', 'projetista', 'captador']
     
     # Cargos com acesso total
     unrestricted_roles = ['ceo', 'diretor', 'coordenador', 'financeiro']
     
-    # Verificar se o usuário tem algum cargo com acesso total
-    has_unrestricted_access = any(role in unrestricted_roles for role in user_role_codes)
+    # Verificar se o usuário tem algum cargo com acesso total (bits de User.role_mask, sem consulta)
+    has_unrestricted_access = user.has_any_role(unrestricted_roles)
     
     if has_unrestricted_access:
         # Acesso a todas as unidades da empresa
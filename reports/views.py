@@ -1,25 +1,41 @@
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.core.paginator import Paginator
 from django.db.models import Count, Sum, Avg, Q
+from django.db.models.functions import ExtractYear
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 import json
 
+from asgiref.sync import sync_to_async
+
+from core.db_router import read_replica
 from users.decorators import permission_required
 from users.models import User
-from projects.models import Project, ProjectHistory, Bank, CreditLine
+from projects.models import Project, ProjectHistory, ProjectInstallment, Bank, CreditLine
 from enterprises.models import Client
 from units.models import Unit, Transaction
-from .models import ReportCache, ReportSettings
+from core.birthdays import birthday_order, birthday_range_q, birthday_today_keys, next_birthday
+from .charts import chart_etag, clients_data, dashboard_data, operations_data, performance_data
+from .models import ReportCache, ReportSettings, ReportExport
+from .pdf import PDF_REPORTS
+from .queries import related_count, related_sum
 from .utils import (
     calculate_approval_time, 
     calculate_conversion_rates,
     generate_performance_metrics,
     export_to_excel,
     export_to_pdf,
+    should_export_in_background,
+    start_report_export_async,
+    get_upcoming_deadlines,
+    get_deadline_buckets,
+    repurchase_clients_subquery,
     get_user_accessible_units,
     get_user_accessible_projects,
     get_user_accessible_clients,
@@ -30,6 +46,7 @@ from .utils import (
 # ==================== DASHBOARD PRINCIPAL ====================
 
 @login_required
+@read_replica
 def reports_dashboard_view(request):
     """Dashboard principal com visão geral dos indicadores"""
     user = request.user
@@ -119,6 +136,7 @@ def reports_dashboard_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def operations_performance_view(request):
     """Relatório de performance das operações"""
     user = request.user
@@ -187,6 +205,7 @@ def operations_performance_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def operations_timing_view(request):
     """Análise detalhada de tempo de aprovação"""
     user = request.user
@@ -204,6 +223,7 @@ def operations_timing_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def operations_by_bank_view(request):
     """Relatório detalhado por banco"""
     user = request.user
@@ -220,6 +240,7 @@ def operations_by_bank_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def operations_by_credit_line_view(request):
     """Relatório detalhado por linha de crédito"""
     user = request.user
@@ -238,6 +259,7 @@ def operations_by_credit_line_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def clients_indicators_view(request):
     """Indicadores gerais de clientes"""
     user = request.user
@@ -261,32 +283,18 @@ def clients_indicators_view(request):
     ) if total_active_clients > 0 else 0
     
     # Detalhamento por unidade - apenas unidades acessíveis ao usuário
+    # Clientes de recompra via subquery: uma única consulta para todas as unidades
     accessible_units = get_user_accessible_units(user)
     units_metrics = accessible_units.annotate(
         total_clients=Count('clients'),
-        active_clients=Count('clients', filter=Q(clients__status='ATIVO'))
+        active_clients=Count('clients', filter=Q(clients__status='ATIVO')),
+        repurchase_clients=repurchase_clients_subquery(enterprise),
     )
     
-    # Calcular clientes de recompra manualmente para cada unidade
-    units_with_repurchase = []
-    for unit in units_metrics:
-        # Buscar clientes da unidade que têm mais de um projeto
-        repurchase_clients_count = Client.objects.filter(
-            units=unit,
-            enterprise=enterprise,
-            is_active=True
-        ).annotate(
-            project_count=Count('projects')
-        ).filter(project_count__gt=1).count()
-        
-        # Adicionar o campo calculado
-        unit.repurchase_clients = repurchase_clients_count
-        units_with_repurchase.append(unit)
-    
     context = {
         'clients_by_status': clients_by_status,
         'repurchase_rate': round(repurchase_rate, 1),
-        'units_metrics': units_with_repurchase,
+        'units_metrics': units_metrics,
         'total_active_clients': total_active_clients,
     }
     
@@ -295,6 +303,7 @@ def clients_indicators_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def clients_conversion_view(request):
     """Análise de funil de conversão"""
     user = request.user
@@ -311,6 +320,7 @@ def clients_conversion_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def clients_status_analysis_view(request):
     """Análise detalhada por status de cliente"""
     # Implementar análise de status
@@ -319,6 +329,7 @@ def clients_status_analysis_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def clients_repurchase_view(request):
     """Análise detalhada de recompra"""
     # Implementar análise de recompra
@@ -329,6 +340,7 @@ def clients_repurchase_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def performance_captadores_view(request):
     """Ranking e performance dos captadores"""
     user = request.user
@@ -337,18 +349,22 @@ def performance_captadores_view(request):
     # Buscar usuários com role de captador - filtrados pelas unidades acessíveis
     accessible_units = get_user_accessible_units(user)
     
-    # Filtrar captadores apenas das unidades acessíveis ao usuário
+    # Captadores vinculados às unidades acessíveis (sem juntar unidades às métricas)
+    captadores_ids = User.objects.filter(
+        roles__code='captador',
+        units__in=accessible_units
+    ).values('pk')
+    
+    # Métricas em subqueries independentes: o vínculo com várias unidades não multiplica os projetos
+    prospected = Project.objects.filter(unit__in=accessible_units)
     captadores = User.objects.filter(
         enterprise=enterprise,
-        roles__code='captador',
         is_active=True,
-        units__in=accessible_units
+        pk__in=captadores_ids
     ).annotate(
-        clients_captured=Count('prospected_projects__client', distinct=True, 
-                              filter=Q(prospected_projects__unit__in=accessible_units)),
-        total_value=Sum('prospected_projects__value', 
-                       filter=Q(prospected_projects__unit__in=accessible_units))
-    ).order_by('-clients_captured').distinct()
+        clients_captured=related_count(prospected, 'project_prospector', 'client', distinct=True),
+        total_value=related_sum(prospected, 'project_prospector', 'value')
+    ).order_by('-clients_captured')
     
     context = {
         'captadores': captadores,
@@ -359,6 +375,7 @@ def performance_captadores_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def performance_projetistas_view(request):
     """Ranking e performance dos projetistas"""
     user = request.user
@@ -367,13 +384,13 @@ def performance_projetistas_view(request):
     # Buscar usuários com role de projetista
     projetistas = User.objects.filter(
         enterprise=enterprise,
-        roles__code='projetista',
-        is_active=True
+        is_active=True,
+        pk__in=User.objects.filter(roles__code='projetista').values('pk')
     ).annotate(
-        projects_designed=Count('designed_projects'),
-        approved_projects=Count('designed_projects', filter=Q(designed_projects__status__in=['AP', 'AF', 'FM', 'LB', 'RC'])),
-        total_value=Sum('designed_projects__value'),
-        active_projects=Count('designed_projects', filter=Q(designed_projects__status__in=['AC', 'PE', 'AN']))
+        projects_designed=related_count(Project.objects.all(), 'project_designer'),
+        approved_projects=related_count(Project.objects.filter(status__in=['AP', 'AF', 'FM', 'LB', 'RC']), 'project_designer'),
+        total_value=related_sum(Project.objects.all(), 'project_designer', 'value'),
+        active_projects=related_count(Project.objects.filter(status__in=['AC', 'PE', 'AN']), 'project_designer')
     ).order_by('-projects_designed')
     
     context = {
@@ -385,19 +402,22 @@ def performance_projetistas_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def performance_unidades_view(request):
     """Performance das unidades"""
     user = request.user
     enterprise = user.enterprise
     
+    # Projetos e clientes em subqueries separadas (juntar as duas relações multiplicaria as linhas)
+    ClientUnit = Client.units.through
     unidades = Unit.objects.filter(
         enterprise=enterprise,
         is_active=True
     ).annotate(
-        total_projects=Count('projects'),
-        approved_projects=Count('projects', filter=Q(projects__status__in=['AP', 'AF', 'FM', 'LB', 'RC'])),
-        total_value=Sum('projects__value'),
-        active_clients=Count('clients', filter=Q(clients__status='ATIVO'))
+        total_projects=related_count(Project.objects.all(), 'unit'),
+        approved_projects=related_count(Project.objects.filter(status__in=['AP', 'AF', 'FM', 'LB', 'RC']), 'unit'),
+        total_value=related_sum(Project.objects.all(), 'unit', 'value'),
+        active_clients=related_count(ClientUnit.objects.filter(client__status='ATIVO'), 'unit')
     ).order_by('-total_projects')
     
     context = {
@@ -409,6 +429,7 @@ def performance_unidades_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def performance_bancos_view(request):
     """Performance dos bancos"""
     user = request.user
@@ -433,16 +454,60 @@ def performance_bancos_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def performance_carteira_view(request):
-    """Análise de carteira ativa"""
-    # Implementar análise de carteira
-    pass
+    """Análise de carteira ativa (recebíveis a partir das parcelas persistidas)"""
+    user = request.user
+    enterprise = user.enterprise
+    today = timezone.now().date()
+
+    accessible_units = get_user_accessible_units(user)
+    installments = ProjectInstallment.objects.filter(enterprise=enterprise, unit__in=accessible_units)
+
+    unit_id = request.GET.get('unit', '')
+    if unit_id.isdigit():
+        installments = installments.filter(unit_id=unit_id)
+
+    pending = installments.filter(status='PENDENTE')
+
+    summary = installments.aggregate(
+        a_receber=Sum('amount', filter=Q(status='PENDENTE', due_date__gte=today)),
+        vencido=Sum('amount', filter=Q(status='PENDENTE', due_date__lt=today)),
+        recebido=Sum('amount', filter=Q(status='PAGO')),
+        operacoes=Count('project', filter=Q(status='PENDENTE'), distinct=True),
+    )
+
+    # Recebíveis por ano de vencimento
+    by_year = pending.filter(due_date__gte=today).annotate(
+        ano=ExtractYear('due_date')
+    ).values('ano').annotate(
+        total=Sum('amount'),
+        parcelas=Count('id'),
+    ).order_by('ano')
+
+    # Carteira por unidade
+    by_unit = pending.values('unit__name').annotate(
+        total=Sum('amount'),
+        vencido=Sum('amount', filter=Q(due_date__lt=today)),
+        operacoes=Count('project', distinct=True),
+    ).order_by('-total')
+
+    context = {
+        'summary': summary,
+        'by_year': by_year,
+        'by_unit': by_unit,
+        'units': accessible_units,
+        'selected_unit': unit_id,
+    }
+
+    return render(request, 'reports/performance/carteira.html', context)
 
 
 # ==================== RELATÓRIOS POR CATEGORIA ====================
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def categories_client_size_view(request):
     """Relatório por tamanho de cliente"""
     # Implementar por tamanho
@@ -451,6 +516,7 @@ def categories_client_size_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def categories_operation_type_view(request):
     """Relatório por tipo de operação (Custeio/Investimento)"""
     # Implementar por tipo
@@ -459,6 +525,7 @@ def categories_operation_type_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def categories_by_unit_view(request):
     """Relatório comparativo por unidade"""
     # Implementar comparativo
@@ -467,6 +534,7 @@ def categories_by_unit_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def categories_comparative_view(request):
     """Relatório comparativo geral"""
     # Implementar comparativo geral
@@ -477,47 +545,69 @@ def categories_comparative_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def special_vencimentos_view(request):
     """Relatório de vencimentos de operações"""
-    # Implementar vencimentos
-    pass
+    user = request.user
+    enterprise = user.enterprise
+
+    # Filtros
+    try:
+        days_ahead = int(request.GET.get('days', 30))
+    except ValueError:
+        days_ahead = 30
+    days_ahead = min(max(days_ahead, 1), 365)
+    unit_id = request.GET.get('unit', '')
+
+    accessible_units = get_user_accessible_units(user)
+    units = accessible_units.filter(pk=unit_id) if unit_id.isdigit() else accessible_units
+
+    deadlines = get_upcoming_deadlines(enterprise, days_ahead, units=units)
+    paginator = Paginator(deadlines, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    context = {
+        'page_obj': page_obj,
+        'buckets': get_deadline_buckets(enterprise, units=units),
+        'period_total': deadlines.aggregate(total=Sum('amount'))['total'] or 0,
+        'days_ahead': days_ahead,
+        'units': accessible_units,
+        'selected_unit': unit_id,
+    }
+
+    return render(request, 'reports/special/vencimentos.html', context)
 
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def special_aniversarios_view(request):
     """Relatório de clientes aniversariantes"""
     user = request.user
     enterprise = user.enterprise
     
     today = timezone.now().date()
+    today_keys = birthday_today_keys(today)
     
-    # Aniversariantes de hoje
-    today_birthdays = Client.objects.filter(
-        enterprise=enterprise,
-        date_of_birth__month=today.month,
-        date_of_birth__day=today.day,
-        is_active=True
+    # Aniversariantes dos próximos 7 dias (hoje incluso) em uma única consulta no índice
+    # (enterprise, birthday_key), ordenados pelo próximo aniversário (virada do ano tratada)
+    week_birthdays = list(
+        Client.objects.filter(
+            birthday_range_q(today, 6),
+            enterprise=enterprise,
+            is_active=True,
+        ).annotate(
+            birthday_wrap=birthday_order(today)
+        ).prefetch_related('units').order_by('birthday_wrap', 'birthday_key', 'name')
     )
     
-    # Aniversariantes desta semana
-    week_start = today
-    week_end = today + timedelta(days=7)
+    for client in week_birthdays:
+        client.next_birthday = next_birthday(client.date_of_birth, today)
+        client.days_until_birthday = (client.next_birthday - today).days
+        client.age = client.next_birthday.year - client.date_of_birth.year
     
-    # Para SQLite, buscar aniversariantes nos próximos 7 dias usando Python
-    week_birthdays = []
-    for i in range(7):
-        current_day = today + timedelta(days=i)
-        daily_birthdays = Client.objects.filter(
-            enterprise=enterprise,
-            date_of_birth__month=current_day.month,
-            date_of_birth__day=current_day.day,
-            is_active=True
-        )
-        week_birthdays.extend(daily_birthdays)
-    
-    # Remover duplicatas (caso um cliente apareça mais de uma vez)
-    week_birthdays = list(set(week_birthdays))
+    # Aniversariantes de hoje
+    today_birthdays = [client for client in week_birthdays if client.birthday_key in today_keys]
     
     context = {
         'today_birthdays': today_birthdays,
@@ -530,6 +620,7 @@ def special_aniversarios_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def special_carteira_contatos_view(request):
     """Relatório da carteira de contatos"""
     # Implementar carteira de contatos
@@ -538,6 +629,7 @@ def special_carteira_contatos_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def special_franqueados_view(request):
     """Relatório de desempenho por franqueado"""
     # Implementar franqueados
@@ -546,6 +638,7 @@ def special_franqueados_view(request):
 
 @login_required
 @permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
 def special_comissoes_view(request):
     """Relatório de comissões e royalties"""
     # Implementar comissões
@@ -591,53 +684,140 @@ def reports_settings_view(request):
 @permission_required('users.export_reports', 'Você não tem permissão para exportar relatórios.')
 def reports_export_view(request):
     """Exportação de relatórios"""
+    user = request.user
+    
     if request.method == 'POST':
         export_type = request.POST.get('export_type')  # 'excel' ou 'pdf'
         report_type = request.POST.get('report_type')
         
         if export_type == 'excel':
-            return export_to_excel(request.user.enterprise, report_type)
+            return export_to_excel(user.enterprise, report_type)
         elif export_type == 'pdf':
-            return export_to_pdf(request.user.enterprise, report_type)
+            if report_type not in PDF_REPORTS:
+                messages.error(request, 'Este relatório ainda não está disponível em PDF.')
+                return redirect('reports_export')
+            
+            # Relatórios grandes são gerados em segundo plano
+            if should_export_in_background(user.enterprise, report_type, user=user):
+                export = ReportExport.objects.create(
+                    enterprise=user.enterprise,
+                    requested_by=user,
+                    report_type=report_type,
+                    export_format='pdf',
+                )
+                start_report_export_async(export)
+                messages.info(request, 'O relatório está sendo gerado. O link para download aparecerá abaixo quando estiver pronto.')
+                return redirect('reports_export')
+            
+            return export_to_pdf(user.enterprise, report_type, user=user)
+    
+    recent_exports = ReportExport.objects.filter(requested_by=user)[:10]
+    
+    context = {
+        'recent_exports': recent_exports,
+        'has_pending_exports': any(export.status in ('pending', 'running') for export in recent_exports),
+    }
+    
+    return render(request, 'reports/export.html', context)
+
+
+@login_required
+@permission_required('users.export_reports', 'Você não tem permissão para exportar relatórios.')
+async def report_export_status_view(request, export_id):
+    """Status de uma exportação em segundo plano (consultado via AJAX a cada poucos segundos)"""
+    user = await request.auser()
+    export = await ReportExport.objects.filter(id=export_id, requested_by=user).afirst()
+    if export is None:
+        raise Http404('Exportação não encontrada')
     
-    return render(request, 'reports/export.html')
+    return JsonResponse({
+        'status': export.status,
+        'status_display': export.get_status_display(),
+        'download_url': reverse('report_export_download', args=[export.id]) if export.is_ready else None,
+        'error': export.error,
+    })
+
+
+@login_required
+@permission_required('users.export_reports', 'Você não tem permissão para exportar relatórios.')
+async def report_export_download_view(request, export_id):
+    """Redireciona para o arquivo gerado (URL assinada no S3)"""
+    user = await request.auser()
+    export = await ReportExport.objects.filter(id=export_id, requested_by=user).afirst()
+    if export is None:
+        raise Http404('Exportação não encontrada')
+    
+    if not export.is_ready:
+        messages.warning(request, 'O relatório ainda não está pronto.')
+        return redirect('reports_export')
+    
+    return redirect(export.file.url)
 
 
 # ==================== APIs PARA AJAX ====================
 
+async def _chart_response(request, name, build, params=()):
+    """
+    JSON do gráfico com ETag forte (reports.charts.chart_etag)
+    Se o navegador já tem a versão atual (If-None-Match), responde 304 sem montar os dados
+    """
+    # Sessão e cache podem estar no banco: fora do loop de eventos
+    etag = await sync_to_async(chart_etag)(request, name, params)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        data = await sync_to_async(build)()
+        response = JsonResponse({'status': 'success', 'data': data})
+    response['ETag'] = etag
+    # Sempre revalida com o servidor; só o próprio usuário guarda a resposta
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
-def api_dashboard_data_view(request):
-    """API para dados do dashboard"""
-    # Retornar dados em JSON para gráficos
-    return JsonResponse({'status': 'success', 'data': {}})
+@read_replica
+async def api_dashboard_data_view(request):
+    """API para dados do dashboard (mesmos indicadores e gráficos de home.views.home)"""
+    return await _chart_response(request, 'dashboard', lambda: dashboard_data(request))
 
 
 @login_required
-def api_operations_chart_view(request):
-    """API para gráficos de operações"""
-    # Retornar dados para gráficos
-    return JsonResponse({'status': 'success', 'data': {}})
+@permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
+async def api_operations_chart_view(request):
+    """API para gráficos de operações (filtros de operations_performance_view)"""
+    period_days = int(request.GET.get('period', 365))
+    unit_id = request.GET.get('unit') or None
+    bank_id = request.GET.get('bank') or None
+    return await _chart_response(
+        request, 'operations',
+        lambda: operations_data(request.user, period_days, unit_id, bank_id),
+        params=(period_days, unit_id, bank_id),
+    )
 
 
 @login_required
-def api_clients_chart_view(request):
+@permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
+async def api_clients_chart_view(request):
     """API para gráficos de clientes"""
-    # Retornar dados para gráficos
-    return JsonResponse({'status': 'success', 'data': {}})
+    return await _chart_response(request, 'clients', lambda: clients_data(request.user))
 
 
 @login_required
-def api_performance_chart_view(request):
-    """API para gráficos de performance"""
-    # Retornar dados para gráficos
-    return JsonResponse({'status': 'success', 'data': {}})
+@permission_required('users.view_reports', 'Você não tem permissão para visualizar relatórios.')
+@read_replica
+async def api_performance_chart_view(request):
+    """API para gráficos de performance (unidades e bancos)"""
+    return await _chart_response(request, 'performance', lambda: performance_data(request.user))
 
 
 @login_required
-def api_refresh_cache_view(request):
+async def api_refresh_cache_view(request):
     """API para limpar cache de relatórios"""
     if request.method == 'POST':
-        ReportCache.objects.filter(enterprise=request.user.enterprise).delete()
+        user = await request.auser()
+        await ReportCache.objects.filter(enterprise_id=user.enterprise_id).adelete()
         return JsonResponse({'status': 'success', 'message': 'Cache limpo com sucesso'})
     
     return JsonResponse({'status': 'error', 'message': 'Método não permitido'})
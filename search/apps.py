@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_indexes(using='default', **kwargs):
+    """No SQLite, recria triggers de busca descartados por migrações que recriam tabelas"""
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .indexes import install_sqlite
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    # Depois de "migrate search zero" os índices não devem voltar
+    if ('search', '0001_search_indexes') in MigrationRecorder(connection).applied_migrations():
+        install_sqlite(connection)
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "search"
+    verbose_name = "Busca"
+
+    def ready(self):
+        post_migrate.connect(ensure_search_indexes, sender=self, dispatch_uid='search.ensure_search_indexes')
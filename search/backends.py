@@ -0,0 +1,144 @@
+"""
+Backends de busca: geram as condições e o ranking em SQL para cada banco
+
+Todos recebem o termo digitado e devolvem (sql, params) para usar com RawSQL:
+    - condition(): filtra as linhas do alvo que batem com a busca;
+    - rank(): relevância (maior = mais relevante).
+
+`outer_column` permite buscar um alvo a partir de outra tabela
+(ex.: projetos pelo nome do cliente, com outer_column = "projects_project"."client_id").
+"""
+import re
+import unicodedata
+
+from django.db import connection
+
+from .indexes import SEARCH_TARGETS, fts_table, pg_document, pg_vector
+
+
+def normalize(text):
+    """Minúsculo e sem acentos ("João" -> "joao"), como o documento indexado"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower().strip()
+
+
+def query_terms(query):
+    """Palavras da busca (letras/dígitos), já normalizadas"""
+    return re.findall(r'\w+', normalize(query))
+
+
+def _column(name, alias):
+    return f'"{alias or SEARCH_TARGETS[name]["table"]}"."id"'
+
+
+class PostgresSearch:
+    """Busca por palavras/prefixos (tsvector) + trechos e erros de digitação (pg_trgm)"""
+
+    vendor = 'postgresql'
+
+    def _tsquery(self, query):
+        return ' & '.join(f'{term}:*' for term in query_terms(query))
+
+    def _own_condition(self, name, query, alias=None):
+        document = pg_document(name, alias)
+        text = normalize(query)
+        # % precisa ser escapado em RawSQL (%%)
+        sql = f"({document} LIKE %s OR %s <%% {document}"
+        params = [f'%{text}%', text]
+        tsquery = self._tsquery(query)
+        if tsquery:
+            sql += f" OR {pg_vector(name, alias)} @@ to_tsquery('simple', %s)"
+            params.append(tsquery)
+        return sql + ')', params
+
+    def _own_rank(self, name, query, alias=None):
+        text = normalize(query)
+        sql = f"word_similarity(%s, {pg_document(name, alias)})"
+        params = [text]
+        tsquery = self._tsquery(query)
+        if tsquery:
+            sql += f" + ts_rank({pg_vector(name, alias)}, to_tsquery('simple', %s))"
+            params.append(tsquery)
+        return sql, params
+
+    def condition(self, name, query, outer_column=None):
+        if outer_column is None:
+            return self._own_condition(name, query)
+        sql, params = self._own_condition(name, query, alias='s')
+        table = SEARCH_TARGETS[name]['table']
+        return f'{outer_column} IN (SELECT s.id FROM "{table}" s WHERE {sql})', params
+
+    def rank(self, name, query, outer_column=None):
+        if outer_column is None:
+            return self._own_rank(name, query)
+        sql, params = self._own_rank(name, query, alias='s')
+        table = SEARCH_TARGETS[name]['table']
+        condition, condition_params = self._own_condition(name, query, alias='s')
+        return (
+            f'coalesce((SELECT {sql} FROM "{table}" s WHERE s.id = {outer_column} AND {condition}), 0)',
+            params + condition_params,
+        )
+
+
+class SQLiteSearch:
+    """Busca nas tabelas FTS5 (desenvolvimento e testes locais)"""
+
+    vendor = 'sqlite'
+
+    def _match(self, query):
+        # Cada palavra vira um prefixo entre aspas ("joao"* "silva"*): AND implícito
+        return ' '.join(f'"{term}"*' for term in query_terms(query))
+
+    def condition(self, name, query, outer_column=None):
+        fts = fts_table(name)
+        outer_column = outer_column or _column(name, None)
+        return f'{outer_column} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', [self._match(query)]
+
+    def rank(self, name, query, outer_column=None):
+        # rank do FTS5 = bm25 (menor = mais relevante), por isso o sinal invertido
+        fts = fts_table(name)
+        outer_column = outer_column or _column(name, None)
+        return (
+            f'coalesce((SELECT -rank FROM {fts} WHERE {fts} MATCH %s AND rowid = {outer_column}), 0)',
+            [self._match(query)],
+        )
+
+
+class LikeSearch:
+    """Último recurso (banco sem FTS5): LIKE em cada coluna, sem índice"""
+
+    vendor = None
+
+    def _like(self, name, query, alias):
+        target = SEARCH_TARGETS[name]
+        conditions, params = [], []
+        for term in query_terms(query) or [normalize(query)]:
+            conditions.append('(' + ' OR '.join(f'lower("{alias}"."{column}") LIKE %s' for column in target['columns']) + ')')
+            params.extend([f'%{term}%'] * len(target['columns']))
+        return ' AND '.join(conditions), params
+
+    def condition(self, name, query, outer_column=None):
+        target = SEARCH_TARGETS[name]
+        sql, params = self._like(name, query, target['table'] if outer_column is None else 's')
+        if outer_column is None:
+            return sql, params
+        return f'{outer_column} IN (SELECT s.id FROM "{target["table"]}" s WHERE {sql})', params
+
+    def rank(self, name, query, outer_column=None):
+        return '0', []
+
+
+_backend = None
+
+
+def get_backend():
+    """Backend do banco atual (a disponibilidade do FTS5 é verificada uma vez por processo)"""
+    global _backend
+    if _backend is None or _backend.vendor not in (connection.vendor, None):
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearch()
+        elif connection.vendor == 'sqlite' and fts_table('clients') in connection.introspection.table_names():
+            _backend = SQLiteSearch()
+        else:
+            _backend = LikeSearch()
+    return _backend
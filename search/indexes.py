@@ -0,0 +1,214 @@
+"""
+Índices de busca textual (clientes, projetos e usuários)
+
+PostgreSQL (produção):
+    - extensões pg_trgm e unaccent;
+    - função nexiun_unaccent (IMMUTABLE), necessária para usar unaccent em índices;
+    - por alvo, dois índices GIN sobre o mesmo documento normalizado
+      (minúsculo, sem acentos, com CPF/telefone também só em dígitos):
+        * to_tsvector('simple', documento)  -> busca por palavras/prefixos (@@)
+        * documento gin_trgm_ops            -> trechos (LIKE '%x%') e erros de digitação (<%)
+      As consultas em search/backends.py usam exatamente a mesma expressão,
+      o que permite ao PostgreSQL usar os índices. Os índices são criados com
+      CONCURRENTLY para não bloquear a escrita nas tabelas grandes.
+
+SQLite (desenvolvimento):
+    - uma tabela FTS5 por alvo (tokenizer unicode61 sem acentos), mantida por
+      triggers de INSERT/UPDATE/DELETE na tabela original (inclusive bulk_create).
+"""
+
+SEARCH_TARGETS = {
+    'clients': {
+        'table': 'enterprises_client',
+        'columns': ('name', 'city', 'cpf', 'phone'),
+        # Também indexados só com dígitos: "12345678900" encontra "123.456.789-00"
+        'digit_columns': ('cpf', 'phone'),
+    },
+    'projects': {
+        'table': 'projects_project',
+        'columns': ('description',),
+        'digit_columns': (),
+    },
+    'users': {
+        'table': 'users_user',
+        'columns': ('name', 'email'),
+        'digit_columns': (),
+    },
+}
+
+SQLITE_TOKENIZER = 'unicode61 remove_diacritics 2'
+
+_PG_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() é STABLE; o wrapper com dicionário explícito pode ser IMMUTABLE e entrar em índices
+    """
+    CREATE OR REPLACE FUNCTION nexiun_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+]
+
+
+# ==================== POSTGRESQL ====================
+
+def pg_document(name, alias=None):
+    """Expressão SQL do documento de busca do alvo (com alias qualifica as colunas)"""
+    target = SEARCH_TARGETS[name]
+    prefix = f'"{alias}".' if alias else ''
+    parts = [f"coalesce({prefix}\"{column}\", '')" for column in target['columns']]
+    parts += [
+        f"regexp_replace(coalesce({prefix}\"{column}\", ''), '[^0-9]', '', 'g')"
+        for column in target['digit_columns']
+    ]
+    return "nexiun_unaccent(lower(" + " || ' ' || ".join(parts) + "))"
+
+
+def pg_vector(name, alias=None):
+    return f"to_tsvector('simple', {pg_document(name, alias)})"
+
+
+def _pg_install(schema_editor):
+    for sql in _PG_SETUP:
+        schema_editor.execute(sql)
+    for name, target in SEARCH_TARGETS.items():
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS search_{name}_fts_idx ON "{target["table"]}" USING gin ({pg_vector(name)})'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS search_{name}_trgm_idx ON "{target["table"]}" '
+            f'USING gin ({pg_document(name)} gin_trgm_ops)'
+        )
+
+
+def _pg_uninstall(schema_editor):
+    for name in SEARCH_TARGETS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS search_{name}_fts_idx')
+        schema_editor.execute(f'DROP INDEX IF EXISTS search_{name}_trgm_idx')
+    schema_editor.execute('DROP FUNCTION IF EXISTS nexiun_unaccent(text)')
+
+
+# ==================== SQLITE (FTS5) ====================
+
+def fts_table(name):
+    return f'search_{name}_fts'
+
+
+def _sqlite_columns(name):
+    target = SEARCH_TARGETS[name]
+    columns = list(target['columns'])
+    if target['digit_columns']:
+        columns.append('digits')
+    return columns
+
+
+def _sqlite_values(name, row):
+    """Valores inseridos na FTS a partir de `row` (new/old nos triggers ou o nome da tabela)"""
+    target = SEARCH_TARGETS[name]
+    values = [f'{row}."{column}"' for column in target['columns']]
+    if target['digit_columns']:
+        digits = []
+        for column in target['digit_columns']:
+            expression = f"coalesce({row}.\"{column}\", '')"
+            for char in ('.', '-', '(', ')', ' ', '/', '+'):
+                expression = f"replace({expression}, '{char}', '')"
+            digits.append(expression)
+        values.append(" || ' ' || ".join(digits))
+    return values
+
+
+def sqlite_fts_available(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp._fts5_check USING fts5(x)")
+            cursor.execute("DROP TABLE temp._fts5_check")
+        return True
+    except Exception:
+        return False
+
+
+def install_sqlite(connection):
+    """
+    Cria (se faltarem) as tabelas FTS e os triggers, recriando o conteúdo quando algo foi criado
+    Chamado na migração e a cada post_migrate: no SQLite, migrações que recriam a tabela
+    original (ALTER de colunas) descartam os triggers dela
+    """
+    if not sqlite_fts_available(connection):
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        created = False
+        for name, target in SEARCH_TARGETS.items():
+            table, fts = target['table'], fts_table(name)
+            columns = ', '.join(_sqlite_columns(name))
+            new_values = ', '.join(_sqlite_values(name, 'new'))
+            source_columns = ', '.join(f'"{column}"' for column in target['columns'])
+
+            statements = {
+                fts: f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, tokenize='{SQLITE_TOKENIZER}')",
+                f'{fts}_ai': f"""
+                    CREATE TRIGGER {fts}_ai AFTER INSERT ON "{table}" BEGIN
+                        INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                """,
+                f'{fts}_au': f"""
+                    CREATE TRIGGER {fts}_au AFTER UPDATE OF {source_columns} ON "{table}" BEGIN
+                        DELETE FROM {fts} WHERE rowid = old.id;
+                        INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                """,
+                f'{fts}_ad': f"""
+                    CREATE TRIGGER {fts}_ad AFTER DELETE ON "{table}" BEGIN
+                        DELETE FROM {fts} WHERE rowid = old.id;
+                    END
+                """,
+            }
+            for object_name, sql in statements.items():
+                if object_name not in existing:
+                    cursor.execute(sql)
+                    created = True
+
+    if created:
+        rebuild_sqlite(connection)
+    return created
+
+
+def _sqlite_uninstall(schema_editor):
+    for name in SEARCH_TARGETS:
+        fts = fts_table(name)
+        for suffix in ('ai', 'au', 'ad'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+def rebuild_sqlite(connection):
+    """Recria o conteúdo das tabelas FTS a partir das tabelas originais"""
+    with connection.cursor() as cursor:
+        for name, target in SEARCH_TARGETS.items():
+            table, fts = target['table'], fts_table(name)
+            columns = ', '.join(_sqlite_columns(name))
+            values = ', '.join(_sqlite_values(name, f'"{table}"'))
+            cursor.execute(f'DELETE FROM {fts}')
+            cursor.execute(f'INSERT INTO {fts}(rowid, {columns}) SELECT "{table}".id, {values} FROM "{table}"')
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+
+
+# ==================== MIGRAÇÃO ====================
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _pg_install(schema_editor)
+    elif vendor == 'sqlite':
+        install_sqlite(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _pg_uninstall(schema_editor)
+    elif vendor == 'sqlite':
+        _sqlite_uninstall(schema_editor)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from search.indexes import install_sqlite, rebuild_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca local (SQLite FTS5); no PostgreSQL os índices GIN são mantidos pelo banco'
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE enterprises_client, projects_project, users_user')
+            self.stdout.write(self.style.SUCCESS("✅ PostgreSQL: índices GIN mantidos pelo banco (estatísticas atualizadas)"))
+            return
+
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING(f"⚠️ Banco {connection.vendor} sem índice de busca: usando LIKE"))
+            return
+
+        if not install_sqlite(connection):
+            rebuild_sqlite(connection)
+        self.stdout.write(self.style.SUCCESS("✅ Índice de busca (FTS5) recriado"))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from search.indexes import install, uninstall
+
+
+class Migration(migrations.Migration):
+
+    # Índices do PostgreSQL criados com CONCURRENTLY (sem bloquear escrita), fora de transação
+    atomic = False
+
+    dependencies = [
+        ('enterprises', '0005_birthday_key'),
+        ('projects', '0006_projectinstallment'),
+        ('users', '0002_birthday_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall, atomic=False),
+    ]
@@ -0,0 +1,2 @@
+# A busca não tem models próprios: os índices ficam nas tabelas de clientes,
+# projetos e usuários (ver search/indexes.py)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/', views.search_api_view, name='search_api'),
+]
@@ -0,0 +1,133 @@
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from enterprises.models import Client
+from projects.models import Project
+from units.models import Unit
+from users.models import User
+from .backends import get_backend, query_terms
+
+
+MIN_QUERY_LENGTH = 2
+
+# Tipos de resultado e a permissão necessária para cada um
+SEARCH_PERMISSIONS = {
+    'clients': 'users.view_clients',
+    'projects': 'users.view_projects',
+    'users': 'users.view_users',
+}
+
+
+def is_searchable(query):
+    return bool(query) and len(query.strip()) >= MIN_QUERY_LENGTH and bool(query_terms(query))
+
+
+def _condition(name, query, outer_column=None):
+    sql, params = get_backend().condition(name, query, outer_column)
+    return RawSQL(sql, params, output_field=BooleanField())
+
+
+def _rank(name, query, outer_column=None):
+    sql, params = get_backend().rank(name, query, outer_column)
+    return RawSQL(sql, params, output_field=FloatField())
+
+
+# ==================== FILTROS ====================
+
+def filter_clients(queryset, query):
+    """Clientes que batem com a busca (nome, CPF, telefone ou cidade), mantendo a ordenação do queryset"""
+    if not is_searchable(query):
+        return queryset
+    return queryset.filter(_condition('clients', query))
+
+
+def filter_projects(queryset, query):
+    """Projetos pela descrição ou pelo nome/CPF do cliente"""
+    if not is_searchable(query):
+        return queryset
+    return queryset.filter(
+        _condition('projects', query)
+        | _condition('clients', query, outer_column='"projects_project"."client_id"')
+    )
+
+
+def filter_users(queryset, query):
+    """Usuários por nome ou email"""
+    if not is_searchable(query):
+        return queryset
+    return queryset.filter(_condition('users', query))
+
+
+# ==================== BUSCA ORDENADA POR RELEVÂNCIA ====================
+
+def rank_clients(queryset, query):
+    return filter_clients(queryset, query).annotate(
+        search_rank=_rank('clients', query)
+    ).order_by('-search_rank', 'name')
+
+
+def rank_projects(queryset, query):
+    return filter_projects(queryset, query).annotate(
+        search_rank=_rank('projects', query)
+        + _rank('clients', query, outer_column='"projects_project"."client_id"')
+    ).order_by('-search_rank', '-created_at')
+
+
+def rank_users(queryset, query):
+    return filter_users(queryset, query).annotate(
+        search_rank=_rank('users', query)
+    ).order_by('-search_rank', 'name')
+
+
+# ==================== ESCOPO ====================
+
+def get_search_units(user):
+    """Unidades visíveis ao usuário (mesma regra de core.mixins.get_accessible_units_from_request)"""
+    if user.has_perm('users.view_all_units'):
+        return Unit.objects.filter(enterprise=user.enterprise, is_active=True)
+    return user.units.filter(is_active=True)
+
+
+def scoped_clients(user):
+    clients = Client.objects.filter(enterprise=user.enterprise, is_active=True)
+    if user.has_perm('users.view_all_clients'):
+        return clients
+    # Sem JOIN com unidades no queryset principal (evita DISTINCT junto do ranking)
+    return clients.filter(
+        pk__in=Client.units.through.objects.filter(unit__in=get_search_units(user)).values('client_id')
+    )
+
+
+def scoped_projects(user):
+    projects = Project.objects.filter(enterprise=user.enterprise, is_active=True)
+    if user.has_perm('users.view_all_units'):
+        return projects
+    return projects.filter(unit__in=get_search_units(user))
+
+
+def scoped_users(user):
+    return User.objects.filter(enterprise=user.enterprise, is_active=True)
+
+
+def search_all(user, query, types=None, limit=10):
+    """
+    Busca ordenada por relevância em cada tipo permitido ao usuário
+    Retorna {'clients': [...], 'projects': [...], 'users': [...]} (apenas os tipos pedidos e permitidos)
+    """
+    types = [name for name in (types or SEARCH_PERMISSIONS) if name in SEARCH_PERMISSIONS]
+    results = {}
+    if not is_searchable(query):
+        return {name: [] for name in types if user.has_perm(SEARCH_PERMISSIONS[name])}
+
+    for name in types:
+        if not user.has_perm(SEARCH_PERMISSIONS[name]):
+            continue
+        if name == 'clients':
+            results[name] = list(rank_clients(scoped_clients(user), query)[:limit])
+        elif name == 'projects':
+            results[name] = list(
+                rank_projects(scoped_projects(user), query).select_related('client', 'unit')[:limit]
+            )
+        elif name == 'users':
+            results[name] = list(rank_users(scoped_users(user), query)[:limit])
+    return results
@@ -0,0 +1,82 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+
+from .utils import MIN_QUERY_LENGTH, search_all
+
+
+MAX_LIMIT = 50
+
+
+def _client_data(client):
+    return {
+        'id': client.pk,
+        'name': client.name,
+        'cpf': client.cpf,
+        'phone': client.phone,
+        'city': client.city,
+        'url': reverse('view_client', args=[client.pk]),
+        'rank': round(client.search_rank, 4),
+    }
+
+
+def _project_data(project):
+    return {
+        'id': project.pk,
+        'client': project.client.name,
+        'description': (project.description or '')[:120],
+        'status': project.get_status_display(),
+        'unit': project.unit.name,
+        'url': reverse('project_details', args=[project.pk]),
+        'rank': round(project.search_rank, 4),
+    }
+
+
+def _user_data(user):
+    return {
+        'id': user.pk,
+        'name': user.name,
+        'email': user.email,
+        'url': reverse('edit_user', args=[user.pk]),
+        'rank': round(user.search_rank, 4),
+    }
+
+
+SERIALIZERS = {
+    'clients': _client_data,
+    'projects': _project_data,
+    'users': _user_data,
+}
+
+
+@login_required
+def search_api_view(request):
+    """
+    Busca global (clientes, projetos e usuários) ordenada por relevância
+    GET q=<termo>&types=clients,projects,users&limit=10
+    Cada tipo respeita a permissão de visualização e as unidades do usuário
+    """
+    query = request.GET.get('q', '').strip()
+    types = [name for name in request.GET.get('types', '').split(',') if name] or None
+
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 10
+
+    if len(query) < MIN_QUERY_LENGTH:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Digite pelo menos {MIN_QUERY_LENGTH} caracteres para buscar',
+        }, status=400)
+
+    results = search_all(request.user, query, types=types, limit=limit)
+
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'data': {
+            name: [SERIALIZERS[name](item) for item in items]
+            for name, items in results.items()
+        },
+    })
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('units', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['unit', '-created_at', '-id'], name='transaction_api_cursor_idx'),
+        ),
+    ]
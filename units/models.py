@@ -157,6 +157,10 @@ class Transaction(models.Model):
         verbose_name = "Transação"
         verbose_name_plural = "Transações"
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Paginação por cursor da API sobre (created_at, id)
+            models.Index(fields=['unit', '-created_at', '-id'], name='transaction_api_cursor_idx'),
+        ]
 
     def __str__(self):
         tipo_icon = "+" if self.transaction_type == 'ENTRADA' else "-"
@@ -0,0 +1,187 @@
+"""
+Catálogo de permissões em memória (formulários de criação/edição de usuários)
+
+Montado com quatro consultas (módulos, permissões customizadas, bits das
+permissões e cargos) e guardado no próprio processo: cada worker monta o
+catálogo uma vez e o reutiliza até a próxima invalidação.
+
+A invalidação usa um número de versão no cache compartilhado
+(CATALOG_VERSION_KEY). setup_permissions, create_custom_permissions e os
+signals de Role/SystemModule/Permission incrementam a versão e todos os
+workers remontam o catálogo na próxima leitura. Cada worker reutiliza a
+versão lida por PERMISSION_CATALOG_VERSION_TTL segundos: sem Redis o cache
+é a tabela django_cache, e conferir a versão a cada has_perm seria uma
+consulta por checagem. O worker que fez a alteração remonta na hora; os
+demais enxergam a nova versão em até TTL segundos.
+
+Conteúdo:
+    - modules: módulos ativos, na ordem do menu, com as permissões de cada um;
+    - module_actions: {código do módulo: {codename: id da permissão}};
+    - perm_bits: {'app_label.codename': bit} (ver users/permission_bits.py);
+    - role_bits: {id do cargo: bitset (int) das permissões do cargo};
+    - roles_granting(codename): cargos que concedem uma permissão
+      (ex.: quais cargos liberam view_all_units);
+    - perms_mask()/roles_mask(): máscaras usadas por User.has_perm,
+      has_any_perm, has_all_perms e has_any_role.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import transaction
+
+
+CATALOG_VERSION_KEY = 'permissions:catalog:version'
+
+_lock = threading.Lock()
+_catalog = None
+# Última versão lida do cache e quando (time.monotonic)
+_version = None
+_version_read_at = 0.0
+
+
+class PermissionCatalog:
+    def __init__(self, version, modules, permissions, permission_bits, roles):
+        self.version = version
+
+        # Bits estáveis (PermissionBit): os mesmos das máscaras gravadas em Role e User
+        self.perm_bits = {f'{app_label}.{codename}': index for index, app_label, codename in permission_bits}
+        self.id_by_codename = {data['codename']: permission_id for permission_id, data in permissions.items()}
+        self._masks = {}
+
+        self.modules = []
+        self.module_actions = {}
+        for module in modules:
+            module_permissions = []
+            for codename in module['codenames']:
+                permission_id = self.id_by_codename.get(codename)
+                if permission_id is not None:
+                    module_permissions.append({'id': permission_id, 'name': permissions[permission_id]['name'], 'codename': codename})
+            module_permissions.sort(key=lambda permission: permission['name'])
+            self.modules.append({
+                'code': module['code'],
+                'name': module['name'],
+                'icon': module['icon'],
+                'permissions': module_permissions,
+            })
+            self.module_actions[module['code']] = {
+                permission['codename']: permission['id'] for permission in module_permissions
+            }
+
+        # Apenas cargos ativos, como nas máscaras dos usuários
+        self.role_bits = {role_id: mask for role_id, code, bit, mask in roles}
+        self.role_bit_by_code = {code: bit for role_id, code, bit, mask in roles if bit is not None}
+
+    def perms_mask(self, perms):
+        """
+        Bitset das permissões ('app_label.codename'), memorizado por combinação
+        Permissões sem bit não foram concedidas a nenhum cargo, usuário ou grupo: ficam fora da máscara
+        e são devolvidas à parte, para has_all_perms negar
+        """
+        key = perms if isinstance(perms, (str, tuple)) else tuple(perms)
+        result = self._masks.get(key)
+        if result is None:
+            bits, unknown = 0, False
+            for perm in ((key,) if isinstance(key, str) else key):
+                bit = self.perm_bits.get(perm)
+                if bit is None:
+                    unknown = True
+                else:
+                    bits |= 1 << bit
+            result = self._masks[key] = (bits, unknown)
+        return result
+
+    def roles_mask(self, codes):
+        """Bitset dos cargos pelos códigos (cargos inativos ou inexistentes ficam de fora)"""
+        bits = 0
+        for code in codes:
+            bit = self.role_bit_by_code.get(code)
+            if bit is not None:
+                bits |= 1 << bit
+        return bits
+
+    def roles_granting(self, codename, role_ids=None):
+        """Ids dos cargos (opcionalmente entre `role_ids`) que concedem a permissão (app users)"""
+        bits, _ = self.perms_mask(f'users.{codename}')
+        if not bits:
+            return []
+        candidates = self.role_bits if role_ids is None else [int(role_id) for role_id in role_ids]
+        return [role_id for role_id in candidates if self.role_bits.get(role_id, 0) & bits]
+
+
+def _build(version):
+    from .models import PermissionBit, Role, SystemModule
+    from .permissions import SYSTEM_MODULES
+
+    permissions = {
+        permission_id: {'codename': codename, 'name': name}
+        for permission_id, codename, name in Permission.objects.filter(
+            content_type__app_label='users'
+        ).values_list('id', 'codename', 'name')
+    }
+    modules = [
+        {
+            'code': code,
+            'name': name,
+            'icon': icon,
+            # Permissões do módulo conforme a definição em users/permissions.py
+            'codenames': [codename for codename, _ in SYSTEM_MODULES.get(code, {}).get('permissions', [])],
+        }
+        for code, name, icon in SystemModule.objects.filter(is_active=True).order_by('order').values_list('code', 'name', 'icon')
+    ]
+    permission_bits = PermissionBit.objects.values_list(
+        'index', 'permission__content_type__app_label', 'permission__codename'
+    )
+    roles = Role.objects.filter(is_active=True).values_list('id', 'code', 'bit', 'permission_mask')
+
+    return PermissionCatalog(version, modules, permissions, permission_bits, roles)
+
+
+def get_catalog_version():
+    """Versão do catálogo, lida do cache compartilhado no máximo a cada PERMISSION_CATALOG_VERSION_TTL segundos"""
+    global _version, _version_read_at
+    now = time.monotonic()
+    if _version is not None and now - _version_read_at < settings.PERMISSION_CATALOG_VERSION_TTL:
+        return _version
+
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(CATALOG_VERSION_KEY, version, None)
+    _version, _version_read_at = version, now
+    return version
+
+
+def get_catalog():
+    """Catálogo do processo, remontado apenas quando a versão muda"""
+    global _catalog
+    version = get_catalog_version()
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        with _lock:
+            if _catalog is None or _catalog.version != version:
+                _catalog = _build(version)
+            catalog = _catalog
+    return catalog
+
+
+def _bump_catalog_version():
+    global _version
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 2, None)
+    # Este worker relê a versão na próxima checagem
+    _version = None
+
+
+def invalidate_catalog():
+    """
+    Invalida o catálogo em todos os workers
+    A versão só muda após o commit: antes disso outro worker remontaria o catálogo com os dados antigos
+    """
+    global _catalog
+    _catalog = None
+    transaction.on_commit(_bump_catalog_version)
@@ -1,4 +1,5 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.http import HttpResponseForbidden
@@ -15,6 +16,18 @@ def permission_required(permission, message=None, redirect_url='home'):
         redirect_url (str): URL para redirecionamento em caso de erro
     """
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            # Views async: a checagem pode consultar o banco (catálogo de permissões), então roda numa thread
+            @wraps(view_func)
+            @login_required
+            async def _wrapped_async_view(request, *args, **kwargs):
+                if not await sync_to_async(request.user.has_perm)(permission):
+                    error_message = message or 'Você não tem permissão para esta ação.'
+                    messages.error(request, error_message)
+                    return redirect(redirect_url)
+                return await view_func(request, *args, **kwargs)
+            return _wrapped_async_view
+
         @wraps(view_func)
         @login_required
         def _wrapped_view(request, *args, **kwargs):
@@ -52,9 +65,8 @@ def role_required(role_codes, message=None, redirect_url='home'):
         @wraps(view_func)
         @login_required
         def _wrapped_view(request, *args, **kwargs):
-            user_role_codes = list(request.user.roles.filter(is_active=True).values_list('code', flat=True))
-            
-            if not any(role in role_codes for role in user_role_codes):
+            # AND entre User.role_mask e os bits dos cargos aceitos (sem consulta)
+            if not request.user.has_any_role(role_codes):
                 error_message = message or 'Seu cargo não tem acesso a esta funcionalidade.'
                 messages.error(request, error_message)
                 return redirect(redirect_url)
@@ -98,7 +110,7 @@ def any_permission_required(permissions, message=None, redirect_url='home'):
         @wraps(view_func)
         @login_required
         def _wrapped_view(request, *args, **kwargs):
-            if not any(request.user.has_perm(perm) for perm in permissions):
+            if not request.user.has_any_perm(permissions):
                 error_message = message or 'Você não tem as permissões necessárias para esta ação.'
                 messages.error(request, error_message)
                 return redirect(redirect_url)
@@ -119,7 +131,7 @@ def all_permissions_required(permissions, message=None, redirect_url='home'):
         @wraps(view_func)
         @login_required
         def _wrapped_view(request, *args, **kwargs):
-            if not all(request.user.has_perm(perm) for perm in permissions):
+            if not request.user.has_all_perms(permissions):
                 error_message = message or 'Você não tem todas as permissões necessárias para esta ação.'
                 messages.error(request, error_message)
                 return redirect(redirect_url)
@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class BitmaskField(models.Field):
+    """
+    Inteiro sem sinal de tamanho arbitrário (bitset de permissões/cargos)
+
+    Guardado em hexadecimal: as permissões customizadas já passam de 64 e não
+    cabem em um BigIntegerField. No Python o valor é sempre um int, pronto
+    para operações bit a bit (mask & bits).
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 128)  # até 512 bits
+        kwargs.setdefault('default', 0)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('max_length') == 128:
+            del kwargs['max_length']
+        if kwargs.get('default') == 0:
+            del kwargs['default']
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        # Coluna varchar(max_length), sem os validadores de texto do CharField
+        return 'CharField'
+
+    @property
+    def max_bits(self):
+        return self.max_length * 4
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        return int(value or '0', 16)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        value = self.to_python(value)
+        if value < 0 or value.bit_length() > self.max_bits:
+            raise ValueError(f'Bitmask fora do intervalo de {self.max_bits} bits')
+        return format(value, 'x')
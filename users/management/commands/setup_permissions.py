@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from users.permissions import create_custom_permissions, create_system_modules, create_default_roles
+from users.catalog import invalidate_catalog
+from users.permission_bits import rebuild_permission_masks
+from users.permissions import create_custom_permissions, create_system_modules, create_default_roles, custom_permission_codenames
 
 class Command(BaseCommand):
     help = 'Configura permissões customizadas, módulos e roles do sistema'
@@ -47,6 +49,13 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write('• Cargos já existem (permissões atualizadas)')
 
+                # Recalcula as máscaras de permissões de cargos e usuários
+                self.stdout.write('Recalculando máscaras de permissões...')
+                rebuild_permission_masks(custom_permission_codenames())
+
+                # Workers remontam o catálogo de permissões na próxima requisição (após o commit)
+                invalidate_catalog()
+
                 self.stdout.write(
                     self.style.SUCCESS('\n🎉 Sistema de permissões configurado com sucesso!')
                 )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:53
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay, ExtractMonth
+
+
+def fill_birthday_key(apps, schema_editor):
+    """Preenche a chave de aniversário (mês * 100 + dia) com um único UPDATE"""
+    User = apps.get_model('users', 'User')
+    User.objects.filter(date_of_birth__isnull=False).update(
+        birthday_key=ExtractMonth('date_of_birth') * 100 + ExtractDay('date_of_birth')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('enterprises', '0005_birthday_key'),
+        ('units', '0002_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='birthday_key',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Chave de Aniversário'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['enterprise', 'birthday_key'], name='user_birthday_idx'),
+        ),
+        migrations.RunPython(fill_birthday_key, migrations.RunPython.noop),
+    ]
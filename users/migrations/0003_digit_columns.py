@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def only_digits(value):
+    return ''.join(filter(str.isdigit, value or '')) or None
+
+
+def fill_digit_columns(apps, schema_editor):
+    """
+    Preenche cpf_digits/phone_digits em lotes
+    Antes de gravar, procura CPFs repetidos entre usuários (mesmos dígitos com outra formatação):
+    a constraint única falharia no meio do lote, então a migração para com a lista para correção manual
+    """
+    User = apps.get_model('users', 'User')
+    rows = [
+        (pk, only_digits(cpf), only_digits(phone))
+        for pk, cpf, phone in User.objects.values_list('pk', 'cpf', 'phone').iterator()
+    ]
+
+    seen, duplicates = {}, []
+    for pk, cpf_digits, _ in rows:
+        if cpf_digits is None:
+            continue
+        key = cpf_digits
+        if key in seen:
+            duplicates.append(f'{cpf_digits} (ids {seen[key]} e {pk})')
+        else:
+            seen[key] = pk
+    if duplicates:
+        raise RuntimeError(
+            'CPFs repetidos entre usuários; corrija antes de migrar: ' + ', '.join(duplicates[:50])
+        )
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        User.objects.bulk_update(
+            [
+                User(pk=pk, cpf_digits=cpf_digits, phone_digits=phone_digits)
+                for pk, cpf_digits, phone_digits in rows[start:start + BATCH_SIZE]
+            ],
+            ['cpf_digits', 'phone_digits'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('enterprises', '0006_digit_columns'),
+        ('units', '0002_initial'),
+        ('users', '0002_birthday_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='cpf_digits',
+            field=models.CharField(blank=True, editable=False, max_length=14, null=True, verbose_name='CPF (dígitos)'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, verbose_name='Telefone (dígitos)'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone_digits'], name='user_phone_digits_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(condition=models.Q(('cpf_digits__isnull', False)), fields=('cpf_digits',), name='user_unique_cpf_digits'),
+        ),
+        migrations.RunPython(fill_digit_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:11
+
+import django.db.models.deletion
+import users.fields
+from users.permission_bits import rebuild_permission_masks
+from users.permissions import custom_permission_codenames
+from django.db import migrations, models
+
+
+def fill_permission_bits(apps, schema_editor):
+    """Bits das permissões e cargos existentes e máscaras de todos os cargos e usuários"""
+    rebuild_permission_masks(custom_permission_codenames(), apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_digit_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='role',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Bit do Cargo'),
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='permission_mask',
+            field=users.fields.BitmaskField(editable=False, verbose_name='Máscara de Permissões'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='permission_mask',
+            field=users.fields.BitmaskField(editable=False, verbose_name='Máscara de Permissões'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='role_mask',
+            field=users.fields.BitmaskField(editable=False, verbose_name='Máscara de Cargos'),
+        ),
+        migrations.CreateModel(
+            name='PermissionBit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(unique=True, verbose_name='Bit')),
+                ('permission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bit', to='auth.permission', verbose_name='Permissão')),
+            ],
+            options={
+                'verbose_name': 'Bit de Permissão',
+                'verbose_name_plural': 'Bits de Permissões',
+                'ordering': ['index'],
+            },
+        ),
+        migrations.RunPython(fill_permission_bits, migrations.RunPython.noop),
+    ]
@@ -72,10 +72,7 @@ class RoleRequiredMixin(LoginRequiredMixin):
             raise AttributeError(
                 'RoleRequiredMixin requires role_codes to be set'
             )
-        user_role_codes = list(
-            self.request.user.roles.filter(is_active=True).values_list('code', flat=True)
-        )
-        return any(role in self.role_codes for role in user_role_codes)
+        return self.request.user.has_any_role(self.role_codes)
 
     def handle_no_permission(self):
         messages.error(self.request, self.permission_denied_message)
@@ -102,9 +99,9 @@ class MultiplePermissionsRequiredMixin(LoginRequiredMixin):
             )
         
         if self.require_all_permissions:
-            return all(self.request.user.has_perm(perm) for perm in self.permissions_required)
+            return self.request.user.has_all_perms(self.permissions_required)
         else:
-            return any(self.request.user.has_perm(perm) for perm in self.permissions_required)
+            return self.request.user.has_any_perm(self.permissions_required)
 
     def handle_no_permission(self):
         messages.error(self.request, self.permission_denied_message)
@@ -3,6 +3,9 @@ from django.db import models
 from units.models import Unit
 from django.utils import timezone
 from enterprises.models import Enterprise
+from core.birthdays import birthday_key
+from core.digits import digits_or_none
+from .fields import BitmaskField
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Permission
 
@@ -39,6 +42,9 @@ class Role(models.Model):
         verbose_name="Permissões",
         help_text="Permissões padrão deste cargo"
     )
+    # Bit do cargo em User.role_mask e permissões do cargo em bitset (ver users/permission_bits.py)
+    bit = models.PositiveSmallIntegerField(unique=True, null=True, blank=True, editable=False, verbose_name="Bit do Cargo")
+    permission_mask = BitmaskField(editable=False, verbose_name="Máscara de Permissões")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -50,6 +56,33 @@ class Role(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            last = Role.objects.aggregate(last=models.Max('bit'))['last']
+            self.bit = 0 if last is None else last + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding:
+            # A máscara é mantida pelos signals de m2m; um save comum não deve sobrescrevê-la
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'permission_mask'
+            ]
+        super().save(*args, **kwargs)
+
+
+class PermissionBit(models.Model):
+    """Índice de bit estável de cada permissão customizada (nunca reaproveitado)"""
+    permission = models.OneToOneField(Permission, on_delete=models.CASCADE, related_name='bit', verbose_name="Permissão")
+    index = models.PositiveSmallIntegerField(unique=True, verbose_name="Bit")
+
+    class Meta:
+        verbose_name = "Bit de Permissão"
+        verbose_name_plural = "Bits de Permissões"
+        ordering = ['index']
+
+    def __str__(self):
+        return f"{self.index}: {self.permission.codename}"
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, name, phone=None, password=None, enterprise=None, **extra_fields):
         if not email:
@@ -83,6 +116,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True, null=True, verbose_name="Email")
     cpf = models.CharField(max_length=14, unique=True, null=True, verbose_name="CPF")
     phone = models.CharField(max_length=20, null=True, verbose_name="Telefone")
+    # Somente dígitos de cpf/phone, mantidos no save() (ver core/digits.py)
+    cpf_digits = models.CharField(max_length=14, null=True, blank=True, editable=False, verbose_name="CPF (dígitos)")
+    phone_digits = models.CharField(max_length=20, null=True, blank=True, editable=False, verbose_name="Telefone (dígitos)")
     theme_preference = models.CharField(
         max_length=10, 
         choices=THEME_CHOICES, 
@@ -107,59 +143,105 @@ class User(AbstractBaseUser, PermissionsMixin):
         help_text="Permissões específicas além das do cargo"
     )
     date_of_birth = models.DateField(null=True, blank=True, verbose_name="Data de Nascimento")
+    # Mês * 100 + dia de date_of_birth, mantido no save() (ver core/birthdays.py)
+    birthday_key = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, verbose_name="Chave de Aniversário")
     profile_image = models.ImageField(upload_to=user_directory_path, blank=True, null=True, verbose_name="Imagem de Perfil")
     enterprise = models.ForeignKey(Enterprise, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Empresa")
     units = models.ManyToManyField(Unit, blank=True, related_name='users', verbose_name="Unidades")
     is_active = models.BooleanField(default=True, verbose_name="Ativo")
     is_staff = models.BooleanField(default=False, verbose_name="Django Staff")
+    # Permissões efetivas e cargos ativos em bitset, mantidos pelos signals de m2m (ver users/permission_bits.py)
+    permission_mask = BitmaskField(editable=False, verbose_name="Máscara de Permissões")
+    role_mask = BitmaskField(editable=False, verbose_name="Máscara de Cargos")
 
     objects = CustomUserManager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['enterprise', 'birthday_key'], name='user_birthday_idx'),
+            models.Index(fields=['phone_digits'], name='user_phone_digits_idx'),
+        ]
+        constraints = [
+            # cpf já é único; a constraint nos dígitos também impede o mesmo CPF com outra formatação
+            models.UniqueConstraint(
+                fields=['cpf_digits'],
+                condition=models.Q(cpf_digits__isnull=False),
+                name='user_unique_cpf_digits',
+            ),
+        ]
+
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        self.birthday_key = birthday_key(self.date_of_birth)
+        self.cpf_digits = digits_or_none(self.cpf)
+        self.phone_digits = digits_or_none(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'date_of_birth': 'birthday_key', 'cpf': 'cpf_digits', 'phone': 'phone_digits'}
+            kwargs['update_fields'] = {*update_fields, *(derived[field] for field in update_fields if field in derived)}
+        elif not self._state.adding:
+            # As máscaras são mantidas pelos signals de m2m; um save comum (instância carregada antes
+            # de uma troca de cargos) não deve sobrescrevê-las
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('permission_mask', 'role_mask')
+            ]
+        super().save(*args, **kwargs)
     
+    def _permission_catalog(self):
+        """Catálogo de bits (users/catalog.py), memorizado na instância: uma leitura de cache por requisição"""
+        catalog = self.__dict__.get('_catalog')
+        if catalog is None:
+            from .catalog import get_catalog
+            catalog = self._catalog = get_catalog()
+        return catalog
+
     def get_all_permissions(self, obj=None):
         """Retorna todas as permissões do usuário (roles + customizadas + padrão Django)"""
         permissions = set(super().get_all_permissions(obj))
-        
-        # Adiciona permissões dos roles
-        for role in self.roles.filter(is_active=True):
-            for perm in role.permissions.all():
-                permissions.add(f"{perm.content_type.app_label}.{perm.codename}")
-        
-        # Adiciona permissões customizadas
-        for perm in self.custom_permissions.all():
-            permissions.add(f"{perm.content_type.app_label}.{perm.codename}")
-            
+        if self.is_active:
+            mask = self.permission_mask
+            permissions.update(perm for perm, bit in self._permission_catalog().perm_bits.items() if mask >> bit & 1)
         return permissions
     
     def has_perm(self, perm, obj=None):
         """
-        Sobrescreve o método has_perm para incluir permissões dos roles
+        Permissões de cargos, customizadas, do Django e de grupos em um único AND de bits
+        (User.permission_mask, ver users/permission_bits.py)
         """
-        # Primeiro verifica com o método padrão Django
-        if super().has_perm(perm, obj):
+        if not self.is_active:
+            return False
+        if self.is_superuser:
             return True
-            
-        # Se não tem pelo Django padrão, verifica nos roles
+        bits, _ = self._permission_catalog().perms_mask(perm)
+        return bool(self.permission_mask & bits)
+
+    def has_any_perm(self, perms):
+        """Tem pelo menos uma das permissões"""
         if not self.is_active:
             return False
-            
-        # Verifica se tem a permissão nos roles
-        for role in self.roles.filter(is_active=True):
-            for permission in role.permissions.all():
-                if f"{permission.content_type.app_label}.{permission.codename}" == perm:
-                    return True
-        
-        # Verifica se tem a permissão nas customizadas
-        for permission in self.custom_permissions.all():
-            if f"{permission.content_type.app_label}.{permission.codename}" == perm:
-                return True
-                
-        return False
+        if self.is_superuser:
+            return True
+        bits, _ = self._permission_catalog().perms_mask(perms)
+        return bool(self.permission_mask & bits)
+
+    def has_all_perms(self, perms):
+        """Tem todas as permissões"""
+        if not self.is_active:
+            return False
+        if self.is_superuser:
+            return True
+        bits, unknown = self._permission_catalog().perms_mask(perms)
+        return not unknown and self.permission_mask & bits == bits
+
+    def has_any_role(self, role_codes):
+        """Tem pelo menos um dos cargos (ativos)"""
+        return self.is_active and bool(self.role_mask & self._permission_catalog().roles_mask(role_codes))
     
     def has_module_permission(self, module_code, action):
         """Verifica se o usuário tem permissão para uma ação em um módulo específico"""
@@ -0,0 +1,208 @@
+"""
+Menu lateral (sidebar) montado a partir do conjunto de permissões do usuário
+
+O menu é calculado em uma única passada sobre as permissões efetivas
+(cargos + customizadas + padrão Django) e o HTML renderizado fica em cache,
+com chave por empresa, hash do conjunto de permissões e tema. Usuários com a
+mesma combinação de cargos compartilham o mesmo fragmento.
+
+O item ativo depende da URL, então não entra no cache: cada <li> carrega
+os caminhos que o ativam (data-nav-exact / data-nav-prefix) e um script
+no base.html aplica a classe menu-active.
+
+Qualquer alteração em Role, SystemModule ou nas permissões/cargos de um
+usuário incrementa a versão do menu (ver users/signals.py), invalidando
+todos os fragmentos de uma vez.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+from django.template import loader
+from django.urls import reverse
+
+
+VERSION_KEY = 'navigation:version'
+
+# Cargos que liberam itens específicos do menu (além das permissões)
+MENU_ROLES = {'ceo'}
+
+
+def _item(label, icon, url, perm=None, exact=None, prefix=(), role=None, css='menu-color'):
+    return {
+        'label': label,
+        'icon': icon,
+        'url': url,
+        'perm': perm,
+        'role': role,
+        'exact': (url,) if exact is None else exact,
+        'prefix': prefix,
+        'css': css,
+    }
+
+
+# Estrutura do menu: (título, permissões que exibem a seção, itens)
+# Seção sem permissões é sempre exibida
+MENU = [
+    (None, None, [
+        _item('Inicio', 'fa-solid fa-house', '/', css=''),
+    ]),
+    ('PROJETOS', ('users.view_projects', 'users.add_projects', 'users.change_projects'), [
+        _item('Esteira de Projetos', 'fa-solid fa-chart-gantt', '/projects/conveyor/', 'users.view_projects', css=''),
+        _item('Seus Projetos', 'fa-solid fa-folder-open', '/projects/projects-list/', 'users.view_projects',
+              prefix=('/projects/project-details/',), css=''),
+        _item('Criar Projeto', 'fa-solid fa-folder-plus', '/projects/create-project/', 'users.add_projects', css=''),
+    ]),
+    ('FINANCEIRO', ('users.view_project_payments', 'users.change_project_payments',
+                    'users.view_unit_financial_dashboard', 'users.view_financial'), [
+        _item('Confirmação de Pagamentos', 'fa-solid fa-chart-gantt', '/projects/conveyor-confirm-payments/',
+              'users.change_project_payments'),
+        _item('Pagamentos da Unidade', 'fa-solid fa-chart-gantt', '/projects/conveyor-payments/',
+              'users.view_project_payments'),
+        _item('Dashboard Financeiro', 'fa-solid fa-chart-pie', 'dashboard_financeiro',
+              'users.view_unit_financial_dashboard'),
+    ]),
+    ('CLIENTES', ('users.view_clients', 'users.add_clients', 'users.change_clients'), [
+        _item('Cadastrar Cliente', 'fa-solid fa-user-plus', '/enterprises/register_client/', 'users.add_clients', css=''),
+        _item('Listar Clientes', 'fa-solid fa-users', '/enterprises/list_clients/', 'users.view_clients',
+              prefix=('/enterprises/view-client/',), css=''),
+    ]),
+    ('EQUIPE', ('users.view_users', 'users.add_users', 'users.change_users'), [
+        _item('Cadastro de Equipe', 'fa-solid fa-user-plus', '/users/create-user/', 'users.add_users'),
+        _item('Listar Equipe', 'fa-solid fa-users', '/users/list-users/', 'users.view_users',
+              exact=(), prefix=('/users/list-users/', '/users/edit-user/')),
+    ]),
+    ('CADASTROS', ('users.view_units', 'users.view_banks', 'users.view_credit_lines', 'users.view_messages'), [
+        _item('Unidades', 'fa-solid fa-building', '/units/units-list/', 'users.view_units',
+              exact=('/units/units-list/', '/units/edit-unit/'), prefix=('/units/create-unit/',)),
+        _item('Bancos', 'fa-solid fa-landmark', '/projects/banks-list/', 'users.view_banks',
+              exact=('/projects/banks-list/', '/projects/bank-add/'), prefix=('/projects/bank-edit/',)),
+        _item('Linhas de Crédito', 'fa-solid fa-folder-tree', '/projects/credit-line-list/', 'users.view_credit_lines',
+              exact=('/projects/credit-line-list/', '/projects/credit-line-add/'),
+              prefix=('/projects/credit-line-edit/',)),
+        _item('Mensagens', 'fa-solid fa-message', '/enterprises/list-messages/', 'users.view_messages',
+              exact=('/enterprises/list-messages/', '/enterprises/new-message/'),
+              prefix=('/enterprises/edit-message/',)),
+    ]),
+    ('RELATÓRIOS', ('users.view_reports',), [
+        _item('Dashboard', 'fa-solid fa-chart-pie', '/reports/', 'users.view_reports'),
+        _item('Operações', 'fa-solid fa-chart-line', '/reports/operations/performance/', 'users.view_reports',
+              exact=(), prefix=('/reports/operations/',)),
+        _item('Clientes', 'fa-solid fa-users', '/reports/clients/indicators/', 'users.view_reports',
+              exact=(), prefix=('/reports/clients/',)),
+        _item('Desempenho', 'fa-solid fa-trophy', '/reports/performance/captadores/', 'users.view_reports',
+              exact=(), prefix=('/reports/performance/',)),
+        _item('Especiais', 'fa-solid fa-star', '/reports/special/aniversarios/', 'users.view_reports',
+              exact=(), prefix=('/reports/special/',)),
+    ]),
+    ('PERFIL', None, [
+        _item('Gerenciar Conta', 'fa-solid fa-user-gear', '/users/user-config/'),
+        _item('Gerenciar Empresa', 'fas fa-cog', '/users/enterprise-config/', role='ceo'),
+    ]),
+]
+
+
+def get_menu_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def bump_menu_version():
+    """Invalida todos os fragmentos de menu e conjuntos de permissões em cache"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def get_effective_permissions(user):
+    """
+    Conjunto de permissões efetivas (mesma regra de User.has_perm) sem percorrer cargo por cargo
+    Retorna (permissões, cargos relevantes para o menu)
+    """
+    if not user.is_active:
+        return frozenset(), frozenset()
+
+    role_codes = frozenset(user.roles.filter(is_active=True, code__in=MENU_ROLES).values_list('code', flat=True))
+
+    if user.is_superuser:
+        perms = Permission.objects.all()
+    else:
+        perms = Permission.objects.filter(
+            Q(role__users=user, role__is_active=True)
+            | Q(users_with_custom_permission=user)
+            | Q(user=user)
+            | Q(group__user=user)
+        ).distinct()
+
+    codes = frozenset(f"{app_label}.{codename}" for app_label, codename in perms.values_list('content_type__app_label', 'codename'))
+    return codes, role_codes
+
+
+def build_menu(perms, role_codes):
+    """Percorre a estrutura do menu uma única vez e retorna apenas as seções/itens visíveis"""
+    sections = []
+    for title, section_perms, items in MENU:
+        if section_perms and perms.isdisjoint(section_perms):
+            continue
+
+        visible = []
+        for item in items:
+            if item['perm'] and item['perm'] not in perms:
+                continue
+            if item['role'] and item['role'] not in role_codes:
+                continue
+            url = item['url'] if item['url'].startswith('/') else reverse(item['url'])
+            visible.append(dict(
+                item,
+                url=url,
+                exact=' '.join(url if path == item['url'] else path for path in item['exact']),
+                prefix=' '.join(item['prefix']),
+            ))
+
+        sections.append({'title': title, 'items': visible})
+    return sections
+
+
+def _permission_hash(perms, role_codes):
+    content = '|'.join(sorted(perms)) + '#' + ','.join(sorted(role_codes))
+    return hashlib.md5(content.encode()).hexdigest()
+
+
+def get_permission_hash(user, version):
+    """Hash do conjunto de permissões do usuário (em cache até a próxima mudança de cargos/permissões)"""
+    key = f'navigation:perms:{version}:{user.pk}:{int(user.is_superuser)}:{int(user.is_active)}'
+    permission_hash = cache.get(key)
+    if permission_hash is None:
+        perms, role_codes = get_effective_permissions(user)
+        permission_hash = _permission_hash(perms, role_codes)
+        cache.set(key, permission_hash, settings.NAVIGATION_CACHE_TIMEOUT)
+    return permission_hash
+
+
+def render_sidebar(user, enterprise=None):
+    """
+    HTML do menu lateral do usuário
+    Em cache hit não há checagem de permissão nem consulta às tabelas de cargos/permissões:
+    são três leituras do cache (versão, hash das permissões e HTML), que sem Redis
+    (DatabaseCache) são três consultas simples à tabela django_cache
+    """
+    version = get_menu_version()
+    enterprise_id = enterprise.pk if enterprise else 0
+    theme = user.theme_preference or 'light'
+    key = f'navigation:sidebar:{version}:{enterprise_id}:{get_permission_hash(user, version)}:{theme}'
+
+    html = cache.get(key)
+    if html is None:
+        perms, role_codes = get_effective_permissions(user)
+        html = loader.render_to_string('base/sidebar_menu.html', {
+            'sections': build_menu(perms, role_codes),
+            'enterprise': enterprise,
+        })
+        cache.set(key, html, settings.NAVIGATION_CACHE_TIMEOUT)
+    return html
@@ -0,0 +1,167 @@
+"""
+Bitsets de permissões e cargos (checagem de permissão em tempo constante)
+
+Cada permissão customizada (users/permissions.py) recebe um índice de bit
+estável (PermissionBit), e cada cargo recebe um bit próprio (Role.bit).
+Permissões padrão do Django ganham bit quando são vinculadas a um cargo,
+usuário ou grupo, então toda permissão concedida a alguém tem bit.
+Índices nunca são reaproveitados: novas permissões/cargos ganham o próximo
+índice livre, então as máscaras gravadas continuam válidas.
+
+Máscaras gravadas (BitmaskField):
+    - Role.permission_mask: permissões do cargo;
+    - User.permission_mask: cargos ativos + permissões customizadas +
+      user_permissions + permissões dos grupos;
+    - User.role_mask: cargos ativos do usuário.
+
+As máscaras são recalculadas pelos signals de m2m (users/signals.py) e
+por rebuild_permission_masks() (setup_permissions e migração). Com isso
+User.has_perm vira um AND entre inteiros, sem consultas e sem depender
+da quantidade de cargos do usuário.
+
+As funções recebem `apps` para também rodarem dentro de migrações.
+"""
+from django.apps import apps as global_apps
+from django.db.models import Max
+
+
+def _models(apps):
+    return (
+        apps.get_model('auth', 'Permission'),
+        apps.get_model('users', 'PermissionBit'),
+        apps.get_model('users', 'Role'),
+        apps.get_model('users', 'User'),
+    )
+
+
+def _invalidate_catalog(apps):
+    # O catálogo (users/catalog.py) guarda os bits e as máscaras dos cargos; em migrações não há catálogo
+    if apps is global_apps:
+        from .catalog import invalidate_catalog
+        invalidate_catalog()
+
+
+def _next_index(last):
+    return 0 if last is None else last + 1
+
+
+def _assign_bits(permissions, apps):
+    """Atribui o próximo bit livre às permissões do queryset que ainda não têm"""
+    Permission, PermissionBit, Role, User = _models(apps)
+    missing = list(permissions.filter(bit__isnull=True).order_by('id').values_list('id', flat=True))
+    if not missing:
+        return 0
+
+    next_index = _next_index(PermissionBit.objects.aggregate(last=Max('index'))['last'])
+    PermissionBit.objects.bulk_create([
+        PermissionBit(permission_id=permission_id, index=index)
+        for index, permission_id in enumerate(missing, next_index)
+    ])
+    _invalidate_catalog(apps)
+    return len(missing)
+
+
+def assign_permission_bits(codenames, apps=global_apps):
+    """Bits das permissões customizadas (app users)"""
+    Permission, PermissionBit, Role, User = _models(apps)
+    return _assign_bits(Permission.objects.filter(content_type__app_label='users', codename__in=list(codenames)), apps)
+
+
+def _ensure_bits(permission_ids, apps):
+    """Garante bit para permissões vinculadas a cargos/usuários/grupos e retorna {permission_id: bit}"""
+    Permission, PermissionBit, Role, User = _models(apps)
+    bits = permission_bit_map(apps)
+    if set(permission_ids) - bits.keys():
+        _assign_bits(Permission.objects.filter(pk__in=list(set(permission_ids) - bits.keys())), apps)
+        bits = permission_bit_map(apps)
+    return bits
+
+
+def assign_role_bits(apps=global_apps):
+    """Atribui bits aos cargos que ainda não têm (cargos criados antes dos bitsets)"""
+    Permission, PermissionBit, Role, User = _models(apps)
+    next_index = _next_index(Role.objects.aggregate(last=Max('bit'))['last'])
+    roles = list(Role.objects.filter(bit=None).order_by('id').only('id'))
+    for index, role in enumerate(roles, next_index):
+        role.bit = index
+    Role.objects.bulk_update(roles, ['bit'])
+
+
+def permission_bit_map(apps=global_apps):
+    """{permission_id: índice do bit}"""
+    Permission, PermissionBit, Role, User = _models(apps)
+    return dict(PermissionBit.objects.values_list('permission_id', 'index'))
+
+
+def refresh_role_masks(role_ids=None, refresh_users=True, apps=global_apps):
+    """Recalcula Role.permission_mask e, em seguida, as máscaras dos usuários desses cargos"""
+    Permission, PermissionBit, Role, User = _models(apps)
+
+    roles = Role.objects.all() if role_ids is None else Role.objects.filter(pk__in=list(role_ids))
+    masks = {role_id: 0 for role_id in roles.values_list('pk', flat=True)}
+    if not masks:
+        return
+    links = list(Role.permissions.through.objects.filter(role_id__in=list(masks)).values_list('role_id', 'permission_id'))
+    bits = _ensure_bits([permission_id for _, permission_id in links], apps)
+    for role_id, permission_id in links:
+        masks[role_id] |= 1 << bits[permission_id]
+
+    Role.objects.bulk_update(
+        [Role(pk=role_id, permission_mask=mask) for role_id, mask in masks.items()],
+        ['permission_mask'],
+    )
+    _invalidate_catalog(apps)
+    if refresh_users:
+        user_ids = User.roles.through.objects.filter(role_id__in=list(masks)).values_list('user_id', flat=True)
+        refresh_user_masks(set(user_ids), apps=apps)
+
+
+def refresh_user_masks(user_ids=None, apps=global_apps):
+    """
+    Recalcula User.permission_mask e User.role_mask em lote
+    Retorna {user_id: (permission_mask, role_mask)}
+    """
+    Permission, PermissionBit, Role, User = _models(apps)
+
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=list(user_ids))
+    masks = {user_id: [0, 0] for user_id in users.values_list('pk', flat=True)}
+    if not masks:
+        return {}
+    ids = list(masks)
+
+    # Cargos ativos: máscara de permissões do cargo + bit do cargo
+    role_links = User.roles.through.objects.filter(user_id__in=ids, role__is_active=True).values_list(
+        'user_id', 'role__permission_mask', 'role__bit'
+    )
+    for user_id, role_mask, role_bit in role_links:
+        masks[user_id][0] |= role_mask or 0
+        if role_bit is not None:
+            masks[user_id][1] |= 1 << role_bit
+
+    # Permissões diretas: customizadas, do Django e dos grupos
+    direct_links = [
+        *User.custom_permissions.through.objects.filter(user_id__in=ids).values_list('user_id', 'permission_id'),
+        *User.user_permissions.through.objects.filter(user_id__in=ids).values_list('user_id', 'permission_id'),
+        *User.groups.through.objects.filter(user_id__in=ids, group__permissions__isnull=False).values_list(
+            'user_id', 'group__permissions'
+        ),
+    ]
+    bits = _ensure_bits([permission_id for _, permission_id in direct_links], apps)
+    for user_id, permission_id in direct_links:
+        masks[user_id][0] |= 1 << bits[permission_id]
+
+    User.objects.bulk_update(
+        [User(pk=user_id, permission_mask=permission_mask, role_mask=role_mask)
+         for user_id, (permission_mask, role_mask) in masks.items()],
+        ['permission_mask', 'role_mask'],
+        batch_size=1000,
+    )
+    return {user_id: tuple(mask) for user_id, mask in masks.items()}
+
+
+def rebuild_permission_masks(codenames, apps=global_apps):
+    """Atribui bits que faltam e recalcula todas as máscaras (setup_permissions e migração)"""
+    assign_permission_bits(codenames, apps=apps)
+    assign_role_bits(apps=apps)
+    refresh_role_masks(refresh_users=False, apps=apps)
+    refresh_user_masks(apps=apps)
@@ -298,6 +298,10 @@ DEFAULT_ROLES = {
     }
 }
 
+def custom_permission_codenames():
+    """Codenames de todas as permissões customizadas, na ordem dos módulos"""
+    return [perm_code for module_data in SYSTEM_MODULES.values() for perm_code, _ in module_data['permissions']]
+
 def create_custom_permissions():
     """Cria as permissões customizadas do sistema"""
     from users.models import User
@@ -317,6 +321,14 @@ def create_custom_permissions():
             if created:
                 created_permissions.append(permission)
     
+    # Bit estável para cada permissão nova (users/permission_bits.py)
+    from users.permission_bits import assign_permission_bits
+    assign_permission_bits(custom_permission_codenames())
+
+    # get_or_create de permissões existentes não dispara post_save
+    from users.catalog import invalidate_catalog
+    invalidate_catalog()
+    
     return created_permissions
 
 def create_system_modules():
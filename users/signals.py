@@ -0,0 +1,119 @@
+"""
+Invalidação do menu lateral em cache (users.navigation) e do catálogo de permissões (users.catalog)
+Qualquer mudança em cargos, módulos ou permissões de usuários gera uma nova versão
+
+Também mantém as máscaras de permissões/cargos (users.permission_bits) a cada
+mudança nos vínculos m2m de cargos, usuários e grupos.
+"""
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import Role, SystemModule, User
+from .navigation import bump_menu_version
+from .permission_bits import refresh_role_masks, refresh_user_masks
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=SystemModule)
+def invalidate_menu_on_change(sender, **kwargs):
+    bump_menu_version()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+@receiver(m2m_changed, sender=User.roles.through)
+@receiver(m2m_changed, sender=User.custom_permissions.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_menu_on_permissions_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_menu_version()
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=SystemModule)
+@receiver([post_save, post_delete], sender=Permission)
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_catalog()
+
+
+# ==================== MÁSCARAS DE PERMISSÕES ====================
+
+def _changed_ids(sender, instance, action, reverse, pk_set, owner, other):
+    """
+    Ids do lado `owner` da relação afetados pela mudança (None se não há o que recalcular)
+    No clear pelo lado reverso (ex.: role.users.clear()) os ids são lidos antes, no pre_clear
+    """
+    if action == 'pre_clear' and reverse:
+        instance._mask_cleared_ids = list(
+            sender.objects.filter(**{f'{other}_id': instance.pk}).values_list(f'{owner}_id', flat=True)
+        )
+        return None
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return None
+    if not reverse:
+        return [instance.pk]
+    if action == 'post_clear':
+        return instance.__dict__.pop('_mask_cleared_ids', [])
+    return list(pk_set or [])
+
+
+def _refresh_users(user_ids, instance, reverse):
+    masks = refresh_user_masks(user_ids)
+    # Atualiza também a instância em memória (ex.: new_user.roles.set(...) seguido de has_perm)
+    if not reverse and instance.pk in masks:
+        instance.permission_mask, instance.role_mask = masks[instance.pk]
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def refresh_masks_on_role_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    role_ids = _changed_ids(sender, instance, action, reverse, pk_set, 'role', 'permission')
+    if role_ids:
+        refresh_role_masks(role_ids)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def refresh_masks_on_user_roles_change(sender, instance, action, reverse, pk_set, **kwargs):
+    user_ids = _changed_ids(sender, instance, action, reverse, pk_set, 'user', 'role')
+    if user_ids:
+        _refresh_users(user_ids, instance, reverse)
+
+
+@receiver(m2m_changed, sender=User.custom_permissions.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def refresh_masks_on_user_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    user_ids = _changed_ids(sender, instance, action, reverse, pk_set, 'user', 'permission')
+    if user_ids:
+        _refresh_users(user_ids, instance, reverse)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def refresh_masks_on_user_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    user_ids = _changed_ids(sender, instance, action, reverse, pk_set, 'user', 'group')
+    if user_ids:
+        _refresh_users(user_ids, instance, reverse)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def refresh_masks_on_group_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    group_ids = _changed_ids(sender, instance, action, reverse, pk_set, 'group', 'permission')
+    if group_ids:
+        refresh_user_masks(set(User.groups.through.objects.filter(group_id__in=group_ids).values_list('user_id', flat=True)))
+
+
+@receiver(post_save, sender=Role)
+def refresh_masks_on_role_change(sender, instance, created, **kwargs):
+    # Ativar/desativar um cargo muda as permissões de todos os seus usuários
+    if not created:
+        refresh_role_masks([instance.pk])
+
+
+@receiver(pre_delete, sender=Role)
+def remember_role_users(sender, instance, **kwargs):
+    instance._mask_user_ids = list(instance.users.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Role)
+def refresh_masks_on_role_delete(sender, instance, **kwargs):
+    refresh_user_masks(instance.__dict__.get('_mask_user_ids', []))
@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from users.navigation import render_sidebar
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def sidebar_menu(context):
+    """
+    Menu lateral do usuário logado (fragmento em cache por empresa/permissões/tema)
+    Uso: {% sidebar_menu %}
+    """
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return ''
+    return mark_safe(render_sidebar(user, context.get('enterprise')))
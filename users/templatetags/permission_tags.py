@@ -21,8 +21,7 @@ def has_any_perm(user, permissions):
     """
     if not user or not user.is_authenticated:
         return False
-    perm_list = permissions.split(',')
-    return any(user.has_perm(perm.strip()) for perm in perm_list)
+    return user.has_any_perm(tuple(perm.strip() for perm in permissions.split(',')))
 
 @register.filter
 def has_all_perms(user, permissions):
@@ -32,8 +31,7 @@ def has_all_perms(user, permissions):
     """
     if not user or not user.is_authenticated:
         return False
-    perm_list = permissions.split(',')
-    return all(user.has_perm(perm.strip()) for perm in perm_list)
+    return user.has_all_perms(tuple(perm.strip() for perm in permissions.split(',')))
 
 @register.filter
 def has_role(user, role_code):
@@ -43,7 +41,7 @@ def has_role(user, role_code):
     """
     if not user or not user.is_authenticated:
         return False
-    return user.roles.filter(code=role_code, is_active=True).exists()
+    return user.has_any_role((role_code,))
 
 @register.filter
 def has_any_role(user, role_codes):
@@ -53,8 +51,7 @@ def has_any_role(user, role_codes):
     """
     if not user or not user.is_authenticated:
         return False
-    codes = role_codes.split(',')
-    return user.roles.filter(code__in=[code.strip() for code in codes], is_active=True).exists()
+    return user.has_any_role(tuple(code.strip() for code in role_codes.split(',')))
 
 @register.simple_tag
 def user_permissions(user):
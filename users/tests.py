@@ -1,3 +1,211 @@
+from django.contrib.auth.models import Group, Permission
 from django.test import TestCase
 
-# Create your tests here.
+from .catalog import invalidate_catalog
+from .models import Role, User
+from .permissions import create_custom_permissions
+
+
+def legacy_permissions(user):
+    """Permissões efetivas pela regra anterior aos bitsets: backend do Django + cargo a cargo + customizadas"""
+    user = User.objects.get(pk=user.pk)
+    if not user.is_active:
+        return set()
+
+    def names(permissions):
+        return {f'{permission.content_type.app_label}.{permission.codename}' for permission in permissions.select_related('content_type')}
+
+    permissions = names(Permission.objects.filter(user=user))
+    permissions |= names(Permission.objects.filter(group__user=user))
+    for role in user.roles.filter(is_active=True):
+        permissions |= names(role.permissions.all())
+    permissions |= names(user.custom_permissions.all())
+    return permissions
+
+
+def legacy_roles(user):
+    user = User.objects.get(pk=user.pk)
+    if not user.is_active:
+        return set()
+    return set(user.roles.filter(is_active=True).values_list('code', flat=True))
+
+
+class PermissionMaskTests(TestCase):
+    """
+    As máscaras (User.permission_mask/role_mask) mantidas pelos signals devem
+    responder exatamente como a checagem cargo a cargo que substituíram
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_custom_permissions()
+        users = Permission.objects.filter(content_type__app_label='users')
+        cls.view_projects = users.get(codename='view_projects')
+        cls.add_projects = users.get(codename='add_projects')
+        cls.view_clients = users.get(codename='view_clients')
+        cls.view_reports = users.get(codename='view_reports')
+        cls.view_all_units = users.get(codename='view_all_units')
+        # Permissões padrão do Django ganham bit quando concedidas
+        cls.django_view_group = Permission.objects.get(content_type__app_label='auth', codename='view_group')
+        cls.django_change_group = Permission.objects.get(content_type__app_label='auth', codename='change_group')
+
+        cls.checked = [
+            f'{permission.content_type.app_label}.{permission.codename}'
+            for permission in (
+                cls.view_projects, cls.add_projects, cls.view_clients, cls.view_reports,
+                cls.view_all_units, cls.django_view_group, cls.django_change_group,
+            )
+        ] + ['users.permissao_inexistente']
+
+    def setUp(self):
+        # O catálogo fica em memória no processo; cada teste parte do banco restaurado
+        invalidate_catalog()
+        self.manager = Role.objects.create(name='Gerente Teste', code='gerente_teste')
+        self.manager.permissions.add(self.view_projects, self.add_projects)
+        self.analyst = Role.objects.create(name='Analista Teste', code='analista_teste')
+        self.analyst.permissions.add(self.view_clients)
+        self.user = User.objects.create_user('ana@teste.com', 'Ana', password='x')
+        self.other = User.objects.create_user('bia@teste.com', 'Bia', password='x')
+
+    def assertMatchesLegacy(self, *users):
+        for user in users:
+            fresh = User.objects.get(pk=user.pk)
+            expected = legacy_permissions(fresh)
+            for perm in self.checked:
+                self.assertEqual(fresh.has_perm(perm), perm in expected, f'{fresh.email}: {perm}')
+            self.assertEqual(fresh.has_any_perm(self.checked), bool(expected & set(self.checked)), fresh.email)
+            for perms in (self.checked[:2], self.checked[2:4], self.checked[5:7], self.checked):
+                self.assertEqual(fresh.has_all_perms(perms), set(perms) <= expected, f'{fresh.email}: {perms}')
+            roles = legacy_roles(fresh)
+            for code in ('gerente_teste', 'analista_teste', 'cargo_inexistente'):
+                self.assertEqual(fresh.has_any_role([code]), code in roles, f'{fresh.email}: {code}')
+
+    def test_user_roles_add_remove_clear(self):
+        self.user.roles.add(self.manager)
+        self.assertTrue(self.user.has_perm('users.add_projects'))  # Instância em memória também atualizada
+        self.assertMatchesLegacy(self.user)
+
+        self.user.roles.add(self.analyst)
+        self.assertMatchesLegacy(self.user)
+
+        self.user.roles.remove(self.manager)
+        self.assertFalse(self.user.has_perm('users.add_projects'))
+        self.assertMatchesLegacy(self.user)
+
+        self.user.roles.set([self.manager, self.analyst])
+        self.assertMatchesLegacy(self.user)
+
+        self.user.roles.clear()
+        self.assertMatchesLegacy(self.user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('users.view_clients'))
+
+    def test_role_users_add_remove_clear(self):
+        self.manager.users.add(self.user, self.other)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.manager.users.remove(self.user)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.manager.users.add(self.user)
+        self.analyst.users.add(self.user)
+        self.manager.users.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('users.view_clients'))
+
+    def test_role_permissions_change(self):
+        self.user.roles.add(self.manager)
+        self.other.roles.add(self.manager, self.analyst)
+
+        self.manager.permissions.add(self.view_reports)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.manager.permissions.remove(self.view_projects)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        # Pelo lado da permissão
+        self.view_all_units.role_set.add(self.manager, self.analyst)
+        self.assertMatchesLegacy(self.user, self.other)
+        self.view_all_units.role_set.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.manager.permissions.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+
+    def test_role_deactivation_and_deletion(self):
+        self.user.roles.add(self.manager, self.analyst)
+        self.other.roles.add(self.manager)
+
+        self.manager.is_active = False
+        self.manager.save()
+        self.assertMatchesLegacy(self.user, self.other)
+        self.assertFalse(User.objects.get(pk=self.other.pk).has_perm('users.view_projects'))
+
+        self.manager.is_active = True
+        self.manager.save()
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.manager.delete()
+        self.assertMatchesLegacy(self.user, self.other)
+        self.assertFalse(User.objects.get(pk=self.other.pk).has_perm('users.view_projects'))
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('users.view_clients'))
+
+    def test_group_permissions(self):
+        group = Group.objects.create(name='Grupo Teste')
+        group.permissions.add(self.django_view_group, self.view_reports)
+
+        self.user.groups.add(group)
+        self.assertMatchesLegacy(self.user)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('auth.view_group'))
+
+        group.user_set.add(self.other)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        group.permissions.add(self.django_change_group)
+        group.permissions.remove(self.view_reports)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        group.permissions.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+
+        group.permissions.add(self.view_projects)
+        group.user_set.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+
+    def test_direct_and_custom_permissions(self):
+        self.user.user_permissions.add(self.django_change_group)
+        self.user.custom_permissions.add(self.view_all_units)
+        self.assertMatchesLegacy(self.user)
+
+        self.view_all_units.users_with_custom_permission.add(self.other)
+        self.assertMatchesLegacy(self.user, self.other)
+
+        self.user.user_permissions.remove(self.django_change_group)
+        self.view_all_units.users_with_custom_permission.clear()
+        self.assertMatchesLegacy(self.user, self.other)
+
+    def test_stale_instances_do_not_overwrite_masks(self):
+        stale_user = User.objects.get(pk=self.user.pk)
+        stale_role = Role.objects.get(pk=self.manager.pk)
+
+        self.user.roles.add(self.manager)
+        stale_user.name = 'Ana Maria'
+        stale_user.save()
+        self.assertMatchesLegacy(self.user)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('users.add_projects'))
+
+        self.manager.permissions.add(self.view_reports)
+        stale_role.description = 'Descrição alterada'
+        stale_role.save()
+        self.assertMatchesLegacy(self.user)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('users.view_reports'))
+
+    def test_inactive_and_superuser(self):
+        self.user.roles.add(self.manager)
+        self.user.is_active = False
+        self.user.save()
+        self.assertMatchesLegacy(self.user)
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('users.view_projects'))
+
+        admin = User.objects.create_superuser('root@teste.com', 'Root', password='x')
+        self.assertTrue(admin.has_perm('users.view_projects'))
+        self.assertTrue(admin.has_all_perms(['users.view_projects', 'users.permissao_inexistente']))
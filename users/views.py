@@ -7,8 +7,10 @@ from django.urls import reverse_lazy
 from enterprises.models import Enterprise
 from django.core.paginator import Paginator
 from users.decorators import permission_required
-from users.models import User, Role, SystemModule
+from users.models import User, Role
 from users.utils import get_allowed_roles_for_user
+from users.catalog import get_catalog
+from core.digits import only_digits
 from django.contrib.auth.models import Permission
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login , authenticate, logout
@@ -80,7 +82,7 @@ def register_view(request):
             return render(request, "users/register.html", context)
 
         # Verifica se o CPF já existe
-        if User.objects.filter(cpf=cpf).exists():
+        if User.objects.filter(cpf_digits=only_digits(cpf)).exists():
             messages.error(request, 'CPF já cadastrado.')
             return render(request, "users/register.html", context)
 
@@ -178,7 +180,11 @@ def user_config_view(request):
         user.phone = phone_value if phone_value else None
         
         user.theme_preference = request.POST.get('theme_preference', user.theme_preference)
-        user.cpf = request.POST.get('cpf', user.cpf)
+        cpf = request.POST.get('cpf', user.cpf)
+        if only_digits(cpf) and User.objects.filter(cpf_digits=only_digits(cpf)).exclude(pk=user.pk).exists():
+            messages.error(request, 'CPF já cadastrado para outro usuário.')
+            return redirect('user_config')
+        user.cpf = cpf
         
         # Email permanece bloqueado para edição (apenas leitura)
         # user.email = request.POST.get('email', user.email)  # Removido
@@ -275,32 +281,12 @@ def create_user_view(request):
         messages.error(request, 'Você não tem permissão para criar usuários com qualquer cargo.')
         return redirect('list_users')
     
-    available_roles = Role.objects.filter(is_active=True, code__in=allowed_role_codes)
+    available_roles = list(Role.objects.filter(is_active=True, code__in=allowed_role_codes))
     
-    # Identificar quais cargos têm a permissão view_all_units
-    roles_with_view_all_units = []
-    for role in available_roles:
-        role_permissions = role.permissions.all()
-        for perm in role_permissions:
-            if perm.codename == 'view_all_units':
-                roles_with_view_all_units.append(role.id)
-                break
-    
-    # Buscar módulos do sistema e suas permissões
-    system_modules = []
-    for module in SystemModule.objects.filter(is_active=True).order_by('order'):
-        # Buscar permissões relacionadas a este módulo
-        module_permissions = Permission.objects.filter(
-            codename__endswith=f'_{module.code}',
-            content_type__app_label='users'
-        ).order_by('name')
-        
-        system_modules.append({
-            'code': module.code,
-            'name': module.name,
-            'icon': module.icon,
-            'permissions': module_permissions
-        })
+    # Módulos, permissões e cargos com view_all_units vêm do catálogo em memória (users/catalog.py)
+    catalog = get_catalog()
+    roles_with_view_all_units = catalog.roles_granting('view_all_units', [role.id for role in available_roles])
+    system_modules = catalog.modules
 
     context = {
         'units': units,
@@ -349,18 +335,9 @@ def create_user_view(request):
         context['form_data'] = form_data
 
         # Verificar se os cargos selecionados têm a permissão view_all_units
-        selected_roles_have_view_all_units = False
-        if selected_roles:
-            selected_role_objects = Role.objects.filter(id__in=selected_roles, is_active=True)
-            for role in selected_role_objects:
-                # Verificar se o cargo tem a permissão view_all_units
-                role_permissions = role.permissions.all()
-                for perm in role_permissions:
-                    if perm.codename == 'view_all_units':
-                        selected_roles_have_view_all_units = True
-                        break
-                if selected_roles_have_view_all_units:
-                    break
+        selected_roles_have_view_all_units = bool(
+            selected_roles and catalog.roles_granting('view_all_units', [role_id for role_id in selected_roles if role_id.isdigit()])
+        )
 
         # Campos obrigatórios básicos
         required_fields = {
@@ -396,7 +373,7 @@ def create_user_view(request):
             messages.error(request, 'Email já cadastrado.')
             return render(request, 'users/register_user.html', context)
 
-        if User.objects.filter(cpf=cpf_clean).exists():
+        if User.objects.filter(cpf_digits=cpf_clean).exists():
             messages.error(request, 'CPF já cadastrado.')
             return render(request, 'users/register_user.html', context)
 
@@ -505,30 +482,12 @@ def edit_user_view(request, user_id):
             messages.error(request, 'Você não tem permissão para editar cargos de usuários.')
             return redirect('list_users')
         
-        available_roles = Role.objects.filter(is_active=True, code__in=allowed_role_codes)
+        available_roles = list(Role.objects.filter(is_active=True, code__in=allowed_role_codes))
         
-        # Identificar quais cargos têm a permissão view_all_units
-        roles_with_view_all_units = []
-        for role in available_roles:
-            role_permissions = role.permissions.all()
-            for perm in role_permissions:
-                if perm.codename == 'view_all_units':
-                    roles_with_view_all_units.append(role.id)
-                    break
-        
-        system_modules = []
-        for module in SystemModule.objects.filter(is_active=True).order_by('order'):
-            module_permissions = Permission.objects.filter(
-                codename__endswith=f'_{module.code}',
-                content_type__app_label='users'
-            ).order_by('name')
-            
-            system_modules.append({
-                'code': module.code,
-                'name': module.name,
-                'icon': module.icon,
-                'permissions': module_permissions
-            })
+        # Módulos, permissões e cargos com view_all_units vêm do catálogo em memória (users/catalog.py)
+        catalog = get_catalog()
+        roles_with_view_all_units = catalog.roles_granting('view_all_units', [role.id for role in available_roles])
+        system_modules = catalog.modules
 
         # IDs dos roles e permissões atuais do usuário
         user_roles = list(edit_user.roles.values_list('id', flat=True))
@@ -570,14 +529,9 @@ def edit_user_view(request, user_id):
                         return render(request, 'users/edit_user.html', context)
                 
                 # Verificar se algum dos cargos selecionados tem view_all_units
-                for role in selected_role_objects:
-                    role_permissions = role.permissions.all()
-                    for perm in role_permissions:
-                        if perm.codename == 'view_all_units':
-                            selected_roles_have_view_all_units = True
-                            break
-                    if selected_roles_have_view_all_units:
-                        break
+                selected_roles_have_view_all_units = bool(
+                    catalog.roles_granting('view_all_units', [role_id for role_id in selected_roles if role_id.isdigit()])
+                )
 
             # Validação de email único
             if User.objects.filter(email=email).exclude(id=user_id).exists():
@@ -586,7 +540,7 @@ def edit_user_view(request, user_id):
 
             # Validação de CPF único
             cpf_clean = ''.join(filter(str.isdigit, cpf))
-            if User.objects.filter(cpf=cpf_clean).exclude(id=user_id).exists():
+            if User.objects.filter(cpf_digits=cpf_clean).exclude(id=user_id).exists():
                 messages.error(request, 'CPF já cadastrado.')
                 return render(request, 'users/edit_user.html', context)
 
@@ -753,12 +707,10 @@ class PasswordResetView(DjangoPasswordResetView):
     
     def form_valid(self, form):
         """Customiza o envio do email com informações da empresa"""
-        from django.core.mail import EmailMultiAlternatives
-        from django.template import loader
         from django.utils.encoding import force_bytes
         from django.utils.http import urlsafe_base64_encode
         from django.contrib.auth.tokens import default_token_generator
-        import threading
+        from mailer.utils import queue_email, render_email
         
         # Obtém o email digitado
         email = form.cleaned_data["email"]
@@ -784,11 +736,8 @@ class PasswordResetView(DjangoPasswordResetView):
                 'enterprise': enterprise_for_email,
             }
             
-            # Carrega os templates
-            subject_template = loader.get_template(self.subject_template_name)
-            
-            # Renderiza o assunto
-            subject = subject_template.render(context)
+            # Renderiza o assunto (template compilado fica em cache)
+            subject = render_email(self.subject_template_name, context)
             subject = ''.join(subject.splitlines())  # Remove quebras de linha
             
             # Define o remetente baseado na empresa
@@ -796,37 +745,15 @@ class PasswordResetView(DjangoPasswordResetView):
             # Comentado temporariamente devido a restrições SMTP:
             # from_email = f"no-reply@{enterprise_for_email.get_full_domain()}" if enterprise_for_email else settings.DEFAULT_FROM_EMAIL
             
-            # Função para envio em thread separada
-            def send_email_async():
-                try:
-                    # Carrega template HTML
-                    html_template = loader.get_template('password_reset/password_reset_email_html.html')
-                    html_body = html_template.render(context)
-                    
-                    # Cria email apenas HTML (mais moderno)
-                    from django.core.mail import EmailMessage
-                    email_message = EmailMessage(
-                        subject=subject,
-                        body=html_body,
-                        from_email=from_email,
-                        to=[user.email]
-                    )
-                    
-                    # Define como HTML
-                    email_message.content_subtype = "html"
-                    
-                    # Envia o email
-                    result = email_message.send()
-                    print(f"✅ Email HTML enviado com sucesso para {user.email}! Resultado: {result}")
-                    
-                except Exception as e:
-                    # Log do erro (em produção, usar logging adequado)
-                    print(f"❌ Erro ao enviar email de recuperação para {user.email}: {e}")
-            
-            # Inicia thread para envio assíncrono
-            email_thread = threading.Thread(target=send_email_async)
-            email_thread.daemon = True  # Thread será fechada quando o processo principal terminar
-            email_thread.start()
+            # Caixa de saída com prioridade alta: o link expira em 30 minutos
+            queue_email(
+                to=user.email,
+                subject=subject,
+                template_name='password_reset/password_reset_email_html.html',
+                context=context,
+                from_email=from_email,
+                priority=10,
+            )
         
         # Não chama super().form_valid(form) porque já enviamos o email customizado
         # Retorna redirect direto para a página de sucesso